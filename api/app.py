@@ -1,11 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .controllers import menu_controller, order_controller
+from . import metrics
+from .compression import CompressionMiddleware
+from .config import COMPRESSION_LEVEL, COMPRESSION_MIN_BYTES, STARTUP_WARM_CONNECTIONS
+from .events import broker
+from .controllers import events_controller, menu_controller, order_controller, stats_controller
 
 load_dotenv()
 
-app = FastAPI(title="Restaurant API")
+
+async def warm_up(connections: int = STARTUP_WARM_CONNECTIONS):
+    """Create the storage client and open its connections before the first request"""
+    if connections <= 0:
+        return
+    try:
+        await asyncio.gather(
+            order_controller.order_repository.warm_up(connections),
+            menu_controller.menu_repository.warm_up(),
+        )
+    except Exception as e:
+        # Serve anyway, requests will report the storage error themselves
+        print(f"Error warming up storage: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    broker.start()
+    await warm_up()
+    yield
+    await broker.stop()
+
+
+app = FastAPI(title="Restaurant API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -14,12 +44,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES, compresslevel=COMPRESSION_LEVEL)
+
+# Per-route request latency and in-flight counts, served on /metrics
+app.add_middleware(metrics.MetricsMiddleware, router=app.router)
+
 # Routers
 app.include_router(menu_controller.router)
 app.include_router(order_controller.router)
+app.include_router(stats_controller.router)
+app.include_router(events_controller.router)
 
 @app.get("/")
 async def root():
-    return {"message": "Restaurant API is running"}
\ No newline at end of file
+    return {"message": "Restaurant API is running"}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request and DynamoDB metrics for this worker in Prometheus text format"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
\ No newline at end of file
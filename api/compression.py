@@ -0,0 +1,24 @@
+from typing import Tuple
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class CompressionMiddleware:
+    """GZip responses of at least ``minimum_size`` bytes for clients that accept it.
+
+    Paths under ``skip_paths`` pass through untouched. That covers the /events
+    stream, where a compressor would hold frames back until its buffer fills.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int,
+                 skip_paths: Tuple[str, ...] = ('/events',)):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] == 'http' and scope['path'].startswith(self.skip_paths):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
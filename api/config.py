@@ -0,0 +1,75 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Storage backend: "dynamodb", or "sqlite" for a single-site deployment in one local file
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'dynamodb')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'restaurant.db')
+# Reader threads (one connection each); SQLite writes always go through one thread
+SQLITE_READERS = int(os.getenv('SQLITE_READERS', '4'))
+
+# Optional endpoint override, e.g. http://localhost:8001 for DynamoDB Local
+DYNAMODB_ENDPOINT_URL = os.getenv('DYNAMODB_ENDPOINT_URL') or None
+
+# Upper bound on DynamoDB calls in flight per worker process
+DYNAMODB_MAX_CONCURRENCY = int(os.getenv('DYNAMODB_MAX_CONCURRENCY', '32'))
+
+# Production server (python -m api.server): worker processes, 0 for one per CPU core
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '0'))
+# Storage connections each worker opens at startup, before it accepts requests (0 skips warm-up)
+STARTUP_WARM_CONNECTIONS = int(os.getenv('STARTUP_WARM_CONNECTIONS', '8'))
+
+# Page sizes for the list endpoints
+PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '100'))
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '1000'))
+
+# Parallel scans: segments per full-table read, and an optional cap on scan
+# requests per second across all segments (0 disables the cap)
+SCAN_SEGMENTS = int(os.getenv('SCAN_SEGMENTS', '4'))
+SCAN_MAX_REQUESTS_PER_SECOND = float(os.getenv('SCAN_MAX_REQUESTS_PER_SECOND', '0'))
+
+# Dashboard: how far back "recent orders" reach
+RECENT_ORDERS_DAYS = int(os.getenv('RECENT_ORDERS_DAYS', '30'))
+
+# Widest ?since=&until= window on the order list, one index query per day
+ORDER_RANGE_MAX_DAYS = int(os.getenv('ORDER_RANGE_MAX_DAYS', '366'))
+
+# In-process menu cache; writes through another worker become visible after the TTL
+MENU_CACHE_TTL_SECONDS = float(os.getenv('MENU_CACHE_TTL_SECONDS', '60'))
+MENU_CACHE_MAX_ENTRIES = int(os.getenv('MENU_CACHE_MAX_ENTRIES', '1024'))
+
+# Responses of at least this many bytes are gzipped for clients that accept it; level
+# 1-9 trades CPU for size, the middle levels get most of the size reduction cheaply
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '5'))
+
+# Group commit for POST /orders/ on DynamoDB: creates arriving within this many
+# milliseconds share one BatchWriteItem (0 turns it off), and at most
+# ORDER_WRITE_MAX_PENDING creates wait for a batch before new ones are held back
+ORDER_WRITE_COALESCE_MS = float(os.getenv('ORDER_WRITE_COALESCE_MS', '0'))
+ORDER_WRITE_MAX_PENDING = int(os.getenv('ORDER_WRITE_MAX_PENDING', '1000'))
+
+# Order archive (scripts/archive_orders.py): orders placed more than ORDER_ARCHIVE_AFTER_DAYS
+# ago move out of the orders table into monthly gzipped JSON Lines files under ORDER_ARCHIVE_DIR
+ORDER_ARCHIVE_DIR = os.getenv('ORDER_ARCHIVE_DIR', 'archive')
+ORDER_ARCHIVE_AFTER_DAYS = float(os.getenv('ORDER_ARCHIVE_AFTER_DAYS', '365'))
+
+# Batch endpoints
+ORDER_BATCH_MAX = int(os.getenv('ORDER_BATCH_MAX', '500'))
+MENU_BATCH_MAX = int(os.getenv('MENU_BATCH_MAX', '300'))
+BATCH_MAX_RETRIES = int(os.getenv('BATCH_MAX_RETRIES', '5'))
+
+# Delta sync (/orders/changes, /menu/changes): how long entries stay in the change log
+# before scripts/trim_change_log.py removes them, and how long a reader waits on a
+# missing sequence number before treating it as a write that failed before logging
+CHANGE_LOG_RETENTION_DAYS = float(os.getenv('CHANGE_LOG_RETENTION_DAYS', '7'))
+CHANGE_LOG_SETTLE_SECONDS = float(os.getenv('CHANGE_LOG_SETTLE_SECONDS', '5'))
+
+# /events stream: frames buffered per subscriber before it is cut off as too slow,
+# and how often an idle stream sends a keep-alive comment
+EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', '256'))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+# Relay shared by the workers of one deployment, e.g. tcp://127.0.0.1:8900 (scripts/event_broker.py)
+EVENT_BROKER_URL = os.getenv('EVENT_BROKER_URL') or None
@@ -0,0 +1,42 @@
+"""Delta sync: what changed in a table since a client's last sync, from the change log"""
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from api.repositories.backends import get_change_log_repository
+
+change_log = get_change_log_repository()
+
+
+async def record_changes(stream: str, changes: List[Tuple[str, str]]):
+    # The write already succeeded. A mirror that misses this entry catches up on the
+    # item's next change, or on its next full reload
+    try:
+        await change_log.record(stream, changes)
+    except Exception as e:
+        print(f"Error logging changes: {str(e)}")
+
+
+async def read_changes(stream: str, key_name: str, field: str, since: Optional[int], limit: int,
+                       get_many: Callable[..., Awaitable[List[dict]]],
+                       prepare: Callable[[dict], dict]) -> dict:
+    """One page of changes after ``since``, each with the item's current state or as a tombstone.
+
+    Without ``since`` there are no changes, only the position to sync from
+    after loading everything.
+    """
+    if since is None:
+        return {'changes': [], 'next_since': await change_log.position(stream), 'has_more': False}
+
+    entries, has_more = await change_log.read(stream, since, limit)
+    # A key changed several times in this page is sent once, at its latest seq
+    latest = {entry['key']: entry['seq'] for entry in entries}
+    found = {}
+    if latest:
+        # Consistent reads, the entry was logged right after the write it records
+        found = {item[key_name]: item for item in await get_many(list(latest), consistent_read=True)}
+    changes = []
+    for key, seq in sorted(latest.items(), key=lambda pair: pair[1]):
+        if key in found:
+            changes.append({'seq': seq, key_name: key, 'deleted': False, field: prepare(found[key])})
+        else:
+            changes.append({'seq': seq, key_name: key, 'deleted': True})
+    return {'changes': changes, 'next_since': entries[-1]['seq'] if entries else since, 'has_more': has_more}
@@ -0,0 +1,52 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from api.config import EVENTS_HEARTBEAT_SECONDS
+from api.events import TOPICS, Subscriber, broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Tells EventSource how long to wait before reconnecting, in milliseconds
+_PREAMBLE = b'retry: 3000\n\n'
+_HEARTBEAT = b': keep-alive\n\n'
+_OVERFLOW_PREFIX = b'event: overflow'
+
+
+async def _stream(subscriber: Subscriber) -> AsyncIterator[bytes]:
+    try:
+        yield _PREAMBLE
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield _HEARTBEAT
+                continue
+            yield frame
+            if frame.startswith(_OVERFLOW_PREFIX):
+                return
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+@router.get("")
+async def stream_events(topics: Optional[str] = Query(None, description="Comma-separated: order, menu")):
+    """Server-Sent Events stream of order and menu changes.
+
+    Each event is named after its topic and carries a compact JSON summary of
+    the change. An ``overflow`` event means the client fell too far behind and
+    missed events. The stream then ends, and the client should re-read what it
+    shows.
+    """
+    wanted = TOPICS if not topics else {topic.strip() for topic in topics.split(',') if topic.strip()}
+    unknown = sorted(wanted - TOPICS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topic(s): {', '.join(unknown)}")
+    return StreamingResponse(
+        _stream(broker.subscribe(wanted)),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
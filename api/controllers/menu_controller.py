@@ -1,13 +1,36 @@
+import asyncio
 from datetime import datetime
 from decimal import Decimal
-from fastapi import APIRouter, HTTPException, Response, status
-from typing import List
-from ..repositories.menu_repository import MenuRepository
-from ..schemas.menu_schemas import MenuItemCreate, MenuItemResponse, MenuItemUpdate
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional
+from ..config import MENU_BATCH_MAX, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from ..events import publish_menu
+from ..repositories.backends import get_menu_repository, get_stats_repository
+from ..repositories.cache import etag_matches
+from ..repositories.menu_repository import CachedMenuRepository
+from ..schemas.menu_schemas import (
+    MenuItemBatchResponse, MenuItemChangesResponse, MenuItemCreate, MenuItemResponse, MenuItemUpdate,
+)
+from .changes import read_changes, record_changes
+from .preconditions import parse_if_match, version_etag
+from .serialization import json_response, model_encoder, parse_fields
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
-menu_repository = MenuRepository()
+menu_repository = CachedMenuRepository(get_menu_repository())
+stats_repository = get_stats_repository()
+
+# Menu reads come from the in-process cache, so ?fields= only trims the response
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. item_id,name,price"
+
+
+async def record_menu_count(delta: int):
+    # The menu write already succeeded, drift is repaired by scripts/rebuild_stats.py
+    try:
+        await stats_repository.record_menu_count_change(delta)
+    except Exception as e:
+        print(f"Error updating dashboard stats: {str(e)}")
 
 
 @router.post("/", response_model=MenuItemResponse, status_code=status.HTTP_201_CREATED)
@@ -19,6 +42,9 @@ async def create_menu_item(item: MenuItemCreate):
         item_dict['price'] = Decimal(str(item_dict['price']))
 
         created_item = await menu_repository.create_item(item_dict)
+        await asyncio.gather(record_menu_count(1),
+                             record_changes('menu_items', [(created_item['item_id'], 'created')]))
+        publish_menu('created', created_item)
         return created_item
     except Exception as e:
         print(f"Error in create_menu_item: {str(e)}")
@@ -26,75 +52,155 @@ async def create_menu_item(item: MenuItemCreate):
 
 
 @router.get("/", response_model=List[MenuItemResponse])
-async def get_all_menu_items():
-    """Get all menu items"""
+async def get_all_menu_items(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    fresh: bool = Query(False, description="Read the table rather than this worker's cache"),
+):
+    """Get one page of menu items, the next page's cursor is in the X-Next-Cursor header"""
     try:
-        items = await menu_repository.get_all()
-        for i, item in enumerate(items):
-            for attr, val in item.items():
-                if attr == 'price':
-                    items[i][attr] = float(val)
-        return items
+        only = parse_fields(fields, MenuItemResponse)
+        if fresh:
+            # A full sync must not see a page cached before the change-log position it started from
+            items, next_cursor = await menu_repository.repository.get_page(limit, cursor)
+            return json_response(MenuItemResponse, [{**item, 'price': float(item['price'])} for item in items],
+                                 headers={'X-Next-Cursor': next_cursor} if next_cursor else None, only=only)
+        entry = await menu_repository.get_page_entry(limit, cursor)
+        items, next_cursor = entry.value
+        headers = {'ETag': entry.etag, **({'X-Next-Cursor': next_cursor} if next_cursor else {})}
+        if etag_matches(if_none_match, entry.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        # Cached items are shared between requests, so convert copies
+        return json_response(MenuItemResponse, [{**item, 'price': float(item['price'])} for item in items],
+                             headers=headers, only=only)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/batch", response_model=MenuItemBatchResponse)
+async def get_menu_items(ids: str = Query(..., description="Comma-separated menu item IDs"),
+                         fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """Get several menu items by ID in one request"""
+    only = parse_fields(fields, MenuItemResponse)
+    item_ids = list(dict.fromkeys(item_id.strip() for item_id in ids.split(',') if item_id.strip()))
+    if not item_ids:
+        raise HTTPException(status_code=400, detail="No menu item IDs provided")
+    if len(item_ids) > MENU_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {MENU_BATCH_MAX} IDs per request")
+    try:
+        found = {item['item_id']: item for item in await menu_repository.get_many(item_ids)}
+        items = [{**found[item_id], 'price': float(found[item_id]['price'])}
+                 for item_id in item_ids if item_id in found]
+        missing = [item_id for item_id in item_ids if item_id not in found]
+        if only:
+            # The selection applies to each item rather than to the envelope
+            encode = model_encoder(MenuItemResponse, only=only)
+            return ORJSONResponse({'items': [encode(item) for item in items], 'missing': missing})
+        return json_response(MenuItemBatchResponse, {'items': items, 'missing': missing})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/changes", response_model=MenuItemChangesResponse)
+async def get_menu_changes(
+    since: Optional[int] = Query(None, ge=0, description="next_since from the previous sync"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+):
+    """Menu items created, updated or deleted after ``since``, oldest change first.
+
+    Without ``since``, returns only the position to sync from. 410 means the
+    log no longer reaches back to ``since`` and the menu has to be read again.
+    """
+    try:
+        # Straight from the table, the cache may hold another worker's stale copy
+        changes = await read_changes('menu_items', 'item_id', 'item', since, limit,
+                                     menu_repository.repository.get_many,
+                                     lambda item: {**item, 'price': float(item['price'])})
+        return json_response(MenuItemChangesResponse, changes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/stats")
+async def get_menu_cache_stats():
+    """Get the menu cache hit/miss counters for this worker"""
+    return menu_repository.cache.stats()
+
+
 @router.get("/{item_id}", response_model=MenuItemResponse)
-async def get_menu_item(item_id: str):
-    """Get a specific menu item by ID"""
+async def get_menu_item(item_id: str, response: Response, if_none_match: Optional[str] = Header(None),
+                        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """Get a specific menu item by ID, the ETag can be sent back as If-Match on writes"""
     try:
+        only = parse_fields(fields, MenuItemResponse)
         item = await menu_repository.get_by_id(item_id)
         if not item:
             raise HTTPException(status_code=404, detail="Menu item not found")
-        for attr, val in item.items():
-            if attr == 'price':
-                item[attr] = float(val)
-        return item
+        etag = version_etag(item.get('version'))
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        if only:
+            return json_response(MenuItemResponse, {**item, 'price': float(item['price'])},
+                                 headers={'ETag': etag}, only=only)
+        response.headers['ETag'] = etag
+        return {**item, 'price': float(item['price'])}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.put("/{item_id}", response_model=MenuItemResponse)
-async def update_menu_item(item_id: str, item: MenuItemCreate):
+async def update_menu_item(item_id: str, item: MenuItemCreate, response: Response,
+                           if_match: Optional[str] = Header(None)):
     """Update an entire menu item"""
     try:
-        existing_item = await menu_repository.get_by_id(item_id)
-        if not existing_item:
-            raise HTTPException(status_code=404, detail="Menu item not found")
-
         item_dict = item.model_dump()
         item_dict['created_at'] = str(datetime.now().timestamp())
-        updated_item = await menu_repository.update_item(item_id, item_dict)
+        updated_item = await menu_repository.update_item(item_id, item_dict, parse_if_match(if_match))
+        await record_changes('menu_items', [(item_id, 'updated')])
+        publish_menu('updated', updated_item)
+        response.headers['ETag'] = version_etag(updated_item['version'])
         return updated_item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.patch("/{item_id}", response_model=MenuItemResponse)
-async def patch_menu_item(item_id: str, item: MenuItemUpdate):
+async def patch_menu_item(item_id: str, item: MenuItemUpdate, response: Response,
+                          if_match: Optional[str] = Header(None)):
     """Partially update a menu item"""
     try:
-        existing_item = await menu_repository.get_by_id(item_id)
-        if not existing_item:
-            raise HTTPException(status_code=404, detail="Menu item not found")
-
         item_dict = item.model_dump(exclude_unset=True)
         item_dict['created_at'] = str(datetime.now().timestamp())
-        patched_item = await menu_repository.patch_item(item_id, item_dict)
+        patched_item = await menu_repository.patch_item(item_id, item_dict, parse_if_match(if_match))
+        await record_changes('menu_items', [(item_id, 'updated')])
+        publish_menu('updated', patched_item)
+        response.headers['ETag'] = version_etag(patched_item['version'])
         return patched_item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_menu_item(item_id: str):
+async def delete_menu_item(item_id: str, if_match: Optional[str] = Header(None)):
     """Delete a menu item"""
     try:
-        existing_item = await menu_repository.get_by_id(item_id)
-        if not existing_item:
-            raise HTTPException(status_code=404, detail="Menu item not found")
-
-        await menu_repository.delete_item(item_id)
+        await menu_repository.delete_item(item_id, parse_if_match(if_match))
+        await asyncio.gather(record_menu_count(-1), record_changes('menu_items', [(item_id, 'deleted')]))
+        publish_menu('deleted', {'item_id': item_id})
         return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,34 +1,86 @@
+import asyncio
 from datetime import datetime
-from decimal import ROUND_DOWN, Decimal
-from typing import List
+from typing import AsyncIterator, FrozenSet, Iterable, List, Literal, Optional, Tuple
 import uuid
 
-from fastapi import APIRouter, status, Response, HTTPException
-from api.repositories.order_repository import OrderRepository
-from api.schemas.order_schemas import OrderUpdate, OrderResponse, OrderCreate
+from fastapi import APIRouter, Body, Header, status, Query, Response, HTTPException
+from fastapi.responses import StreamingResponse
+from api import money
+from api.config import (
+    ORDER_BATCH_MAX, ORDER_RANGE_MAX_DAYS, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, RECENT_ORDERS_DAYS, SCAN_SEGMENTS,
+)
+from api.controllers.changes import read_changes, record_changes
+from api.controllers.menu_controller import menu_repository
+from api.controllers.preconditions import parse_if_match, version_etag
+from api.controllers.serialization import json_lines, json_response, parse_fields
+from api.events import publish_order
+from api.repositories.archive_repository import OrderArchiveRepository
+from api.repositories.backends import get_order_repository, get_stats_repository
+from api.repositories.base_repository import projection
+from api.repositories.order_repository import compact_order
+from api.schemas.order_schemas import (
+    OrderBatchResponse, OrderChangesResponse, OrderUpdate, OrderResponse, OrderCreate,
+)
 
-def calculate_price(order:dict):
-    items = order['items']
+async def price_lines(lines: Iterable[dict]) -> List[dict]:
+    """Turn submitted (item_id, quantity) lines into compact lines priced from the menu"""
+    lines = list(lines)
+    prices = await menu_repository.get_prices(line['item_id'] for line in lines)
+    unknown = sorted({line['item_id'] for line in lines} - prices.keys())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown menu item(s): {', '.join(unknown)}")
+    return [
+        {'item_id': line['item_id'], 'quantity': line['quantity'], 'unit_price': prices[line['item_id']]}
+        for line in lines
+    ]
 
-    subtotal = Decimal('0.0')
-    for item_dict in items:
-        item_dict['item']['price'] = Decimal(str(item_dict['item']['price']))
-        item_dict['quantity'] = Decimal(str(item_dict['quantity']))
-        subtotal += item_dict['item']['price'] * item_dict['quantity']
 
-    order['subtotal'] = subtotal.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
-    discount = order['subtotal'] * order['discount_pct']
-    total = order['subtotal'] - discount
-    order['total'] = total.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
-
-    return order
+def calculate_price(order: dict) -> dict:
+    """Copy of the order with its subtotal and total worked out in cents, see api/money.py"""
+    subtotal, total = money.price_order(order['items'], order['discount_pct'])
+    return {**order, 'subtotal': money.from_cents(subtotal), 'total': money.from_cents(total)}
 
 router = APIRouter(prefix="/orders", tags=["order"])
 
-order_repository = OrderRepository()
+order_repository = get_order_repository()
+stats_repository = get_stats_repository()
+# Orders moved out of the table by scripts/archive_orders.py
+order_archive = OrderArchiveRepository()
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. order_id,order_number,total,order_date"
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def record_stats(old_order: Optional[dict], new_order: Optional[dict]):
+    # The order write already succeeded, drift is repaired by scripts/rebuild_stats.py
+    try:
+        await stats_repository.record_order_change(old_order, new_order)
+    except Exception as e:
+        print(f"Error updating dashboard stats: {str(e)}")
+
+
+async def record_batch_stats(changes: List[Tuple[Optional[dict], Optional[dict]]]):
+    try:
+        await stats_repository.record_order_changes(changes)
+    except Exception as e:
+        print(f"Error updating dashboard stats: {str(e)}")
+
+
+async def expand_items(orders: List[dict]) -> List[dict]:
+    """Attach the current menu item to each order line, for ?expand=items"""
+    item_ids = {line['item_id'] for order in orders for line in order['items']}
+    menu_items = {item['item_id']: {**item, 'price': float(item['price'])}
+                  for item in await menu_repository.get_many(list(item_ids))}
+    return [
+        {**order, 'items': [
+            {**line, 'item': menu_items[line['item_id']]} if line['item_id'] in menu_items else line
+            for line in order['items']
+        ]}
+        for order in orders
+    ]
+
+
+@router.post("/", response_model=OrderResponse, response_model_exclude_unset=True,
+             status_code=status.HTTP_201_CREATED)
 async def create_order(order: OrderCreate):
     """Create a new order"""
     try:
@@ -37,89 +89,288 @@ async def create_order(order: OrderCreate):
         if not order_dict.get('order_number'):
             order_dict['order_number'] = str(uuid.uuid4())[:6]
 
+        order_dict['items'] = await price_lines(order_dict['items'])
         order_dict = calculate_price(order_dict)
         order_dict['order_date'] = str(datetime.now().timestamp())
         created_order = await order_repository.create_order(order_dict)
+        await asyncio.gather(record_stats(None, created_order),
+                             record_changes('orders', [(created_order['order_id'], 'created')]))
+        publish_order('created', created_order)
         return created_order
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in create_order: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/", response_model=List[OrderResponse])
-async def get_all_orders():
-    """Get all order"""
+@router.post("/batch", response_model=OrderBatchResponse, response_model_exclude_unset=True)
+async def create_orders(orders: List[OrderCreate] = Body(..., min_length=1, max_length=ORDER_BATCH_MAX)):
+    """Create many orders at once, failures are reported per order"""
     try:
-        orders = await order_repository.get_all()
-        for i, order in enumerate(orders):
-            for j, item in enumerate(order['items']):
-                for attr, val in item.items():
-                    if isinstance(val, Decimal):
-                        orders[i]['items'][j][attr] = float(val)
-        return orders
+        order_date = str(datetime.now().timestamp())
+        order_dicts = [order.model_dump() for order in orders]
+        prices = await menu_repository.get_prices(
+            line['item_id'] for order_dict in order_dicts for line in order_dict['items']
+        )
+        unit_cents = {item_id: money.to_cents(price) for item_id, price in prices.items()}
+        results, priced = [], []
+        for index, order_dict in enumerate(order_dicts):
+            unknown = sorted({line['item_id'] for line in order_dict['items']} - prices.keys())
+            if unknown:
+                results.append({'index': index, 'status': 'failed',
+                                'error': f"Unknown menu item(s): {', '.join(unknown)}"})
+                continue
+            if not order_dict.get('order_number'):
+                order_dict['order_number'] = str(uuid.uuid4())[:6]
+            order_dict['items'] = [
+                {'item_id': line['item_id'], 'quantity': line['quantity'], 'unit_price': prices[line['item_id']]}
+                for line in order_dict['items']
+            ]
+            order_dict['order_date'] = order_date
+            priced.append((index, order_dict))
+
+        totals = money.price_orders([order_dict for _, order_dict in priced], unit_cents)
+        for (_, order_dict), (subtotal, total) in zip(priced, totals):
+            order_dict['subtotal'] = money.from_cents(subtotal)
+            order_dict['total'] = money.from_cents(total)
+
+        errors = await order_repository.create_orders([order_dict for _, order_dict in priced])
+        written = []
+        for position, (index, order_dict) in enumerate(priced):
+            if position in errors:
+                results.append({'index': index, 'status': 'failed', 'error': errors[position]})
+            else:
+                results.append({'index': index, 'status': 'created', 'order': order_dict})
+                written.append((None, order_dict))
+
+        created_ids = [order_dict['order_id'] for _, order_dict in written]
+        await asyncio.gather(record_batch_stats(written),
+                             record_changes('orders', [(order_id, 'created') for order_id in created_ids]))
+        for _, order_dict in written:
+            publish_order('created', order_dict)
+
+        results.sort(key=lambda result: result['index'])
+        return {'created': len(written), 'failed': len(results) - len(written), 'results': results}
+    except Exception as e:
+        print(f"Error in create_orders: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/", response_model=List[OrderResponse], response_model_exclude_unset=True)
+async def get_all_orders(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    since: Optional[float] = Query(None, ge=0, description="Earliest order_date, as a Unix timestamp"),
+    until: Optional[float] = Query(None, ge=0, description="Latest order_date, as a Unix timestamp"),
+    expand: Optional[Literal['items']] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """Get one page of orders, the next page's cursor is in the X-Next-Cursor header.
+
+    With since/until the orders in that window come back newest first.
+    """
+    try:
+        only = parse_fields(fields, OrderResponse)
+        if since is None and until is None:
+            orders, next_cursor = await order_repository.get_page(limit, cursor, only)
+        else:
+            if until is None:
+                until = datetime.now().timestamp()
+            if since is None:
+                since = until - RECENT_ORDERS_DAYS * 86400
+            if since > until:
+                raise HTTPException(status_code=400, detail="since must not be after until")
+            if until - since > ORDER_RANGE_MAX_DAYS * 86400:
+                raise HTTPException(status_code=400,
+                                    detail=f"Time range may span at most {ORDER_RANGE_MAX_DAYS} days")
+            orders, next_cursor = await order_repository.get_range_page(since, until, limit, cursor, only)
+        orders = [compact_order(order) for order in orders]
+        if expand == 'items':
+            orders = await expand_items(orders)
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+        return json_response(OrderResponse, orders, exclude_unset=True, headers=headers, only=only)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: str):
+async def _ndjson_pages(pages: AsyncIterator[list], only: Optional[FrozenSet[str]]) -> AsyncIterator[bytes]:
+    # One chunk per DynamoDB page keeps memory bounded by the page size
+    async for page in pages:
+        yield json_lines(OrderResponse, [compact_order(order) for order in page], exclude_unset=True, only=only)
+
+
+@router.get("/export")
+async def export_orders(segments: int = Query(SCAN_SEGMENTS, ge=1, le=64),
+                        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """Stream every order as newline-delimited JSON, in no particular order"""
+    only = parse_fields(fields, OrderResponse)
+    return StreamingResponse(
+        _ndjson_pages(order_repository.parallel_scan(segments, **projection(only)), only),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/archive")
+async def get_archived_orders(since: float = Query(..., description="Unix timestamp"),
+                              until: float = Query(..., description="Unix timestamp"),
+                              fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """Stream archived orders placed between since and until as newline-delimited JSON.
+
+    Months come oldest first, orders within a month in no particular order.
+    """
+    if since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    only = parse_fields(fields, OrderResponse)
+    return StreamingResponse(_ndjson_pages(order_archive.iter_pages(since, until), only),
+                             media_type="application/x-ndjson")
+
+
+@router.get("/changes", response_model=OrderChangesResponse, response_model_exclude_unset=True)
+async def get_order_changes(
+    since: Optional[int] = Query(None, ge=0, description="next_since from the previous sync"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+):
+    """Orders created, updated or deleted after ``since``, oldest change first.
+
+    Without ``since``, returns only the position to sync from: take it, read
+    every order, then call again with it. 410 means the log no longer reaches
+    back to ``since`` and everything has to be read again.
+    """
+    try:
+        changes = await read_changes('orders', 'order_id', 'order', since, limit,
+                                     order_repository.get_many, compact_order)
+        return json_response(OrderChangesResponse, changes, exclude_unset=True)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/by-number/{order_number}", response_model=List[OrderResponse], response_model_exclude_unset=True)
+async def get_orders_by_number(order_number: str, expand: Optional[Literal['items']] = None,
+                               fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """Get the orders with a receipt order number, newest first"""
+    try:
+        only = parse_fields(fields, OrderResponse)
+        orders = await order_repository.get_by_number(order_number, only)
+        if not orders:
+            raise HTTPException(status_code=404, detail="Order not found")
+        orders = [compact_order(order) for order in orders]
+        if expand == 'items':
+            orders = await expand_items(orders)
+        return json_response(OrderResponse, orders, exclude_unset=True, only=only)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{order_id}", response_model=OrderResponse, response_model_exclude_unset=True)
+async def get_order(order_id: str, response: Response, expand: Optional[Literal['items']] = None,
+                    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """Get a specific order by ID"""
     try:
-        order = await order_repository.get_by_id(order_id)
-        for i, item in enumerate(order['items']):
-            for attr, val in item.items():
-                if isinstance(val, Decimal):
-                    order['items'][i][attr] = float(val)
+        only = parse_fields(fields, OrderResponse)
+        # The version is always read, it is the ETag
+        order = await order_repository.get_by_id(order_id, only and only | {'version'})
         if not order:
             raise HTTPException(status_code=404, detail="Order order not found")
+        etag = version_etag(order.get('version'))
+        order = compact_order(order)
+        if expand == 'items':
+            [order] = await expand_items([order])
+        if only:
+            return json_response(OrderResponse, order, exclude_unset=True, headers={'ETag': etag}, only=only)
+        response.headers['ETag'] = etag
         return order
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/{order_id}", response_model=OrderResponse)
-async def update_order(order_id: str, order: OrderCreate):
-    """Update an entire order"""
+@router.put("/{order_id}", response_model=OrderResponse, response_model_exclude_unset=True)
+async def update_order(order_id: str, order: OrderCreate, response: Response,
+                       if_match: Optional[str] = Header(None)):
+    """Update an entire order, send If-Match with the order's ETag to avoid lost updates"""
     try:
-        existing_order = await order_repository.get_by_id(order_id)
-        if not existing_order:
-            raise HTTPException(status_code=404, detail="Order not found")
         order_dict = order.model_dump()
         order_dict['order_id'] = order_id
+        order_dict['items'] = await price_lines(order_dict['items'])
         order_dict = calculate_price(order_dict)
         order_dict['order_date'] = str(datetime.now().timestamp())
-        updated_order = await order_repository.update_order(order_id, order_dict)
+        existing_order, updated_order = await order_repository.update_order(
+            order_id, order_dict, parse_if_match(if_match)
+        )
+        await asyncio.gather(record_stats(existing_order, updated_order),
+                             record_changes('orders', [(order_id, 'updated')]))
+        publish_order('updated', updated_order)
+        response.headers['ETag'] = version_etag(updated_order['version'])
         return updated_order
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in update_order: {str(e)}", flush=True)  # Added logging
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.patch("/{order_id}", response_model=OrderResponse)
-async def patch_order(order_id: str, order: OrderUpdate):
-    """Partially update a order"""
+PATCH_RETRIES = 3
+
+
+@router.patch("/{order_id}", response_model=OrderResponse, response_model_exclude_unset=True)
+async def patch_order(order_id: str, order: OrderUpdate, response: Response,
+                      if_match: Optional[str] = Header(None)):
+    """Partially update a order, send If-Match with the order's ETag to avoid lost updates"""
     try:
-        existing_order = await order_repository.get_by_id(order_id)
-        if not existing_order:
-            raise HTTPException(status_code=404, detail="Order order not found")
-        order_dict = order.model_dump(exclude_unset=True)
-        order_dict = calculate_price(order_dict)
-        order_dict["order_date"] = str(datetime.now().timestamp())
-        patched_order = await order_repository.patch_order(order_id, order_dict)
+        expected_version = parse_if_match(if_match)
+        patch = order.model_dump(exclude_unset=True)
+        for attempt in range(PATCH_RETRIES):
+            order_dict = dict(patch)
+            if 'items' in order_dict:
+                order_dict['items'] = await price_lines(order_dict['items'])
+            version = expected_version
+            if 'items' not in order_dict or 'discount_pct' not in order_dict:
+                # Re-totaling needs the stored lines or discount, pin the write to what was read
+                existing_order = await order_repository.get_by_id(order_id)
+                if not existing_order:
+                    raise HTTPException(status_code=404, detail="Order order not found")
+                if version is None:
+                    version = existing_order.get('version', 0)
+                # Re-total the existing lines at their snapshot prices
+                order_dict.setdefault('items', compact_order(existing_order)['items'])
+                order_dict.setdefault('discount_pct', existing_order['discount_pct'])
+            order_dict = calculate_price(order_dict)
+            order_dict["order_date"] = str(datetime.now().timestamp())
+            try:
+                existing_order, patched_order = await order_repository.patch_order(order_id, order_dict, version)
+                break
+            except HTTPException as e:
+                # A concurrent writer got in between our read and write, read again
+                if e.status_code != 412 or expected_version is not None or attempt == PATCH_RETRIES - 1:
+                    raise
+        await asyncio.gather(record_stats(existing_order, patched_order),
+                             record_changes('orders', [(order_id, 'updated')]))
+        publish_order('updated', patched_order)
+        response.headers['ETag'] = version_etag(patched_order['version'])
         return patched_order
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_order(order_id: str):
+async def delete_order(order_id: str, if_match: Optional[str] = Header(None)):
     """Delete an order"""
     try:
-        existing_order = await order_repository.get_by_id(order_id)
-        if not existing_order:
-            raise HTTPException(status_code=404, detail="Order not found")
-
-        await order_repository.delete_order(order_id)
+        existing_order = await order_repository.delete_order(order_id, parse_if_match(if_match))
+        await asyncio.gather(record_stats(existing_order, None), record_changes('orders', [(order_id, 'deleted')]))
+        publish_order('deleted', existing_order)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def version_etag(version) -> str:
+    """ETag for a versioned item, items written before versioning are version 0"""
+    return f'"{int(version or 0)}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Expected version from an If-Match header, None when any version will do"""
+    if not if_match or if_match.strip() == '*':
+        return None
+    tag = if_match.strip().removeprefix('W/').strip('"')
+    try:
+        return int(tag)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be an ETag returned by this API")
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+
+from api.controllers.menu_controller import menu_repository
+from api.repositories.backends import get_stats_repository
+from api.schemas.stats_schemas import DashboardStatsResponse
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+stats_repository = get_stats_repository()
+
+
+@router.get("/dashboard", response_model=DashboardStatsResponse)
+async def get_dashboard_stats():
+    """Get the dashboard aggregates"""
+    try:
+        stats = await stats_repository.get_dashboard()
+        popular_ids = [popular['item_id'] for popular in stats['popular_items']]
+        menu_items = {item['item_id']: item for item in await menu_repository.get_many(popular_ids)}
+        # Items removed from the menu since they were ordered are left out
+        stats['popular_items'] = [
+            {**popular, 'item': menu_items[popular['item_id']]}
+            for popular in stats['popular_items'] if popular['item_id'] in menu_items
+        ]
+        return stats
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
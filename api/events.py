@@ -0,0 +1,207 @@
+"""Change events for the /events Server-Sent Events stream.
+
+Write handlers publish one compact event per changed order or menu item. The
+broker renders it to an SSE frame once and hands the same bytes to every
+interested subscriber. Each subscriber has a bounded buffer. One that falls
+more than a buffer behind is cut off with an ``overflow`` event rather than
+slowing everyone else down or growing without limit. Its EventSource
+reconnects, and the client re-reads what it shows.
+
+With several workers, set EVENT_BROKER_URL to a relay such as
+``python -m scripts.event_broker``. Every worker then sends its events through
+the relay and receives everyone's, so a subscriber sees writes served by any
+worker. Without it, events only reach subscribers of the worker that served
+the write.
+"""
+import asyncio
+import itertools
+from typing import Dict, Iterable, Optional, Set
+from urllib.parse import urlparse
+
+import orjson
+
+from api import metrics
+from api.config import EVENT_BROKER_URL, EVENTS_BUFFER_SIZE
+
+TOPICS = frozenset({'order', 'menu'})
+
+_OVERFLOW = b'event: overflow\ndata: {}\n\n'
+
+events_subscribers = metrics.register(metrics.Gauge(
+    'events_subscribers', 'Open /events streams on this worker'
+))
+events_published_total = metrics.register(metrics.Counter(
+    'events_published_total', 'Change events delivered to this worker by topic', ('topic',)
+))
+events_overflows_total = metrics.register(metrics.Counter(
+    'events_overflows_total', 'Subscribers cut off for falling a full buffer behind'
+))
+
+
+class Subscriber:
+    """One /events stream: the topics it wants and its bounded frame buffer"""
+
+    def __init__(self, topics: Iterable[str], buffer_size: int):
+        self.topics = frozenset(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size + 1)
+        self.buffer_size = buffer_size
+        self.overflowed = False
+
+    def offer(self, frame: bytes) -> bool:
+        """Queue a frame, False once the subscriber has fallen too far behind"""
+        if self.overflowed:
+            return False
+        if self.queue.qsize() >= self.buffer_size:
+            # The spare slot carries the overflow notice, after which the stream ends
+            self.overflowed = True
+            self.queue.put_nowait(_OVERFLOW)
+            return False
+        self.queue.put_nowait(frame)
+        return True
+
+
+class EventBroker:
+    """In-process fan-out of change events to SSE subscribers, optionally through a relay"""
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE, relay_url: Optional[str] = EVENT_BROKER_URL):
+        self.buffer_size = buffer_size
+        self.subscribers: Set[Subscriber] = set()
+        self._ids = itertools.count(1)
+        self.relay = Relay(relay_url, self._deliver) if relay_url else None
+
+    def start(self):
+        """Connect to the relay, if any, so that events from other workers arrive from the start"""
+        if self.relay:
+            self.relay.start()
+
+    async def stop(self):
+        if self.relay:
+            await self.relay.stop()
+
+    def subscribe(self, topics: Iterable[str] = TOPICS) -> Subscriber:
+        subscriber = Subscriber(topics, self.buffer_size)
+        self.subscribers.add(subscriber)
+        events_subscribers.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            events_subscribers.dec()
+
+    def publish(self, topic: str, payload: dict):
+        """Send a change event to every subscriber of ``topic``, on every worker when relayed"""
+        data = orjson.dumps(payload)
+        if self.relay and self.relay.send(topic, data):
+            return
+        self._deliver(topic, data)
+
+    def _deliver(self, topic: str, data: bytes):
+        events_published_total.inc(topic)
+        if not self.subscribers:
+            return
+        frame = b'id: %d\nevent: %s\ndata: %s\n\n' % (next(self._ids), topic.encode(), data)
+        for subscriber in list(self.subscribers):
+            if topic in subscriber.topics and not subscriber.offer(frame):
+                if subscriber.overflowed and subscriber in self.subscribers:
+                    events_overflows_total.inc()
+                    self.unsubscribe(subscriber)
+
+
+class Relay:
+    """Connection to the local event relay (scripts/event_broker.py), reconnecting in the background.
+
+    Lines on the wire are ``<topic> <json>``. While the relay is unreachable,
+    events are delivered to this worker's subscribers only.
+    """
+
+    def __init__(self, url: str, deliver):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname or '127.0.0.1', parsed.port or 8900
+        self.deliver = deliver
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def send(self, topic: str, data: bytes) -> bool:
+        if self._writer is None or self._writer.is_closing():
+            return False
+        self._writer.write(topic.encode() + b' ' + data + b'\n')
+        return True
+
+    async def _run(self):
+        connected = True
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                connected = True
+                while line := await reader.readline():
+                    topic, _, data = line.rstrip(b'\n').partition(b' ')
+                    self.deliver(topic.decode(), data)
+            except OSError as e:
+                # Reported once per outage, retried every second
+                if connected:
+                    print(f"Event relay at {self.host}:{self.port} unavailable: {str(e)}")
+                connected = False
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            await asyncio.sleep(1)
+
+
+broker = EventBroker()
+
+
+def order_event(action: str, order: dict) -> Dict:
+    """Compact summary of an order change, enough to patch a list row or decide to re-read it"""
+    if action == 'deleted':
+        return {'action': action, 'order_id': order['order_id']}
+    return {
+        'action': action,
+        'order_id': order['order_id'],
+        'order_number': order.get('order_number'),
+        'total': str(order['total']),
+        'order_date': order.get('order_date'),
+        'version': int(order['version']) if order.get('version') is not None else None,
+    }
+
+
+def menu_event(action: str, item: dict) -> Dict:
+    """Compact summary of a menu item change"""
+    if action == 'deleted':
+        return {'action': action, 'item_id': item['item_id']}
+    return {
+        'action': action,
+        'item_id': item['item_id'],
+        'name': item.get('name'),
+        'price': str(item['price']),
+        'version': int(item['version']) if item.get('version') is not None else None,
+    }
+
+
+def publish_order(action: str, order: dict):
+    # The write already succeeded, a lost event only delays a client's refresh
+    try:
+        broker.publish('order', order_event(action, order))
+    except Exception as e:
+        print(f"Error publishing order event: {str(e)}")
+
+
+def publish_menu(action: str, item: dict):
+    try:
+        broker.publish('menu', menu_event(action, item))
+    except Exception as e:
+        print(f"Error publishing menu event: {str(e)}")
@@ -0,0 +1,197 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Values are kept per worker process, like the menu cache counters; scrape each
+worker (or run a single one) to see the whole picture.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from starlette.routing import Match
+
+# Starlette appends the charset to text responses
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic total per label set"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', self.label_names, labels, value) for labels, value in values]
+
+
+class Gauge(Counter):
+    """Current value per label set, may go down"""
+    kind = 'gauge'
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, plus their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _samples(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        samples = []
+        bucket_names = self.label_names + ('le',)
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', bucket_names, labels + (_format_value(bound),), cumulative))
+            samples.append(('_sum', self.label_names, labels, total))
+            samples.append(('_count', self.label_names, labels, cumulative))
+        return samples
+
+
+REGISTRY: List[_Metric] = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+http_requests_in_flight = register(Gauge(
+    'http_requests_in_flight', 'Requests currently being served', ('method', 'route')
+))
+http_request_duration_seconds = register(Histogram(
+    'http_request_duration_seconds', 'Time from request received to response sent',
+    ('method', 'route', 'status')
+))
+dynamodb_requests_total = register(Counter(
+    'dynamodb_requests_total', 'DynamoDB API calls, including failed ones', ('operation', 'table')
+))
+dynamodb_request_errors_total = register(Counter(
+    'dynamodb_request_errors_total', 'DynamoDB API calls that failed, by error code',
+    ('operation', 'table', 'code')
+))
+dynamodb_request_duration_seconds = register(Histogram(
+    'dynamodb_request_duration_seconds', 'DynamoDB API call latency, including SDK retries',
+    ('operation', 'table')
+))
+dynamodb_consumed_capacity_units_total = register(Counter(
+    'dynamodb_consumed_capacity_units_total', 'Capacity units DynamoDB reported as consumed',
+    ('operation', 'table')
+))
+
+coalesced_write_batch_size = register(Histogram(
+    'coalesced_write_batch_size', 'Writes grouped into each batch write by a write coalescer', ('table',),
+    buckets=(1, 2, 5, 10, 15, 20, 25)
+))
+
+
+def render() -> str:
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method and route template.
+
+    Routes are labelled by their path template (``/orders/{order_id}``), and
+    paths that match no route share the ``unmatched`` label, so the number of
+    series stays bounded.
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    def _route_of(self, scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, 'path', 'unmatched')
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        route = self._route_of(scope)
+        status = '500'
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = str(message['status'])
+            await send(message)
+
+        http_requests_in_flight.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration_seconds.observe(time.perf_counter() - start, method, route, status)
+            http_requests_in_flight.dec(method, route)
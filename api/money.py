@@ -0,0 +1,86 @@
+"""Money as integer cents.
+
+Prices, line amounts and totals are added and multiplied as ints, which is
+exact and much cheaper than Decimal arithmetic. Amounts are converted from
+Decimal on the way in and back on the way out. Stored documents and API
+payloads keep the decimal amounts they have always had, for example
+``12.99``.
+
+Rounding is ROUND_DOWN to whole cents, as it has always been:
+
+* A subtotal is the sum of unit price x quantity. Prices are whole cents and
+  quantities whole numbers, so it is exact and needs no rounding.
+* A total is the subtotal minus ``discount_pct`` of it, truncated towards zero
+  to whole cents. Any fraction of a cent goes to the customer: 10% off
+  $0.15 is $0.13, not $0.14.
+* An average (revenue / orders) is truncated the same way.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+CENTS = 100
+_CENT = Decimal('0.01')
+
+
+def to_cents(amount) -> int:
+    """Exact cents in a decimal amount (Decimal, int, str or float), refuses fractions of a cent"""
+    if isinstance(amount, int):
+        return amount * CENTS
+    numerator, denominator = (amount if isinstance(amount, Decimal) else Decimal(str(amount))).as_integer_ratio()
+    if CENTS % denominator:
+        raise ValueError(f"{amount} is not a whole number of cents")
+    return numerator * (CENTS // denominator)
+
+
+def from_cents(cents: int) -> Decimal:
+    """Decimal amount with exactly two places, e.g. 1000 -> Decimal('10.00')"""
+    return Decimal(cents) * _CENT
+
+
+def divide_down(numerator: int, denominator: int) -> int:
+    """Integer division truncated towards zero, like Decimal's ROUND_DOWN"""
+    quotient = abs(numerator) // abs(denominator)
+    return quotient if (numerator < 0) == (denominator < 0) else -quotient
+
+
+def _ratio(discount_pct) -> Tuple[int, int]:
+    if not discount_pct:
+        return 0, 1
+    return (discount_pct if isinstance(discount_pct, Decimal) else Decimal(str(discount_pct))).as_integer_ratio()
+
+
+def apply_discount(subtotal_cents: int, discount_pct) -> int:
+    """Total in cents after taking ``discount_pct`` (0 to 1) off the subtotal, rounded down"""
+    numerator, denominator = _ratio(discount_pct)
+    if not numerator:
+        return subtotal_cents
+    return divide_down(subtotal_cents * (denominator - numerator), denominator)
+
+
+def price_order(lines: Iterable[Mapping], discount_pct) -> Tuple[int, int]:
+    """(subtotal, total) in cents for compact (item_id, quantity, unit_price) lines"""
+    subtotal = sum(to_cents(line['unit_price']) * int(line['quantity']) for line in lines)
+    return subtotal, apply_discount(subtotal, discount_pct)
+
+
+def price_orders(orders: List[Mapping], unit_cents: Dict[str, int]) -> List[Tuple[int, int]]:
+    """Batch pricing: (subtotal, total) in cents per order, from int quantities and {item_id: unit cents}"""
+    ratios = {}
+    priced = []
+    for order in orders:
+        subtotal = 0
+        for line in order['items']:
+            subtotal += unit_cents[line['item_id']] * line['quantity']
+        discount_pct = order.get('discount_pct')
+        if not discount_pct:
+            priced.append((subtotal, subtotal))
+            continue
+        ratio = ratios.get(discount_pct)
+        if ratio is None:
+            ratio = ratios[discount_pct] = _ratio(discount_pct)
+        numerator, denominator = ratio
+        remaining = subtotal * (denominator - numerator)
+        # Floor division is ROUND_DOWN for the usual non-negative amounts
+        total = remaining // denominator if remaining >= 0 else divide_down(remaining, denominator)
+        priced.append((subtotal, total))
+    return priced
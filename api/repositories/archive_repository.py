@@ -0,0 +1,148 @@
+import asyncio
+import gzip
+import itertools
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from api.config import ORDER_ARCHIVE_DIR, PAGE_SIZE_MAX
+from api.repositories.sqlite_repository import dumps, loads
+
+
+def month_of(timestamp: float) -> str:
+    """UTC month partition (YYYY-MM) holding orders placed at ``timestamp``"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m')
+
+
+class OrderArchiveRepository:
+    """Orders moved out of the orders table, in gzipped JSON Lines files partitioned by month.
+
+    Each run of scripts/archive_orders.py appends to its own file per month,
+    orders/YYYY-MM/part-<run>.jsonl.gz, one gzip member per page of orders.
+    Orders are stored exactly as the table returned them. A run writes a page
+    to the journal before deleting it from the table, and appends it to the
+    archive afterwards, so an interrupted run can finish the page. An order may
+    therefore be archived twice. Both copies are of the same version, and the
+    reader returns the first.
+    """
+
+    def __init__(self, directory: str = ORDER_ARCHIVE_DIR):
+        self.root = os.path.join(directory, 'orders')
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.root, 'journal.jsonl')
+
+    @property
+    def watermark_path(self) -> str:
+        return os.path.join(self.root, 'archived_through')
+
+    async def append(self, run: str, orders: List[dict]):
+        """Durably add orders to this run's monthly files"""
+        if orders:
+            await asyncio.to_thread(self._append, run, orders)
+
+    def _append(self, run: str, orders: List[dict]):
+        by_month = {}
+        for order in orders:
+            by_month.setdefault(month_of(float(order['order_date'])), []).append(order)
+        for month, month_orders in by_month.items():
+            directory = os.path.join(self.root, month)
+            os.makedirs(directory, exist_ok=True)
+            data = ''.join(dumps(order) + '\n' for order in month_orders).encode()
+            # A new gzip member per page; readers see concatenated members as one stream
+            with open(os.path.join(directory, f'part-{run}.jsonl.gz'), 'ab') as f:
+                f.write(gzip.compress(data, compresslevel=6))
+                f.flush()
+                os.fsync(f.fileno())
+
+    async def iter_pages(self, since: Optional[float] = None, until: Optional[float] = None,
+                         page_size: int = PAGE_SIZE_MAX) -> AsyncIterator[list]:
+        """Archived orders placed in [since, until], oldest month first and unordered within a month.
+
+        Files are decompressed as they are read, so memory holds one page plus
+        the ids already returned from the current month.
+        """
+        orders = self._read(since, until)
+        while True:
+            page = await asyncio.to_thread(lambda: list(itertools.islice(orders, page_size)))
+            if not page:
+                return
+            yield page
+
+    def months(self, since: Optional[float] = None, until: Optional[float] = None) -> List[str]:
+        """Month partitions that may hold orders placed in [since, until]"""
+        if not os.path.isdir(self.root):
+            return []
+        first = month_of(since) if since is not None else ''
+        last = month_of(until) if until is not None else '9999-99'
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)) and first <= name <= last)
+
+    def _read(self, since: Optional[float], until: Optional[float]) -> Iterator[dict]:
+        for month in self.months(since, until):
+            seen = set()
+            directory = os.path.join(self.root, month)
+            for name in sorted(os.listdir(directory)):
+                for order in self._read_file(os.path.join(directory, name)):
+                    placed = float(order['order_date'])
+                    if order['order_id'] in seen or (since is not None and placed < since) \
+                            or (until is not None and placed > until):
+                        continue
+                    seen.add(order['order_id'])
+                    yield order
+
+    @staticmethod
+    def _read_file(path: str) -> Iterator[dict]:
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield loads(line)
+        except (EOFError, gzip.BadGzipFile, zlib.error, ValueError) as e:
+            # A run stopped mid-write; the journal re-archives whatever that page held
+            print(f"Skipping the unreadable end of {path}: {str(e)}")
+
+    async def write_journal(self, run: str, orders: List[dict]):
+        await asyncio.to_thread(self._write_journal, run, orders)
+
+    def _write_journal(self, run: str, orders: List[dict]):
+        os.makedirs(self.root, exist_ok=True)
+        partial = self.journal_path + '.tmp'
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.write(run + '\n')
+            f.writelines(dumps(order) + '\n' for order in orders)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self.journal_path)
+
+    async def read_journal(self) -> Optional[Tuple[str, List[dict]]]:
+        """(run, orders) of a page an interrupted run may have deleted without archiving"""
+        return await asyncio.to_thread(self._read_journal)
+
+    def _read_journal(self) -> Optional[Tuple[str, List[dict]]]:
+        if not os.path.exists(self.journal_path):
+            return None
+        with open(self.journal_path, encoding='utf-8') as f:
+            run = f.readline().strip()
+            return run, [loads(line) for line in f if line.strip()]
+
+    async def clear_journal(self):
+        await asyncio.to_thread(self._clear_journal)
+
+    def _clear_journal(self):
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def archived_through(self) -> Optional[float]:
+        """Placement time before which every order has been archived, None before the first run"""
+        if not os.path.exists(self.watermark_path):
+            return None
+        with open(self.watermark_path) as f:
+            return float(f.read().strip())
+
+    def set_archived_through(self, timestamp: float):
+        partial = self.watermark_path + '.tmp'
+        with open(partial, 'w') as f:
+            f.write(repr(timestamp))
+        os.replace(partial, self.watermark_path)
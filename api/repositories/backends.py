@@ -0,0 +1,92 @@
+"""Storage backends behind the repositories, selected with STORAGE_BACKEND.
+
+The protocols below are the interface the controllers and scripts rely on.
+Each backend implements all four, and tests/test_repository_contract.py
+holds them to the same behaviour.
+"""
+from typing import AsyncIterator, Dict, FrozenSet, List, Optional, Protocol, Tuple
+
+from api.config import STORAGE_BACKEND
+from api.repositories.change_log_repository import ChangeLogRepository, SQLiteChangeLogRepository
+from api.repositories.menu_repository import MenuRepository, SQLiteMenuRepository
+from api.repositories.order_repository import OrderRepository, SQLiteOrderRepository
+from api.repositories.stats_repository import SQLiteStatsRepository, StatsRepository
+
+
+class MenuStore(Protocol):
+    async def create_item(self, item_data: dict) -> dict: ...
+    async def get_all(self) -> list: ...
+    async def get_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]: ...
+    async def get_by_id(self, item_id: str) -> Optional[dict]: ...
+    async def get_many(self, item_ids: List[str], consistent_read: bool = False) -> List[dict]: ...
+    async def update_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict: ...
+    async def patch_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict: ...
+    async def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> dict: ...
+    def parallel_scan(self, total_segments: int = ..., **kwargs) -> AsyncIterator[list]: ...
+    async def warm_up(self, connections: int = 1): ...
+
+
+class OrderStore(Protocol):
+    async def create_order(self, order_data: dict) -> dict: ...
+    async def create_orders(self, orders: List[dict]) -> Dict[int, str]: ...
+    async def get_all(self) -> list: ...
+    # fields: attributes to read (the backend may return more), None for all of them
+    async def get_page(self, limit: int, cursor: Optional[str] = None,
+                       fields: Optional[FrozenSet[str]] = None) -> Tuple[list, Optional[str]]: ...
+    async def get_range_page(self, since: float, until: float, limit: int, cursor: Optional[str] = None,
+                             fields: Optional[FrozenSet[str]] = None) -> Tuple[list, Optional[str]]: ...
+    async def get_by_number(self, order_number: str, fields: Optional[FrozenSet[str]] = None) -> list: ...
+    async def get_by_id(self, order_id: str, fields: Optional[FrozenSet[str]] = None) -> Optional[dict]: ...
+    async def get_many(self, order_ids: List[str], consistent_read: bool = False) -> List[dict]: ...
+    async def update_order(self, order_id: str, order_data: dict,
+                           expected_version: Optional[int] = None) -> Tuple[dict, dict]: ...
+    async def patch_order(self, order_id: str, order_data: dict,
+                          expected_version: Optional[int] = None) -> Tuple[dict, dict]: ...
+    async def delete_order(self, order_id: str, expected_version: Optional[int] = None) -> dict: ...
+    async def batch_put(self, items: List[dict]) -> Dict[int, str]: ...
+    def parallel_scan(self, total_segments: int = ..., **kwargs) -> AsyncIterator[list]: ...
+    async def warm_up(self, connections: int = 1): ...
+
+
+class StatsStore(Protocol):
+    async def record_order_change(self, old: Optional[dict], new: Optional[dict]): ...
+    async def record_order_changes(self, changes: List[Tuple[Optional[dict], Optional[dict]]]): ...
+    async def record_menu_count_change(self, delta: int): ...
+    async def get_dashboard(self, recent_limit: int = 5, popular_limit: int = 5) -> dict: ...
+    async def rebuild(self, order_pages: AsyncIterator[list], menu_item_count: int) -> int: ...
+
+
+class ChangeLogStore(Protocol):
+    async def record(self, stream: str, changes: List[Tuple[str, str]]): ...
+    async def position(self, stream: str) -> int: ...
+    async def read(self, stream: str, since: int, limit: int) -> Tuple[List[dict], bool]: ...
+    async def trim(self, stream: str, before: float) -> int: ...
+
+
+BACKENDS = {
+    'dynamodb': (MenuRepository, OrderRepository, StatsRepository, ChangeLogRepository),
+    'sqlite': (SQLiteMenuRepository, SQLiteOrderRepository, SQLiteStatsRepository, SQLiteChangeLogRepository),
+}
+
+
+def _backend(name: str) -> tuple:
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected one of {', '.join(BACKENDS)}")
+
+
+def get_menu_repository(backend: str = STORAGE_BACKEND) -> MenuStore:
+    return _backend(backend)[0]()
+
+
+def get_order_repository(backend: str = STORAGE_BACKEND) -> OrderStore:
+    return _backend(backend)[1]()
+
+
+def get_stats_repository(backend: str = STORAGE_BACKEND) -> StatsStore:
+    return _backend(backend)[2]()
+
+
+def get_change_log_repository(backend: str = STORAGE_BACKEND) -> ChangeLogStore:
+    return _backend(backend)[3]()
@@ -0,0 +1,447 @@
+import asyncio
+import base64
+import binascii
+import functools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from api import metrics
+from api.config import (
+    BATCH_MAX_RETRIES, DYNAMODB_ENDPOINT_URL, DYNAMODB_MAX_CONCURRENCY, PAGE_SIZE_MAX,
+    SCAN_MAX_REQUESTS_PER_SECOND, SCAN_SEGMENTS,
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_dynamodb = None
+_dynamodb_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared pool that runs the blocking boto3 calls off the event loop"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DYNAMODB_MAX_CONCURRENCY,
+                    thread_name_prefix='dynamodb'
+                )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a synchronous boto3 call on the bounded DynamoDB executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def _table_label(params: dict) -> str:
+    if 'TableName' in params:
+        return params['TableName']
+    # Batch and transaction calls name their tables inside the request
+    tables = set(params.get('RequestItems') or ())
+    for item in params.get('TransactItems') or ():
+        for request in item.values():
+            tables.add(request.get('TableName', ''))
+    return ','.join(sorted(tables))
+
+
+def _before_call(params: dict, model, context: dict, **kwargs):
+    if 'ReturnConsumedCapacity' in model.input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+    context['metrics_labels'] = (model.name, _table_label(params))
+    context['metrics_start'] = time.perf_counter()
+
+
+def _record_call(context: dict, error_code: Optional[str]):
+    labels = context['metrics_labels']
+    metrics.dynamodb_requests_total.inc(*labels)
+    metrics.dynamodb_request_duration_seconds.observe(time.perf_counter() - context['metrics_start'], *labels)
+    if error_code:
+        metrics.dynamodb_request_errors_total.inc(*labels, error_code)
+
+
+def _after_call(http_response, parsed: dict, model, context: dict, **kwargs):
+    if 'metrics_start' not in context:
+        return
+    _record_call(context, parsed.get('Error', {}).get('Code') if http_response.status_code >= 300 else None)
+    consumed = parsed.get('ConsumedCapacity') or []
+    for capacity in consumed if isinstance(consumed, list) else [consumed]:
+        metrics.dynamodb_consumed_capacity_units_total.inc(
+            model.name, capacity.get('TableName', ''), amount=float(capacity.get('CapacityUnits', 0))
+        )
+
+
+def _after_call_error(exception: Exception, context: dict, **kwargs):
+    # Connection failures and timeouts never reach after-call
+    if 'metrics_start' in context:
+        _record_call(context, type(exception).__name__)
+
+
+def instrument_client(client):
+    """Record call counts, latency and consumed capacity for every call made through ``client``"""
+    events = client.meta.events
+    events.register('before-parameter-build.dynamodb', _before_call)
+    events.register('after-call.dynamodb', _after_call)
+    events.register('after-call-error.dynamodb', _after_call_error)
+
+
+def connect_dynamodb():
+    """A new instrumented DynamoDB resource with a connection pool sized for the executor"""
+    resource = boto3.resource(
+        'dynamodb',
+        endpoint_url=DYNAMODB_ENDPOINT_URL,
+        # One pooled connection per executor thread, otherwise urllib3 discards them
+        config=Config(max_pool_connections=DYNAMODB_MAX_CONCURRENCY, tcp_keepalive=True)
+    )
+    instrument_client(resource.meta.client)
+    return resource
+
+
+def get_dynamodb():
+    """The process-wide DynamoDB resource, so that every repository shares one client and pool"""
+    global _dynamodb
+    if _dynamodb is None:
+        with _dynamodb_lock:
+            if _dynamodb is None:
+                _dynamodb = connect_dynamodb()
+    return _dynamodb
+
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def projection(fields: Optional[Iterable[str]]) -> dict:
+    """ProjectionExpression arguments that read only ``fields``, nothing when all are wanted"""
+    if not fields:
+        return {}
+    # Placeholders, since names like "items" and "total" may be reserved words
+    names = {f'#f{i}': name for i, name in enumerate(sorted(fields))}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+
+def encode_cursor(last_evaluated_key: Optional[dict]) -> Optional[str]:
+    """Turn a LastEvaluatedKey into an opaque, URL-safe pagination cursor"""
+    if not last_evaluated_key:
+        return None
+    wire = {k: _serializer.serialize(v) for k, v in last_evaluated_key.items()}
+    raw = json.dumps(wire, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """Inverse of encode_cursor, returns an ExclusiveStartKey"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        wire = json.loads(raw)
+        return {k: _deserializer.deserialize(v) for k, v in wire.items()}
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class RateLimiter:
+    """Spaces out calls so that at most ``rate`` of them start per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        now = asyncio.get_running_loop().time()
+        wait = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_SEGMENT_DONE = object()
+
+# DynamoDB limits on requests per BatchWriteItem / BatchGetItem call
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+THROTTLING_ERRORS = {'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded'}
+
+
+class DynamoDBRepository:
+    table_name: str = ''
+    key_names: Tuple[str, ...] = ()
+
+    def __init__(self, dynamodb=None):
+        # Without one, the shared resource is used, created on first use rather than at import
+        self._dynamodb = dynamodb
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            self._dynamodb = get_dynamodb()
+        return self._dynamodb
+
+    @functools.cached_property
+    def table(self):
+        return self.dynamodb.Table(self.table_name)
+
+    async def warm_up(self, connections: int = 1):
+        """Check that the table exists and open ``connections`` pooled connections to it.
+
+        Each probe is a one-item scan, so warming costs at most a read unit per connection.
+        """
+        await run_blocking(self.table.load)
+        await asyncio.gather(*(
+            run_blocking(self.table.scan, Limit=1, Select='COUNT') for _ in range(connections)
+        ))
+
+    async def _call(self, operation: str, **kwargs) -> dict:
+        """Invoke a Table operation (put_item, scan, ...) without blocking the event loop"""
+        return await run_blocking(getattr(self.table, operation), **kwargs)
+
+    def _write_condition(self, expected_version: Optional[int]) -> Tuple[str, dict, dict]:
+        """ConditionExpression for writes to an existing item, optionally at a known version"""
+        names = {'#key': self.key_names[0]}
+        values = {}
+        condition = "attribute_exists(#key)"
+        if expected_version is not None:
+            names['#version'] = 'version'
+            if expected_version:
+                condition += " AND #version = :expected_version"
+                values[':expected_version'] = expected_version
+            else:
+                # Items written before versioning count as version 0
+                condition += " AND attribute_not_exists(#version)"
+        return condition, names, values
+
+    def _raise_for_condition(self, error: ClientError, not_found_detail: str):
+        """Map a failed write condition to 404 or 412, re-raise anything else"""
+        if error.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise error
+        # With ReturnValuesOnConditionCheckFailure the current item comes back if it exists
+        if error.response.get('Item'):
+            raise HTTPException(status_code=412, detail="Version mismatch, reload and retry")
+        raise HTTPException(status_code=404, detail=not_found_detail)
+
+    async def scan_page(self, limit: int, cursor: Optional[str] = None,
+                        **scan_kwargs) -> Tuple[list, Optional[str]]:
+        """Read one page of at most ``limit`` items, returns (items, next_cursor)"""
+        start_key = decode_cursor(cursor)
+        if start_key:
+            scan_kwargs['ExclusiveStartKey'] = start_key
+        response = await self._call('scan', Limit=limit, **scan_kwargs)
+        return response.get('Items', []), encode_cursor(response.get('LastEvaluatedKey'))
+
+    async def iter_pages(self, page_size: int, **scan_kwargs) -> AsyncIterator[list]:
+        """Walk the whole table one bounded page at a time"""
+        cursor = None
+        while True:
+            items, cursor = await self.scan_page(page_size, cursor, **scan_kwargs)
+            if items:
+                yield items
+            if not cursor:
+                return
+
+    async def parallel_scan(self, total_segments: int = SCAN_SEGMENTS,
+                            max_requests_per_second: float = SCAN_MAX_REQUESTS_PER_SECOND,
+                            page_size: int = PAGE_SIZE_MAX, **scan_kwargs) -> AsyncIterator[list]:
+        """Read the whole table as ``total_segments`` concurrent segment scans.
+
+        Pages are yielded as soon as any segment returns them, so there is no
+        ordering across segments. A bounded queue applies backpressure to the
+        segment workers when the consumer is slower than DynamoDB.
+        """
+        limiter = RateLimiter(max_requests_per_second) if max_requests_per_second > 0 else None
+        queue: asyncio.Queue = asyncio.Queue(maxsize=total_segments * 2)
+
+        async def scan_segment(segment: int):
+            try:
+                start_key = None
+                while True:
+                    if limiter:
+                        await limiter.acquire()
+                    kwargs = dict(scan_kwargs, Limit=page_size, Segment=segment, TotalSegments=total_segments)
+                    if start_key:
+                        kwargs['ExclusiveStartKey'] = start_key
+                    response = await self._call('scan', **kwargs)
+                    if response.get('Items'):
+                        await queue.put(response['Items'])
+                    start_key = response.get('LastEvaluatedKey')
+                    if not start_key:
+                        break
+                await queue.put(_SEGMENT_DONE)
+            except Exception as e:
+                await queue.put(e)
+
+        workers = [asyncio.create_task(scan_segment(segment)) for segment in range(total_segments)]
+        try:
+            remaining = total_segments
+            while remaining:
+                page = await queue.get()
+                if page is _SEGMENT_DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    def _key_of(self, item: dict) -> tuple:
+        return tuple(item[name] for name in self.key_names)
+
+    async def batch_get(self, keys: List[dict], consistent_read: bool = False) -> List[dict]:
+        """Fetch items with BatchGetItem, retrying unprocessed keys with backoff.
+
+        Keys that do not exist are simply absent from the result, which is unordered.
+        """
+        unique_keys = list({self._key_of(key): key for key in keys}.values())
+        chunks = [unique_keys[start:start + BATCH_GET_SIZE] for start in range(0, len(unique_keys), BATCH_GET_SIZE)]
+        items = []
+        for chunk_items in await asyncio.gather(*(self._batch_get_chunk(chunk, consistent_read) for chunk in chunks)):
+            items.extend(chunk_items)
+        return items
+
+    async def _batch_get_chunk(self, keys: List[dict], consistent_read: bool) -> List[dict]:
+        items = []
+        request = {self.table_name: {'Keys': keys, 'ConsistentRead': consistent_read}}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(0.05 * 2 ** (attempt - 1))
+            try:
+                response = await run_blocking(self.dynamodb.batch_get_item, RequestItems=request)
+            except ClientError as e:
+                if e.response['Error']['Code'] in THROTTLING_ERRORS:
+                    continue
+                raise
+            items.extend(response.get('Responses', {}).get(self.table_name, []))
+            request = response.get('UnprocessedKeys')
+            if not request:
+                return items
+        raise RuntimeError(f"BatchGetItem on {self.table_name} left keys unprocessed after retries")
+
+    async def batch_put(self, items: List[dict]) -> Dict[int, str]:
+        """Write items with BatchWriteItem, retrying unprocessed ones with backoff.
+
+        Returns {index: error message} for the items that could not be written.
+        """
+        chunks = [range(start, min(start + BATCH_WRITE_SIZE, len(items)))
+                  for start in range(0, len(items), BATCH_WRITE_SIZE)]
+        errors = {}
+        for chunk_errors in await asyncio.gather(*(self._batch_put_chunk(items, chunk) for chunk in chunks)):
+            errors.update(chunk_errors)
+        return errors
+
+    async def _batch_put_chunk(self, items: List[dict], indexes: range) -> Dict[int, str]:
+        index_by_key = {self._key_of(items[i]): i for i in indexes}
+        requests = [{'PutRequest': {'Item': items[i]}} for i in indexes]
+
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(0.05 * 2 ** (attempt - 1))
+            try:
+                response = await run_blocking(
+                    self.dynamodb.batch_write_item, RequestItems={self.table_name: requests}
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] in THROTTLING_ERRORS:
+                    continue
+                # One bad item fails the whole call, isolate it with single writes
+                pending = [index_by_key[self._key_of(r['PutRequest']['Item'])] for r in requests]
+                return await self._put_individually(items, pending)
+            requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not requests:
+                return {}
+
+        return {index_by_key[self._key_of(r['PutRequest']['Item'])]: "Unprocessed after retries"
+                for r in requests}
+
+    async def _put_individually(self, items: List[dict], indexes: List[int]) -> Dict[int, str]:
+        async def put(index: int) -> Optional[str]:
+            try:
+                await self._call('put_item', Item=items[index])
+            except ClientError as e:
+                return e.response['Error']['Message']
+
+        results = await asyncio.gather(*(put(i) for i in indexes))
+        return {index: error for index, error in zip(indexes, results) if error}
+
+
+class WriteCoalescer:
+    """Group commit: single-item writes that arrive close together share one batch write.
+
+    write() queues an item and waits for it to be stored. The queue is
+    flushed through ``flush`` (e.g. DynamoDBRepository.batch_put) when it
+    reaches ``max_batch`` items or ``window`` seconds after its first item,
+    whichever comes first. Each caller gets its own outcome: the item, or
+    an exception carrying the message ``flush`` reported for it.
+
+    At most ``max_pending`` writes are queued or in flight; further writers
+    wait for a slot, which slows callers down instead of growing the queue.
+    """
+
+    def __init__(self, flush: Callable[[List[dict]], Awaitable[Dict[int, str]]], window: float,
+                 max_batch: int = BATCH_WRITE_SIZE, max_pending: int = 1000, label: str = ''):
+        self.flush = flush
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.label = label
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        # Queue state belongs to one event loop, start afresh if called from another
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue: List[Tuple[dict, asyncio.Future]] = []
+            self._timer: Optional[asyncio.TimerHandle] = None
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._flushes: set = set()
+        return loop
+
+    async def write(self, item: dict) -> dict:
+        loop = self._bind()
+        async with self._slots:
+            future = loop.create_future()
+            self._queue.append((item, future))
+            if len(self._queue) >= self.max_batch:
+                self._flush_queue()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush_queue)
+            return await future
+
+    def _flush_queue(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            task = self._loop.create_task(self._write_batch(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write_batch(self, batch: List[Tuple[dict, asyncio.Future]]):
+        metrics.coalesced_write_batch_size.observe(len(batch), self.label)
+        try:
+            errors = await self.flush([item for item, _ in batch])
+        except Exception as e:
+            errors = {index: e for index in range(len(batch))}
+        for index, (item, future) in enumerate(batch):
+            # A caller that gave up has nothing to receive, its item may still have been written
+            if future.done():
+                continue
+            error = errors.get(index)
+            if error is None:
+                future.set_result(item)
+            else:
+                future.set_exception(error if isinstance(error, Exception) else RuntimeError(error))
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import orjson
+
+from api import metrics
+
+single_flight_calls_total = metrics.register(metrics.Counter(
+    'single_flight_calls_total', 'Backend reads started by a single-flight group', ('group', 'kind')
+))
+single_flight_shared_total = metrics.register(metrics.Counter(
+    'single_flight_shared_total', 'Reads served by joining an identical read already in flight',
+    ('group', 'kind')
+))
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+
+    @cached_property
+    def etag(self) -> str:
+        """Hash of the value, so every worker and every refill holding the same data gives the same ETag"""
+        content = orjson.dumps(self.value, default=str, option=orjson.OPT_SORT_KEYS)
+        return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers ``etag`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Future
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Concurrent identical reads share one backend call.
+
+    The first caller for a key starts the call; callers that arrive while it
+    is in flight wait for the same result, or the same exception. Nothing is
+    kept once the call finishes, so a failure is not remembered and the next
+    caller tries again.
+
+    The call runs as a task of its own. A waiter that is cancelled leaves the
+    others waiting, and the call is cancelled only when nobody waits for it.
+
+    Keys are tuples whose first element names the kind of read, e.g.
+    ('item', item_id). The kind labels the metrics, because the full key
+    would give one time series per item. invalidate() is for writes: reads
+    that start after it never join a call that started before it.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self.generation = 0
+        self._flights: Dict[Tuple[int, Hashable], _Flight] = {}
+
+    async def do(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        flight_key = (self.generation, key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = self._flights[flight_key] = _Flight(asyncio.ensure_future(loader()))
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            single_flight_calls_total.inc(self.group, key[0])
+        else:
+            single_flight_shared_total.inc(self.group, key[0])
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # The last waiter gave up, nobody needs the result any more
+                self._forget(flight_key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def invalidate(self):
+        self.generation += 1
+
+    def _forget(self, flight_key: Tuple[int, Hashable], flight: _Flight):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry, for single-process read-through caching.
+
+    An entry's ETag is derived from its value, so a client sees 304 whenever
+    the data it was served is unchanged, whichever worker answers and however
+    often the entry was reloaded since. Concurrent misses on one key share a
+    single load.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, name: str = 'cache'):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self.loads = SingleFlight(name)
+        # Bumped by clear(), loads that straddle an invalidation are not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the live entry for ``key`` and count the hit or miss"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any, generation: int) -> CacheEntry:
+        """Store a value loaded while the cache was at ``generation``"""
+        entry = CacheEntry(value, time.monotonic() + self.ttl_seconds)
+        if generation == self.generation:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        entry = self.get(key)
+        if entry is None:
+            entry = await self.loads.do(key, lambda: self._load(key, loader))
+        return entry
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        generation = self.generation
+        return self.put(key, await loader(), generation)
+
+    def clear(self):
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+        self.loads.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+        }
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from api.config import CHANGE_LOG_SETTLE_SECONDS
+from api.repositories.base_repository import DynamoDBRepository, run_blocking
+from api.repositories.sqlite_repository import SQLiteDatabase, get_database
+
+load_dotenv()
+
+
+class BaseChangeLogRepository:
+    """Per-table log of writes behind the delta-sync endpoints.
+
+    Every successful write to an order or menu item appends (seq, key, action)
+    to the log of its table ("stream"). seq comes from a per-stream counter, and
+    a delete leaves a 'deleted' entry as its tombstone. A reader passes the last
+    seq it has seen and gets only the entries after it, so a sync costs reads in
+    proportion to the churn, not the table size.
+
+    Entries are appended after the item write, so they can become visible out of
+    order: seq 7 may be readable while seq 6 is still being logged. Readers stop
+    at such a gap until the entry after it is CHANGE_LOG_SETTLE_SECONDS old, then
+    take the missing number to be a write that never got logged.
+
+    trim() drops old entries and records how far it went. Positions before that
+    point get 410 Gone, and the reader has to reload in full.
+
+    Backends store entries through _append, _position, _read and _trim.
+    """
+
+    async def record(self, stream: str, changes: List[Tuple[str, str]]):
+        """Append (key, action) entries, in order, for writes that already succeeded"""
+        if changes:
+            await self._append(stream, changes, time.time())
+
+    async def position(self, stream: str) -> int:
+        """The latest seq handed out; a reader that loads everything after reading it can sync from it"""
+        last_seq, _ = await self._position(stream)
+        return last_seq
+
+    async def read(self, stream: str, since: int, limit: int) -> Tuple[List[dict], bool]:
+        """Up to ``limit`` entries after ``since`` in seq order, and whether more are ready to read"""
+        (last_seq, trimmed_through), (entries, more) = await asyncio.gather(
+            self._position(stream), self._read(stream, since, limit)
+        )
+        if since < trimmed_through or since > last_seq:
+            raise HTTPException(status_code=410, detail="Change log no longer covers this position, reload in full")
+
+        ready, expected, now = [], since + 1, time.time()
+        for entry in entries:
+            if entry['seq'] != expected and now - entry['logged_at'] < CHANGE_LOG_SETTLE_SECONDS:
+                # An earlier write may still be logging its entry, wait for it rather than skip past it
+                return ready, False
+            ready.append(entry)
+            expected = entry['seq'] + 1
+        return ready, more
+
+    async def trim(self, stream: str, before: float) -> int:
+        """Drop the entries logged before ``before`` (a Unix timestamp), returns how many"""
+        return await self._trim(stream, before)
+
+
+class ChangeLogRepository(BaseChangeLogRepository, DynamoDBRepository):
+    """Change log in the change_log DynamoDB table.
+
+    Each stream is one partition sorted by seq. The item at seq 0 holds the
+    stream's counter (last_seq) and how far it has been trimmed.
+    """
+    table_name = 'change_log'
+    key_names = ('stream', 'seq')
+
+    async def _append(self, stream: str, changes: List[Tuple[str, str]], logged_at: float):
+        try:
+            response = await self._call(
+                'update_item',
+                Key={'stream': stream, 'seq': 0},
+                UpdateExpression="ADD last_seq :count",
+                ExpressionAttributeValues={':count': len(changes)},
+                ReturnValues="UPDATED_NEW"
+            )
+            first = int(response['Attributes']['last_seq']) - len(changes) + 1
+            entries = [
+                {'stream': stream, 'seq': first + offset, 'item_key': key, 'action': action,
+                 'logged_at': Decimal(repr(logged_at))}
+                for offset, (key, action) in enumerate(changes)
+            ]
+            if len(entries) == 1:
+                await self._call('put_item', Item=entries[0])
+                return
+        except ClientError as e:
+            print(f"Error logging changes: {e.response['Error']['Message']}")
+            raise
+        errors = await self.batch_put(entries)
+        if errors:
+            raise RuntimeError(f"Failed to log {len(errors)} of {len(entries)} changes to {stream}")
+
+    async def _position(self, stream: str) -> Tuple[int, int]:
+        try:
+            response = await self._call('get_item', Key={'stream': stream, 'seq': 0}, ConsistentRead=True)
+        except ClientError as e:
+            print(f"Error getting change log position: {e.response['Error']['Message']}")
+            raise
+        counter = response.get('Item', {})
+        return int(counter.get('last_seq', 0)), int(counter.get('trimmed_through', 0))
+
+    async def _read(self, stream: str, since: int, limit: int) -> Tuple[List[dict], bool]:
+        try:
+            response = await self._call(
+                'query',
+                KeyConditionExpression=Key('stream').eq(stream) & Key('seq').gt(since),
+                ConsistentRead=True,
+                Limit=limit
+            )
+        except ClientError as e:
+            print(f"Error reading change log: {e.response['Error']['Message']}")
+            raise
+        entries = [
+            {'seq': int(item['seq']), 'key': item['item_key'], 'action': item['action'],
+             'logged_at': float(item['logged_at'])}
+            for item in response.get('Items', [])
+        ]
+        return entries, 'LastEvaluatedKey' in response
+
+    async def _trim(self, stream: str, before: float) -> int:
+        _, trimmed_through = await self._position(stream)
+        expired = []
+        kwargs = dict(
+            KeyConditionExpression=Key('stream').eq(stream) & Key('seq').gt(trimmed_through),
+            ProjectionExpression='#stream, seq, logged_at',
+            ExpressionAttributeNames={'#stream': 'stream'},
+        )
+        while True:
+            response = await self._call('query', **kwargs)
+            for item in response.get('Items', []):
+                if float(item['logged_at']) >= before:
+                    break
+                expired.append({'stream': stream, 'seq': item['seq']})
+            else:
+                if 'LastEvaluatedKey' in response:
+                    kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+                    continue
+            break
+        if not expired:
+            return 0
+
+        # Move the marker first, so that no reader is sent past entries that are about to go
+        await self._call(
+            'update_item',
+            Key={'stream': stream, 'seq': 0},
+            UpdateExpression="SET trimmed_through = :through",
+            ExpressionAttributeValues={':through': expired[-1]['seq']}
+        )
+        await run_blocking(self._delete_keys, expired)
+        return len(expired)
+
+    def _delete_keys(self, keys: List[dict]):
+        with self.table.batch_writer() as batch:
+            for key in keys:
+                batch.delete_item(Key=key)
+
+
+class SQLiteChangeLogRepository(BaseChangeLogRepository):
+    """Change log in the change_log SQLite table, with counters in change_log_position"""
+
+    def __init__(self, database: Optional[SQLiteDatabase] = None):
+        self.database = database or get_database()
+
+    async def _append(self, stream: str, changes: List[Tuple[str, str]], logged_at: float):
+        def append(connection):
+            connection.execute("INSERT OR IGNORE INTO change_log_position (stream) VALUES (?)", (stream,))
+            last_seq, = connection.execute(
+                "UPDATE change_log_position SET last_seq = last_seq + ? WHERE stream = ? RETURNING last_seq",
+                (len(changes), stream)
+            ).fetchone()
+            first = last_seq - len(changes) + 1
+            connection.executemany(
+                "INSERT INTO change_log (stream, seq, item_key, action, logged_at) VALUES (?, ?, ?, ?, ?)",
+                [(stream, first + offset, key, action, logged_at) for offset, (key, action) in enumerate(changes)]
+            )
+        await self.database.write(append)
+
+    async def _position(self, stream: str) -> Tuple[int, int]:
+        def select(connection):
+            return connection.execute(
+                "SELECT last_seq, trimmed_through FROM change_log_position WHERE stream = ?", (stream,)
+            ).fetchone()
+        return await self.database.read(select) or (0, 0)
+
+    async def _read(self, stream: str, since: int, limit: int) -> Tuple[List[dict], bool]:
+        def select(connection):
+            return connection.execute(
+                "SELECT seq, item_key, action, logged_at FROM change_log WHERE stream = ? AND seq > ? "
+                "ORDER BY seq LIMIT ?",
+                (stream, since, limit + 1)
+            ).fetchall()
+        rows = await self.database.read(select)
+        entries = [{'seq': seq, 'key': key, 'action': action, 'logged_at': logged_at}
+                   for seq, key, action, logged_at in rows[:limit]]
+        return entries, len(rows) > limit
+
+    async def _trim(self, stream: str, before: float) -> int:
+        def trim(connection):
+            row = connection.execute(
+                "SELECT trimmed_through FROM change_log_position WHERE stream = ?", (stream,)
+            ).fetchone()
+            trimmed_through = row[0] if row else 0
+            # Entries are trimmed in seq order, up to the first one that is recent enough to keep
+            keep, = connection.execute(
+                "SELECT MIN(seq) FROM change_log WHERE stream = ? AND seq > ? AND logged_at >= ?",
+                (stream, trimmed_through, before)
+            ).fetchone()
+            through, = connection.execute(
+                "SELECT MAX(seq) FROM change_log WHERE stream = ? AND seq < ?",
+                (stream, keep if keep is not None else 1 << 62)
+            ).fetchone()
+            if through is None or through <= trimmed_through:
+                return 0
+            connection.execute(
+                "UPDATE change_log_position SET trimmed_through = ? WHERE stream = ?", (through, stream)
+            )
+            return connection.execute(
+                "DELETE FROM change_log WHERE stream = ? AND seq <= ?", (stream, through)
+            ).rowcount
+        return await self.database.write(trim)
@@ -1,24 +1,27 @@
-import os
-
-import boto3
 import uuid
 from botocore.exceptions import ClientError
-from typing import Optional
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
+from api.config import MENU_CACHE_MAX_ENTRIES, MENU_CACHE_TTL_SECONDS, PAGE_SIZE_MAX
+from api.repositories.base_repository import DynamoDBRepository
+from api.repositories.cache import CacheEntry, TTLCache
+from api.repositories.sqlite_repository import SQLiteRepository
+
 load_dotenv()
 
-class MenuRepository:
-    def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table('menu_items')
+class MenuRepository(DynamoDBRepository):
+    table_name = 'menu_items'
+    key_names = ('item_id',)
 
     async def create_item(self, item_data: dict) -> dict:
         item_data['item_id'] = str(uuid.uuid4())
+        item_data['version'] = 1
         try:
-            self.table.put_item(Item=item_data)
+            await self._call('put_item', Item=item_data)
             return item_data
         except ClientError as e:
             print(f"Error creating item: {e.response['Error']['Message']}")
@@ -26,52 +29,221 @@ class MenuRepository:
 
     async def get_all(self) -> list:
         try:
-            response = self.table.scan()
-            return response.get('Items', [])
+            items = []
+            async for page in self.iter_pages(PAGE_SIZE_MAX):
+                items.extend(page)
+            return items
+        except ClientError as e:
+            print(f"Error getting items: {e.response['Error']['Message']}")
+            raise
+
+    async def get_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        try:
+            return await self.scan_page(limit, cursor)
         except ClientError as e:
             print(f"Error getting items: {e.response['Error']['Message']}")
             raise
 
     async def get_by_id(self, item_id: str) -> Optional[dict]:
         try:
-            response = self.table.get_item(Key={'item_id': item_id})
+            response = await self._call('get_item', Key={'item_id': item_id})
             return response.get('Item')
         except ClientError as e:
             print(f"Error getting item: {e.response['Error']['Message']}")
             raise
 
-    async def update_item(self, item_id: str, item_data: dict) -> dict:
+    async def get_many(self, item_ids: List[str], consistent_read: bool = False) -> List[dict]:
+        try:
+            return await self.batch_get([{'item_id': item_id} for item_id in item_ids], consistent_read)
+        except ClientError as e:
+            print(f"Error getting items: {e.response['Error']['Message']}")
+            raise
+
+    async def update_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict:
+        """Update an existing item in one conditional write, bumping its version.
+
+        Raises 404 if the item does not exist and 412 if ``expected_version`` is stale.
+        """
         # Remove None values from item_data
         update_data = {k: v for k, v in item_data.items() if v is not None}
         if not update_data:
             raise HTTPException(status_code=400, detail="No valid update data provided")
 
+        condition, names, values = self._write_condition(expected_version)
+
         # Build update expression
         update_expression = "SET " + ", ".join(f"#{k} = :{k}" for k in update_data)
-        expression_attribute_names = {f"#{k}": k for k in update_data}
-        expression_attribute_values = {f":{k}": v for k, v in update_data.items()}
+        update_expression += ", #version = if_not_exists(#version, :zero) + :one"
+        expression_attribute_names = {**names, '#version': 'version', **{f"#{k}": k for k in update_data}}
+        expression_attribute_values = {**values, ':zero': 0, ':one': 1,
+                                       **{f":{k}": v for k, v in update_data.items()}}
 
         try:
-            response = self.table.update_item(
+            response = await self._call(
+                'update_item',
                 Key={'item_id': item_id},
                 UpdateExpression=update_expression,
+                ConditionExpression=condition,
                 ExpressionAttributeNames=expression_attribute_names,
                 ExpressionAttributeValues=expression_attribute_values,
-                ReturnValues="ALL_NEW"
+                ReturnValues="ALL_NEW",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD"
             )
             return response.get('Attributes', {})
         except ClientError as e:
+            self._raise_for_condition(e, "Menu item not found")
             print(f"Error updating item: {e.response['Error']['Message']}")
             raise
 
-    async def patch_item(self, item_id: str, item_data: dict) -> dict:
+    async def patch_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict:
         # Similar to update but only modifies specified fields
-        return await self.update_item(item_id, item_data)
+        return await self.update_item(item_id, item_data, expected_version)
 
-    async def delete_item(self, item_id: str) -> bool:
+    async def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> dict:
+        """Delete an existing item in one conditional write, returns the deleted item"""
+        condition, names, values = self._write_condition(expected_version)
         try:
-            self.table.delete_item(Key={'item_id': item_id})
-            return True
+            response = await self._call(
+                'delete_item',
+                Key={'item_id': item_id},
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                **({'ExpressionAttributeValues': values} if values else {}),
+                ReturnValues="ALL_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD"
+            )
+            return response.get('Attributes', {})
         except ClientError as e:
+            self._raise_for_condition(e, "Menu item not found")
             print(f"Error deleting item: {e.response['Error']['Message']}")
-            raise
\ No newline at end of file
+            raise
+
+
+class SQLiteMenuRepository(SQLiteRepository):
+    table_name = 'menu_items'
+    key_name = 'item_id'
+    columns = ('item_id', 'version', 'data')
+
+    async def create_item(self, item_data: dict) -> dict:
+        item_data['item_id'] = str(uuid.uuid4())
+        item_data['version'] = 1
+        await self._insert(item_data)
+        return item_data
+
+    async def get_all(self) -> list:
+        items = []
+        async for page in self.iter_pages(PAGE_SIZE_MAX):
+            items.extend(page)
+        return items
+
+    async def get_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        return await self.scan_page(limit, cursor)
+
+    async def get_by_id(self, item_id: str) -> Optional[dict]:
+        return await self._get(item_id)
+
+    async def get_many(self, item_ids: List[str], consistent_read: bool = False) -> List[dict]:
+        return await self.batch_get([{'item_id': item_id} for item_id in item_ids])
+
+    async def update_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict:
+        """Update an existing item, bumping its version.
+
+        Raises 404 if the item does not exist and 412 if ``expected_version`` is stale.
+        """
+        update_data = {k: v for k, v in item_data.items() if v is not None}
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No valid update data provided")
+        _, updated = await self._update(item_id, update_data, expected_version, "Menu item not found")
+        return updated
+
+    async def patch_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict:
+        return await self.update_item(item_id, item_data, expected_version)
+
+    async def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> dict:
+        """Delete an existing item, returns the deleted item"""
+        return await self._delete(item_id, expected_version, "Menu item not found")
+
+
+class CachedMenuRepository:
+    """Read-through cache in front of a MenuRepository, cleared by every write"""
+
+    def __init__(self, repository: MenuRepository,
+                 ttl_seconds: float = MENU_CACHE_TTL_SECONDS,
+                 max_entries: int = MENU_CACHE_MAX_ENTRIES):
+        self.repository = repository
+        self.cache = TTLCache(ttl_seconds, max_entries, name='menu')
+
+    def __getattr__(self, name):
+        # Anything not cached (parallel_scan, table, ...) goes straight through
+        return getattr(self.repository, name)
+
+    async def get_page_entry(self, limit: int, cursor: Optional[str] = None) -> CacheEntry:
+        return await self.cache.get_or_load(
+            ('page', limit, cursor), lambda: self.repository.get_page(limit, cursor)
+        )
+
+    async def get_by_id_entry(self, item_id: str) -> CacheEntry:
+        return await self.cache.get_or_load(('item', item_id), lambda: self.repository.get_by_id(item_id))
+
+    async def get_all(self) -> list:
+        return (await self.cache.get_or_load(('all',), self.repository.get_all)).value
+
+    async def get_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        return (await self.get_page_entry(limit, cursor)).value
+
+    async def get_by_id(self, item_id: str) -> Optional[dict]:
+        return (await self.get_by_id_entry(item_id)).value
+
+    async def get_many(self, item_ids: List[str]) -> List[dict]:
+        """Serve what the cache has and batch-fetch only the rest"""
+        items, missing = [], []
+        for item_id in dict.fromkeys(item_ids):
+            entry = self.cache.get(('item', item_id))
+            if entry is None:
+                missing.append(item_id)
+            elif entry.value:
+                items.append(entry.value)
+        if missing:
+            generation = self.cache.generation
+            fetched = {item['item_id']: item for item in await self.repository.get_many(missing)}
+            for item_id in missing:
+                self.cache.put(('item', item_id), fetched.get(item_id), generation)
+            items.extend(fetched.values())
+        return items
+
+    async def get_prices(self, item_ids: Iterable[str]) -> Dict[str, Decimal]:
+        """Current prices, unknown ids are left out.
+
+        Read from the table with a consistent read rather than the cache: only
+        writes through this worker clear it, and an order priced from a copy
+        another worker has since changed would keep the old price for good.
+        """
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids:
+            return {}
+        return {item['item_id']: Decimal(str(item['price']))
+                for item in await self.repository.get_many(item_ids, consistent_read=True)}
+
+    async def create_item(self, item_data: dict) -> dict:
+        try:
+            return await self.repository.create_item(item_data)
+        finally:
+            self.cache.clear()
+
+    async def update_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict:
+        try:
+            return await self.repository.update_item(item_id, item_data, expected_version)
+        finally:
+            self.cache.clear()
+
+    async def patch_item(self, item_id: str, item_data: dict, expected_version: Optional[int] = None) -> dict:
+        try:
+            return await self.repository.patch_item(item_id, item_data, expected_version)
+        finally:
+            self.cache.clear()
+
+    async def delete_item(self, item_id: str, expected_version: Optional[int] = None) -> dict:
+        try:
+            return await self.repository.delete_item(item_id, expected_version)
+        finally:
+            self.cache.clear()
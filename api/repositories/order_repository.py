@@ -1,76 +1,377 @@
-import os
-
-import boto3
 import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
+from api.config import ORDER_WRITE_COALESCE_MS, ORDER_WRITE_MAX_PENDING, PAGE_SIZE_MAX
+from api.repositories.base_repository import (
+    DynamoDBRepository, WriteCoalescer, decode_cursor, encode_cursor, projection,
+)
+from api.repositories.cache import SingleFlight
+from api.repositories.sqlite_repository import SQLiteRepository, loads
+
 load_dotenv()
 
-class OrderRepository:
-    def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table('orders')
+
+def compact_line(line: dict) -> dict:
+    """Normalise an order line to (item_id, quantity, unit_price).
+
+    Orders written before compact lines embed the whole menu item, whose
+    price at the time becomes the unit price snapshot.
+    """
+    if 'item' in line and 'unit_price' not in line:
+        return {'item_id': line['item']['item_id'], 'quantity': line['quantity'], 'unit_price': line['item']['price']}
+    return line
+
+
+def compact_order(order: dict) -> dict:
+    return {**order, 'items': [compact_line(line) for line in order.get('items') or []]}
+
+
+# GSI keyed by UTC day bucket (order_day) with the numeric order timestamp (order_ts) as sort key
+ORDER_DATE_INDEX = 'order_date_index'
+ORDER_DATE_INDEX_KEYS = ('order_id', 'order_day', 'order_ts')
+# GSI keyed by the short order number printed on receipts
+ORDER_NUMBER_INDEX = 'order_number_index'
+
+
+def order_date_keys(order_date) -> dict:
+    """Index attributes for an order_date timestamp string"""
+    timestamp = Decimal(str(order_date))
+    day = datetime.fromtimestamp(float(timestamp), timezone.utc).strftime('%Y-%m-%d')
+    return {'order_day': day, 'order_ts': timestamp}
+
+
+def day_buckets(since: float, until: float) -> List[str]:
+    """UTC day buckets covering [since, until], newest first"""
+    first = datetime.fromtimestamp(since, timezone.utc).date()
+    day = datetime.fromtimestamp(until, timezone.utc).date()
+    days = []
+    while day >= first:
+        days.append(day.isoformat())
+        day -= timedelta(days=1)
+    return days
+
+
+class OrderRepository(DynamoDBRepository):
+    table_name = 'orders'
+    key_names = ('order_id',)
+
+    def __init__(self, dynamodb=None):
+        super().__init__(dynamodb)
+        # Opt-in group commit, concurrent creates share batch writes instead of one put_item each
+        self.coalescer = WriteCoalescer(
+            self.batch_put, ORDER_WRITE_COALESCE_MS / 1000, max_pending=ORDER_WRITE_MAX_PENDING, label=self.table_name
+        ) if ORDER_WRITE_COALESCE_MS > 0 else None
+        # Identical concurrent reads share one call; every write here starts fresh ones
+        self.reads = SingleFlight(self.table_name)
 
     async def create_order(self, order_data: dict) -> dict:
         order_data['order_id'] = str(uuid.uuid4())
+        order_data['version'] = 1
+        order_data.update(order_date_keys(order_data['order_date']))
         try:
-            self.table.put_item(Item=order_data)
+            if self.coalescer:
+                return await self.coalescer.write(order_data)
+            await self._call('put_item', Item=order_data)
             return order_data
         except ClientError as e:
             print(f"Error creating item: {e.response['Error']['Message']}")
             raise
+        except RuntimeError as e:
+            print(f"Error creating item: {str(e)}")
+            raise
+        finally:
+            self.reads.invalidate()
+
+    async def create_orders(self, orders: List[dict]) -> Dict[int, str]:
+        """Create many orders with batch writes, returns {index: error} for failures"""
+        for order_data in orders:
+            order_data['order_id'] = str(uuid.uuid4())
+            order_data['version'] = 1
+            order_data.update(order_date_keys(order_data['order_date']))
+        try:
+            errors = await self.batch_put(orders)
+        finally:
+            self.reads.invalidate()
+        if errors:
+            print(f"Error creating {len(errors)} of {len(orders)} orders in batch")
+        return errors
 
     async def get_all(self) -> list:
         try:
-            response = self.table.scan()
-            return response.get('Items', [])
+            items = []
+            async for page in self.iter_pages(PAGE_SIZE_MAX):
+                items.extend(page)
+            return items
         except ClientError as e:
             print(f"Error getting items: {e.response['Error']['Message']}")
             raise
 
-    async def get_by_id(self, order_id: str) -> Optional[dict]:
+    async def get_page(self, limit: int, cursor: Optional[str] = None,
+                       fields: Optional[FrozenSet[str]] = None) -> Tuple[list, Optional[str]]:
+        try:
+            return await self.reads.do(
+                ('page', limit, cursor, fields), lambda: self.scan_page(limit, cursor, **projection(fields))
+            )
+        except ClientError as e:
+            print(f"Error getting items: {e.response['Error']['Message']}")
+            raise
+
+    async def get_range_page(self, since: float, until: float, limit: int, cursor: Optional[str] = None,
+                             fields: Optional[FrozenSet[str]] = None) -> Tuple[list, Optional[str]]:
+        """Read one page of orders placed in [since, until], newest first.
+
+        Queries the date index one day bucket at a time, so the cost follows
+        the size of the window rather than the size of the table.
+        """
+        # The next cursor is built from the index keys of the last order
+        read = projection(fields and fields | set(ORDER_DATE_INDEX_KEYS))
+        days = day_buckets(since, until)
+        start_key = decode_cursor(cursor)
+        if start_key:
+            if start_key.get('order_day') not in days:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            days = days[days.index(start_key['order_day']):]
+
+        in_window = Key('order_ts').between(Decimal(str(since)), Decimal(str(until)))
+        items = []
+        try:
+            for day in days:
+                while True:
+                    kwargs = dict(
+                        IndexName=ORDER_DATE_INDEX,
+                        KeyConditionExpression=Key('order_day').eq(day) & in_window,
+                        ScanIndexForward=False,
+                        Limit=limit - len(items),
+                        **read
+                    )
+                    if start_key:
+                        kwargs['ExclusiveStartKey'] = start_key
+                    response = await self._call('query', **kwargs)
+                    items.extend(response.get('Items', []))
+                    start_key = response.get('LastEvaluatedKey')
+                    if len(items) >= limit:
+                        # Resume right after the last order returned
+                        last = items[-1]
+                        return items, encode_cursor({name: last[name] for name in ORDER_DATE_INDEX_KEYS})
+                    if not start_key:
+                        break
+            return items, None
+        except ClientError as e:
+            print(f"Error querying items: {e.response['Error']['Message']}")
+            raise
+
+    async def get_by_number(self, order_number: str, fields: Optional[FrozenSet[str]] = None) -> list:
+        """Orders with this order number, newest first (numbers are short and may repeat)"""
+        try:
+            return await self.reads.do(
+                ('number', order_number, fields), lambda: self._query_number(order_number, fields)
+            )
+        except ClientError as e:
+            print(f"Error querying items: {e.response['Error']['Message']}")
+            raise
+
+    async def _query_number(self, order_number: str, fields: Optional[FrozenSet[str]]) -> list:
+        items = []
+        kwargs = dict(IndexName=ORDER_NUMBER_INDEX, KeyConditionExpression=Key('order_number').eq(order_number),
+                      **projection(fields and fields | {'order_date'}))
+        while True:
+            response = await self._call('query', **kwargs)
+            items.extend(response.get('Items', []))
+            if not response.get('LastEvaluatedKey'):
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return sorted(items, key=lambda order: Decimal(str(order.get('order_date', 0))), reverse=True)
+
+    async def get_by_id(self, order_id: str, fields: Optional[FrozenSet[str]] = None) -> Optional[dict]:
         try:
-            response = self.table.get_item(Key={'order_id': order_id})
+            response = await self.reads.do(
+                ('item', order_id, fields),
+                lambda: self._call('get_item', Key={'order_id': order_id}, **projection(fields))
+            )
             return response.get('Item')
         except ClientError as e:
             print(f"Error getting item: {e.response['Error']['Message']}")
             raise
 
-    async def update_order(self, order_id: str, order_data: dict) -> dict:
-        update_data = {k: v for k, v in order_data.items() if k != 'order_id'}
+    async def get_many(self, order_ids: List[str], consistent_read: bool = False) -> List[dict]:
+        try:
+            return await self.batch_get([{'order_id': order_id} for order_id in order_ids], consistent_read)
+        except ClientError as e:
+            print(f"Error getting items: {e.response['Error']['Message']}")
+            raise
+
+    async def update_order(self, order_id: str, order_data: dict,
+                           expected_version: Optional[int] = None) -> Tuple[dict, dict]:
+        """Update an existing order in one conditional write, bumping its version.
+
+        Returns (previous, updated). Raises 404 if the order does not exist and
+        412 if ``expected_version`` is stale.
+        """
+        update_data = {k: v for k, v in order_data.items() if k not in ('order_id', 'version')}
 
         if not update_data:
             raise HTTPException(status_code=400, detail="No valid update data provided")
+        if 'order_date' in update_data:
+            update_data.update(order_date_keys(update_data['order_date']))
+
+        condition, names, values = self._write_condition(expected_version)
 
         update_expression = "SET " + ", ".join(f"#{k} = :{k}" for k in update_data)
-        expression_attribute_names = {f"#{k}": k for k in update_data}
-        expression_attribute_values = {f":{k}": v for k, v in update_data.items()}
+        update_expression += ", #version = if_not_exists(#version, :zero) + :one"
+        expression_attribute_names = {**names, '#version': 'version', **{f"#{k}": k for k in update_data}}
+        expression_attribute_values = {**values, ':zero': 0, ':one': 1,
+                                       **{f":{k}": v for k, v in update_data.items()}}
 
         try:
-            response = self.table.update_item(
+            # ALL_OLD gives both states in one round trip, the dashboard stats need the old one
+            response = await self._call(
+                'update_item',
                 Key={'order_id': order_id},
                 UpdateExpression=update_expression,
+                ConditionExpression=condition,
                 ExpressionAttributeNames=expression_attribute_names,
                 ExpressionAttributeValues=expression_attribute_values,
-                ReturnValues="ALL_NEW"
+                ReturnValues="ALL_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD"
             )
-            return response.get('Attributes', {})
+            previous = response.get('Attributes', {})
+            updated = {**previous, **update_data, 'version': previous.get('version', 0) + 1}
+            return previous, updated
         except ClientError as e:
+            self._raise_for_condition(e, "Order not found")
             print(f"Error updating item: {e.response['Error']['Message']}")
             raise
+        finally:
+            self.reads.invalidate()
 
-    async def patch_order(self, order_id: str, order_data: dict) -> dict:
+    async def patch_order(self, order_id: str, order_data: dict,
+                          expected_version: Optional[int] = None) -> Tuple[dict, dict]:
         # Similar to update but only modifies specified fields
-        return await self.update_order(order_id, order_data)
+        return await self.update_order(order_id, order_data, expected_version)
 
-    async def delete_order(self, order_id: str) -> bool:
+    async def delete_order(self, order_id: str, expected_version: Optional[int] = None) -> dict:
+        """Delete an existing order in one conditional write, returns the deleted order"""
+        condition, names, values = self._write_condition(expected_version)
         try:
-            self.table.delete_item(Key={'order_id': order_id})
-            return True
+            response = await self._call(
+                'delete_item',
+                Key={'order_id': order_id},
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                **({'ExpressionAttributeValues': values} if values else {}),
+                ReturnValues="ALL_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD"
+            )
+            return response.get('Attributes', {})
         except ClientError as e:
+            self._raise_for_condition(e, "Order not found")
             print(f"Error deleting item: {e.response['Error']['Message']}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            self.reads.invalidate()
+
+
+class SQLiteOrderRepository(SQLiteRepository):
+    """Orders as JSON documents; ``fields`` selections are read whole and trimmed when rendered"""
+    table_name = 'orders'
+    key_name = 'order_id'
+    # order_ts and order_number are indexed columns for the time-range and receipt lookups
+    columns = ('order_id', 'order_number', 'order_ts', 'version', 'data')
+
+    def _row_values(self, item: dict) -> tuple:
+        order_id, version, data = super()._row_values(item)
+        order_ts = float(item['order_date']) if item.get('order_date') else None
+        return order_id, item.get('order_number'), order_ts, version, data
+
+    async def create_order(self, order_data: dict) -> dict:
+        order_data['order_id'] = str(uuid.uuid4())
+        order_data['version'] = 1
+        await self._insert(order_data)
+        return order_data
+
+    async def create_orders(self, orders: List[dict]) -> Dict[int, str]:
+        """Create many orders in one transaction, returns {index: error} for failures"""
+        for order_data in orders:
+            order_data['order_id'] = str(uuid.uuid4())
+            order_data['version'] = 1
+        errors = await self.batch_put(orders)
+        if errors:
+            print(f"Error creating {len(errors)} of {len(orders)} orders in batch")
+        return errors
+
+    async def get_all(self) -> list:
+        items = []
+        async for page in self.iter_pages(PAGE_SIZE_MAX):
+            items.extend(page)
+        return items
+
+    async def get_page(self, limit: int, cursor: Optional[str] = None,
+                       fields: Optional[FrozenSet[str]] = None) -> Tuple[list, Optional[str]]:
+        return await self.scan_page(limit, cursor)
+
+    async def get_range_page(self, since: float, until: float, limit: int, cursor: Optional[str] = None,
+                             fields: Optional[FrozenSet[str]] = None) -> Tuple[list, Optional[str]]:
+        """Read one page of orders placed in [since, until], newest first, from the order_ts index"""
+        start_key = decode_cursor(cursor)
+        if start_key and not {'order_id', 'order_ts'} <= start_key.keys():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        def select(connection):
+            if not start_key:
+                return connection.execute(
+                    "SELECT order_id, order_ts, data FROM orders WHERE order_ts BETWEEN ? AND ? "
+                    "ORDER BY order_ts DESC, order_id DESC LIMIT ?",
+                    (since, until, limit)
+                ).fetchall()
+            return connection.execute(
+                "SELECT order_id, order_ts, data FROM orders WHERE order_ts BETWEEN ? AND ? "
+                "AND (order_ts, order_id) < (?, ?) ORDER BY order_ts DESC, order_id DESC LIMIT ?",
+                (since, until, float(start_key['order_ts']), start_key['order_id'], limit)
+            ).fetchall()
+        rows = await self.database.read(select)
+        next_cursor = None
+        if len(rows) == limit:
+            order_id, order_ts, _ = rows[-1]
+            next_cursor = encode_cursor({'order_id': order_id, 'order_ts': Decimal(repr(order_ts))})
+        return [loads(data) for _, _, data in rows], next_cursor
+
+    async def get_by_number(self, order_number: str, fields: Optional[FrozenSet[str]] = None) -> list:
+        """Orders with this order number, newest first (numbers are short and may repeat)"""
+        def select(connection):
+            return connection.execute(
+                "SELECT data FROM orders WHERE order_number = ? ORDER BY order_ts DESC", (order_number,)
+            ).fetchall()
+        return [loads(data) for data, in await self.database.read(select)]
+
+    async def get_by_id(self, order_id: str, fields: Optional[FrozenSet[str]] = None) -> Optional[dict]:
+        return await self._get(order_id)
+
+    async def get_many(self, order_ids: List[str], consistent_read: bool = False) -> List[dict]:
+        return await self.batch_get([{'order_id': order_id} for order_id in order_ids])
+
+    async def update_order(self, order_id: str, order_data: dict,
+                           expected_version: Optional[int] = None) -> Tuple[dict, dict]:
+        """Update an existing order, bumping its version.
+
+        Returns (previous, updated). Raises 404 if the order does not exist and
+        412 if ``expected_version`` is stale.
+        """
+        update_data = {k: v for k, v in order_data.items() if k not in ('order_id', 'version')}
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No valid update data provided")
+        return await self._update(order_id, update_data, expected_version, "Order not found")
+
+    async def patch_order(self, order_id: str, order_data: dict,
+                          expected_version: Optional[int] = None) -> Tuple[dict, dict]:
+        return await self.update_order(order_id, order_data, expected_version)
+
+    async def delete_order(self, order_id: str, expected_version: Optional[int] = None) -> dict:
+        """Delete an existing order, returns the deleted order"""
+        return await self._delete(order_id, expected_version, "Order not found")
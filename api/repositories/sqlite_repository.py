@@ -0,0 +1,280 @@
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from api.config import PAGE_SIZE_MAX, SQLITE_PATH, SQLITE_READERS
+from api.repositories.base_repository import decode_cursor, encode_cursor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_items (
+    item_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    order_number TEXT,
+    order_ts REAL,
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_by_date ON orders (order_ts, order_id);
+CREATE INDEX IF NOT EXISTS orders_by_number ON orders (order_number);
+
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+    stat_type TEXT NOT NULL,
+    stat_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (stat_type, stat_key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS change_log (
+    stream TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item_key TEXT NOT NULL,
+    action TEXT NOT NULL,
+    logged_at REAL NOT NULL,
+    PRIMARY KEY (stream, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS change_log_position (
+    stream TEXT PRIMARY KEY,
+    last_seq INTEGER NOT NULL DEFAULT 0,
+    trimmed_through INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    # WAL makes NORMAL durable against application crashes, only an OS crash can lose the last commits
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+
+
+def _encode_number(value):
+    if isinstance(value, Decimal):
+        # Tagged so that it reads back as an exact Decimal, normalised the way DynamoDB returns numbers
+        return {'$n': str(int(value)) if value == value.to_integral_value() else str(value.normalize())}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_number(obj: dict):
+    if len(obj) == 1 and '$n' in obj:
+        return Decimal(obj['$n'])
+    return obj
+
+
+def dumps(item: dict) -> str:
+    return json.dumps(item, default=_encode_number, separators=(',', ':'))
+
+
+def loads(data: str) -> dict:
+    """Documents come back with every number as a Decimal, as they do from DynamoDB"""
+    return json.loads(data, parse_int=Decimal, parse_float=Decimal, object_hook=_decode_number)
+
+
+class SQLiteDatabase:
+    """One SQLite file shared by every repository in the process.
+
+    Writes are serialised on a single thread with its own connection, which
+    matches SQLite's one-writer model without lock contention. Reads run on a
+    small pool, each thread keeping its own connection, and in WAL mode they
+    never wait for the writer. Connections live as long as their thread, so
+    the statement cache keeps every query prepared after its first use.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, readers: int = SQLITE_READERS):
+        self.path = path
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='sqlite-reader')
+        self._writer.submit(self._create_schema).result()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, cached_statements=256,
+                                         check_same_thread=False)
+            for pragma in PRAGMAS:
+                connection.execute(pragma)
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self):
+        self._connection().executescript(SCHEMA)
+
+    def _transaction(self, fn: Callable[..., Any], *args) -> Any:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(connection, *args)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    async def read(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(connection, *args) on a reader thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: fn(self._connection(), *args))
+
+    async def write(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(connection, *args) in one transaction on the writer thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(self._transaction, fn, *args))
+
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str = SQLITE_PATH) -> SQLiteDatabase:
+    """Shared database for a file, so that all repositories use the same writer thread"""
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = SQLiteDatabase(path)
+        return _databases[path]
+
+
+class SQLiteRepository:
+    """Document table in SQLite: the key column plus the item as JSON in ``data``"""
+    table_name: str = ''
+    key_name: str = ''
+    columns: Tuple[str, ...] = ()
+
+    def __init__(self, database: Optional[SQLiteDatabase] = None):
+        self.database = database or get_database()
+
+    async def warm_up(self, connections: int = 1):
+        """Check that the table exists and open the reader threads' connections"""
+        def probe(connection):
+            return connection.execute(f"SELECT 1 FROM {self.table_name} LIMIT 1").fetchone()
+        await asyncio.gather(*(self.database.read(probe) for _ in range(max(connections, 1))))
+
+    def _row_values(self, item: dict) -> tuple:
+        """Values for ``columns``, the indexed columns are copied out of the JSON document"""
+        return item[self.key_name], int(item.get('version') or 0), dumps(item)
+
+    def _put_rows(self, connection: sqlite3.Connection, items: List[dict]):
+        connection.executemany(
+            f"INSERT OR REPLACE INTO {self.table_name} ({', '.join(self.columns)}) "
+            f"VALUES ({', '.join('?' * len(self.columns))})",
+            [self._row_values(item) for item in items]
+        )
+
+    async def _get(self, key: str) -> Optional[dict]:
+        def select(connection):
+            return connection.execute(
+                f"SELECT data FROM {self.table_name} WHERE {self.key_name} = ?", (key,)
+            ).fetchone()
+        row = await self.database.read(select)
+        return loads(row[0]) if row else None
+
+    async def scan_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """One page in key order, returns (items, next_cursor)"""
+        start_key = decode_cursor(cursor)
+        after = str(start_key.get(self.key_name, '')) if start_key else ''
+
+        def select(connection):
+            return connection.execute(
+                f"SELECT data FROM {self.table_name} WHERE {self.key_name} > ? ORDER BY {self.key_name} LIMIT ?",
+                (after, limit)
+            ).fetchall()
+        items = [loads(data) for data, in await self.database.read(select)]
+        next_cursor = encode_cursor({self.key_name: items[-1][self.key_name]}) if len(items) == limit else None
+        return items, next_cursor
+
+    async def iter_pages(self, page_size: int) -> AsyncIterator[list]:
+        cursor = None
+        while True:
+            items, cursor = await self.scan_page(page_size, cursor)
+            if items:
+                yield items
+            if not cursor:
+                return
+
+    async def parallel_scan(self, total_segments: int = 1, page_size: int = PAGE_SIZE_MAX,
+                            **scan_kwargs) -> AsyncIterator[list]:
+        # A local file gains nothing from segments, page through it in key order
+        async for page in self.iter_pages(page_size):
+            yield page
+
+    async def batch_get(self, keys: List[dict], consistent_read: bool = False) -> List[dict]:
+        """Fetch items by key, missing keys are absent from the result (reads are always consistent)"""
+        ids = list(dict.fromkeys(key[self.key_name] for key in keys))
+
+        def select(connection):
+            rows = []
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows += connection.execute(
+                    f"SELECT data FROM {self.table_name} WHERE {self.key_name} IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+            return rows
+        return [loads(data) for data, in await self.database.read(select)]
+
+    async def batch_put(self, items: List[dict]) -> Dict[int, str]:
+        """Write items in one transaction, returns {index: error message} for failures"""
+        if not items:
+            return {}
+        try:
+            await self.database.write(self._put_rows, items)
+            return {}
+        except sqlite3.Error:
+            pass
+        # One bad item fails the whole transaction, isolate it with single writes
+        errors = {}
+        for index, item in enumerate(items):
+            try:
+                await self._insert(item)
+            except sqlite3.Error as e:
+                errors[index] = str(e)
+        return errors
+
+    async def _insert(self, item: dict):
+        await self.database.write(self._put_rows, [item])
+
+    async def _update(self, key: str, update_data: dict, expected_version: Optional[int],
+                      not_found_detail: str) -> Tuple[dict, dict]:
+        """Apply update_data with the same version checks as the DynamoDB conditional writes"""
+        def update(connection):
+            row = connection.execute(
+                f"SELECT version, data FROM {self.table_name} WHERE {self.key_name} = ?", (key,)
+            ).fetchone()
+            if row is None:
+                raise HTTPException(status_code=404, detail=not_found_detail)
+            if expected_version is not None and row[0] != expected_version:
+                raise HTTPException(status_code=412, detail="Version mismatch, reload and retry")
+            previous = loads(row[1])
+            updated = {**previous, **update_data, 'version': Decimal(row[0] + 1)}
+            self._put_rows(connection, [updated])
+            return previous, updated
+        return await self.database.write(update)
+
+    async def _delete(self, key: str, expected_version: Optional[int], not_found_detail: str) -> dict:
+        def delete(connection):
+            row = connection.execute(
+                f"SELECT version, data FROM {self.table_name} WHERE {self.key_name} = ?", (key,)
+            ).fetchone()
+            if row is None:
+                raise HTTPException(status_code=404, detail=not_found_detail)
+            if expected_version is not None and row[0] != expected_version:
+                raise HTTPException(status_code=412, detail="Version mismatch, reload and retry")
+            connection.execute(f"DELETE FROM {self.table_name} WHERE {self.key_name} = ?", (key,))
+            return loads(row[1])
+        return await self.database.write(delete)
@@ -0,0 +1,302 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+from api import money
+from api.config import RECENT_ORDERS_DAYS
+from api.repositories.base_repository import DynamoDBRepository, run_blocking
+from api.repositories.order_repository import compact_line
+from api.repositories.sqlite_repository import SQLiteDatabase, dumps, get_database, loads
+
+load_dotenv()
+
+TOTALS_KEY = {'stat_type': 'totals', 'stat_key': 'all'}
+
+
+def _recent_key(order: dict) -> dict:
+    # Zero-padded so that the sort key orders chronologically as a string
+    return {'stat_type': 'recent', 'stat_key': f"{float(order['order_date']):017.6f}#{order['order_id']}"}
+
+
+def _recent_row(order: dict) -> dict:
+    return {
+        **_recent_key(order),
+        'order_id': order['order_id'],
+        'order_number': order['order_number'],
+        'order_date': order['order_date'],
+        'total': order['total'],
+        'discount_pct': order['discount_pct'],
+        'item_count': len(order['items']),
+        # DynamoDB TTL drops rows once they leave the recent window
+        'expires_at': int(float(order['order_date'])) + RECENT_ORDERS_DAYS * 86400,
+    }
+
+
+def order_contribution(order: Optional[dict]) -> Tuple[int, Dict[str, list]]:
+    """What one order adds to the aggregates, in cents: (revenue, {item_id: [quantity, revenue]})"""
+    if not order:
+        return 0, {}
+    items = {}
+    for line in order.get('items') or []:
+        line = compact_line(line)
+        quantity = int(line['quantity'])
+        entry = items.setdefault(line['item_id'], [0, 0])
+        entry[0] += quantity
+        entry[1] += money.to_cents(line['unit_price']) * quantity
+    return money.to_cents(order['total']), items
+
+
+class BaseStatsRepository:
+    """Dashboard aggregates kept up to date by the order and menu write paths.
+
+    Rows are keyed by (stat_type, stat_key):
+      totals/all         order_count, revenue, menu_item_count
+      item/<item_id>     total_ordered, revenue
+      recent/<date>#<id> order summary, expires after RECENT_ORDERS_DAYS
+
+    Backends store the rows through _apply, _read_dashboard, _clear and _put_rows.
+    Sums are kept in integer cents and stored as decimal amounts.
+    """
+
+    async def record_order_change(self, old: Optional[dict], new: Optional[dict]):
+        """Apply the difference between an order's previous and current state"""
+        await self.record_order_changes([(old, new)])
+
+    async def record_order_changes(self, changes: List[Tuple[Optional[dict], Optional[dict]]]):
+        """Apply many (old, new) order changes with one update per touched counter row"""
+        order_count, revenue = 0, 0
+        item_deltas = {}
+        recent_deletes, recent_puts = [], []
+        for old, new in changes:
+            old_revenue, old_items = order_contribution(old)
+            new_revenue, new_items = order_contribution(new)
+            order_count += int(new is not None) - int(old is not None)
+            revenue += new_revenue - old_revenue
+            for sign, items in ((-1, old_items), (1, new_items)):
+                for item_id, (quantity, item_revenue) in items.items():
+                    delta = item_deltas.setdefault(item_id, [0, 0])
+                    delta[0] += sign * quantity
+                    delta[1] += sign * item_revenue
+            if old and (not new or _recent_key(old) != _recent_key(new)):
+                recent_deletes.append(_recent_key(old))
+            if new:
+                recent_puts.append(_recent_row(new))
+
+        counters = [(TOTALS_KEY, {'order_count': order_count, 'revenue': money.from_cents(revenue)})]
+        for item_id, (quantity, item_revenue) in item_deltas.items():
+            if quantity == 0 and item_revenue == 0:
+                continue
+            counters.append((
+                {'stat_type': 'item', 'stat_key': item_id},
+                {'total_ordered': quantity, 'revenue': money.from_cents(item_revenue)}
+            ))
+        await self._apply(counters, recent_deletes, recent_puts)
+
+    async def record_menu_count_change(self, delta: int):
+        await self._apply([(TOTALS_KEY, {'menu_item_count': delta})], [], [])
+
+    async def get_dashboard(self, recent_limit: int = 5, popular_limit: int = 5) -> dict:
+        """Read the dashboard with a constant number of requests, whatever the order history size"""
+        cutoff = f"{time.time() - RECENT_ORDERS_DAYS * 86400:017.6f}"
+        totals, recent_rows, item_rows = await self._read_dashboard(cutoff, recent_limit)
+
+        order_count = int(totals.get('order_count', 0))
+        revenue = Decimal(totals.get('revenue', 0))
+        average = Decimal('0')
+        if order_count:
+            average = money.from_cents(money.divide_down(money.to_cents(revenue), order_count))
+        popular = sorted(
+            (row for row in item_rows if row.get('total_ordered', 0) > 0),
+            key=lambda row: row['total_ordered'],
+            reverse=True
+        )[:popular_limit]
+
+        return {
+            'total_revenue': revenue,
+            'total_orders': order_count,
+            'menu_items_count': int(totals.get('menu_item_count', 0)),
+            'average_order_amount': average,
+            'recent_orders': recent_rows,
+            # Menu details are joined in by the caller
+            'popular_items': [
+                {'item_id': row['stat_key'], 'total_ordered': row['total_ordered'], 'revenue': row['revenue']}
+                for row in popular
+            ],
+        }
+
+    async def rebuild(self, order_pages: AsyncIterator[list], menu_item_count: int) -> int:
+        """Recompute every aggregate from scratch, returns the number of orders seen.
+
+        Writes that land while the rebuild runs may be lost, so run it when
+        the API is quiet.
+        """
+        await self._clear()
+
+        cutoff = time.time() - RECENT_ORDERS_DAYS * 86400
+        order_count, revenue, items = 0, 0, {}
+        async for page in order_pages:
+            recent_rows = []
+            for order in page:
+                order_revenue, order_items = order_contribution(order)
+                order_count += 1
+                revenue += order_revenue
+                for item_id, (quantity, item_revenue) in order_items.items():
+                    entry = items.setdefault(item_id, [0, 0])
+                    entry[0] += quantity
+                    entry[1] += item_revenue
+                if float(order['order_date']) >= cutoff:
+                    recent_rows.append(_recent_row(order))
+            await self._put_rows(recent_rows)
+
+        rows = [{**TOTALS_KEY, 'order_count': order_count, 'revenue': money.from_cents(revenue),
+                 'menu_item_count': menu_item_count}]
+        rows += [
+            {'stat_type': 'item', 'stat_key': item_id, 'total_ordered': quantity,
+             'revenue': money.from_cents(item_revenue)}
+            for item_id, (quantity, item_revenue) in items.items()
+        ]
+        await self._put_rows(rows)
+        return order_count
+
+
+class StatsRepository(BaseStatsRepository, DynamoDBRepository):
+    """Dashboard aggregates in the dashboard_stats DynamoDB table"""
+    table_name = 'dashboard_stats'
+    key_names = ('stat_type', 'stat_key')
+
+    async def _add(self, key: dict, counters: dict):
+        update_expression = "ADD " + ", ".join(f"#{k} :{k}" for k in counters)
+        names = {f"#{k}": k for k in counters}
+        values = {f":{k}": v for k, v in counters.items()}
+        await self._call(
+            'update_item',
+            Key=key,
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+
+    async def _apply(self, counters: List[Tuple[dict, dict]], recent_deletes: List[dict], recent_puts: List[dict]):
+        try:
+            writes = [self._add(key, deltas) for key, deltas in counters]
+            if len(recent_deletes) + len(recent_puts) == 1:
+                writes.append(self._call('delete_item', Key=recent_deletes[0]) if recent_deletes
+                              else self._call('put_item', Item=recent_puts[0]))
+            elif recent_deletes or recent_puts:
+                writes.append(run_blocking(self._replace_rows, recent_puts, recent_deletes))
+            await asyncio.gather(*writes)
+        except ClientError as e:
+            print(f"Error updating stats: {e.response['Error']['Message']}")
+            raise
+
+    async def _query_all(self, **kwargs) -> list:
+        items = []
+        while True:
+            response = await self._call('query', **kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    async def _read_dashboard(self, cutoff: str, recent_limit: int) -> Tuple[dict, list, list]:
+        try:
+            totals_response, recent_response, item_rows = await asyncio.gather(
+                self._call('get_item', Key=TOTALS_KEY),
+                self._call(
+                    'query',
+                    KeyConditionExpression=Key('stat_type').eq('recent') & Key('stat_key').gte(cutoff),
+                    ScanIndexForward=False,
+                    Limit=recent_limit
+                ),
+                self._query_all(KeyConditionExpression=Key('stat_type').eq('item'))
+            )
+        except ClientError as e:
+            print(f"Error getting stats: {e.response['Error']['Message']}")
+            raise
+        return totals_response.get('Item', {}), recent_response.get('Items', []), item_rows
+
+    def _replace_rows(self, rows: list, delete_keys: list = ()):
+        with self.table.batch_writer() as batch:
+            for key in delete_keys:
+                batch.delete_item(Key=key)
+            for row in rows:
+                batch.put_item(Item=row)
+
+    async def _clear(self):
+        stale_keys = []
+        async for page in self.parallel_scan(ProjectionExpression='stat_type, stat_key'):
+            stale_keys.extend(page)
+        await run_blocking(self._replace_rows, [], stale_keys)
+
+    async def _put_rows(self, rows: list):
+        await run_blocking(self._replace_rows, rows)
+
+
+class SQLiteStatsRepository(BaseStatsRepository):
+    """Dashboard aggregates in the dashboard_stats SQLite table, each change in one transaction"""
+
+    def __init__(self, database: Optional[SQLiteDatabase] = None):
+        self.database = database or get_database()
+
+    @staticmethod
+    def _upsert(connection, rows: list):
+        connection.executemany(
+            "INSERT OR REPLACE INTO dashboard_stats (stat_type, stat_key, data) VALUES (?, ?, ?)",
+            [(row['stat_type'], row['stat_key'], dumps(row)) for row in rows]
+        )
+
+    async def _apply(self, counters: List[Tuple[dict, dict]], recent_deletes: List[dict], recent_puts: List[dict]):
+        def apply(connection):
+            rows = []
+            for key, deltas in counters:
+                row = connection.execute(
+                    "SELECT data FROM dashboard_stats WHERE stat_type = ? AND stat_key = ?",
+                    (key['stat_type'], key['stat_key'])
+                ).fetchone()
+                current = loads(row[0]) if row else dict(key)
+                for name, delta in deltas.items():
+                    current[name] = current.get(name, Decimal('0')) + delta
+                rows.append(current)
+            connection.executemany(
+                "DELETE FROM dashboard_stats WHERE stat_type = ? AND stat_key = ?",
+                [(key['stat_type'], key['stat_key']) for key in recent_deletes]
+            )
+            # Stands in for the DynamoDB TTL on recent rows
+            connection.execute(
+                "DELETE FROM dashboard_stats WHERE stat_type = 'recent' AND stat_key < ?",
+                (f"{time.time() - RECENT_ORDERS_DAYS * 86400:017.6f}",)
+            )
+            self._upsert(connection, rows + recent_puts)
+        await self.database.write(apply)
+
+    async def _read_dashboard(self, cutoff: str, recent_limit: int) -> Tuple[dict, list, list]:
+        def select(connection):
+            totals = connection.execute(
+                "SELECT data FROM dashboard_stats WHERE stat_type = ? AND stat_key = ?",
+                (TOTALS_KEY['stat_type'], TOTALS_KEY['stat_key'])
+            ).fetchone()
+            recent = connection.execute(
+                "SELECT data FROM dashboard_stats WHERE stat_type = 'recent' AND stat_key >= ? "
+                "ORDER BY stat_key DESC LIMIT ?",
+                (cutoff, recent_limit)
+            ).fetchall()
+            items = connection.execute("SELECT data FROM dashboard_stats WHERE stat_type = 'item'").fetchall()
+            return totals, recent, items
+        totals, recent, items = await self.database.read(select)
+        return (
+            loads(totals[0]) if totals else {},
+            [loads(data) for data, in recent],
+            [loads(data) for data, in items],
+        )
+
+    async def _clear(self):
+        await self.database.write(lambda connection: connection.execute("DELETE FROM dashboard_stats"))
+
+    async def _put_rows(self, rows: list):
+        if rows:
+            await self.database.write(self._upsert, rows)
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from pydantic import BaseModel, condecimal
-from typing import Optional
+from typing import List, Optional
 
 class MenuItemCreate(BaseModel):
     name: str
@@ -20,4 +20,20 @@ class MenuItemResponse(BaseModel):
     name: str
     price: condecimal(max_digits=10, decimal_places=2)
     description: Optional[str]
-    category: str
\ No newline at end of file
+    category: str
+    version: Optional[int] = None
+
+class MenuItemBatchResponse(BaseModel):
+    items: List[MenuItemResponse]
+    missing: List[str]
+
+class MenuItemChange(BaseModel):
+    seq: int
+    item_id: str
+    deleted: bool
+    item: Optional[MenuItemResponse] = None
+
+class MenuItemChangesResponse(BaseModel):
+    changes: List[MenuItemChange]
+    next_since: int
+    has_more: bool
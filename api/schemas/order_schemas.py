@@ -1,15 +1,29 @@
 from datetime import datetime
 from decimal import Decimal
 
-from pydantic import BaseModel, condecimal, Field, conint
-from typing import Optional, List
+from pydantic import BaseModel, condecimal, Field, conint, model_validator
+from typing import Literal, Optional, List
 
 from api.schemas.menu_schemas import MenuItemResponse
 
 class OrderItem(BaseModel):
-    item: MenuItemResponse
+    item_id: str
     quantity: conint(gt=0, lt=1000)
 
+    @model_validator(mode='before')
+    @classmethod
+    def accept_embedded_item(cls, data):
+        # Older clients send the whole menu item, only its id is kept
+        if isinstance(data, dict) and 'item_id' not in data and isinstance(data.get('item'), dict):
+            return {**data, 'item_id': data['item'].get('item_id')}
+        return data
+
+class OrderLineResponse(BaseModel):
+    item_id: str
+    quantity: int
+    unit_price: condecimal(max_digits=10, decimal_places=2)
+    item: Optional[MenuItemResponse] = None
+
 class OrderCreate(BaseModel):
     order_number: str
     items: List[OrderItem]
@@ -29,8 +43,31 @@ class OrderUpdate(BaseModel):
 class OrderResponse(BaseModel):
     order_id: str
     order_number: str
-    items: List[OrderItem]
+    items: List[OrderLineResponse]
     subtotal: condecimal(max_digits=15, decimal_places=2)
     discount_pct: condecimal(ge=0, le=1, decimal_places=2)
     total: condecimal(max_digits=15, decimal_places=2)
-    order_date: str
\ No newline at end of file
+    order_date: str
+    version: Optional[int] = None
+
+class OrderBatchResult(BaseModel):
+    index: int
+    status: Literal['created', 'failed']
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+class OrderBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBatchResult]
+
+class OrderChange(BaseModel):
+    seq: int
+    order_id: str
+    deleted: bool
+    order: Optional[OrderResponse] = None
+
+class OrderChangesResponse(BaseModel):
+    changes: List[OrderChange]
+    next_since: int
+    has_more: bool
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, condecimal
+from typing import List
+
+from api.schemas.menu_schemas import MenuItemResponse
+
+class RecentOrder(BaseModel):
+    order_id: str
+    order_number: str
+    order_date: str
+    total: condecimal(max_digits=15, decimal_places=2)
+    discount_pct: condecimal(ge=0, le=1, decimal_places=2)
+    item_count: int
+
+class PopularItem(BaseModel):
+    item: MenuItemResponse
+    total_ordered: int
+    revenue: condecimal(max_digits=15, decimal_places=2)
+
+class DashboardStatsResponse(BaseModel):
+    total_revenue: condecimal(max_digits=15, decimal_places=2)
+    total_orders: int
+    menu_items_count: int
+    average_order_amount: condecimal(max_digits=15, decimal_places=2)
+    recent_orders: List[RecentOrder]
+    popular_items: List[PopularItem]
@@ -0,0 +1,56 @@
+"""Production server: the API without --reload, one worker process per CPU core.
+
+Each worker has its own event loop, storage client, menu cache and /events
+subscribers. A worker creates its storage client and opens
+STARTUP_WARM_CONNECTIONS connections before it accepts requests (warm_up in
+api/app.py). With more than one worker, set EVENT_BROKER_URL to a relay
+(``python -m scripts.event_broker``) so that /events subscribers see writes
+served by any worker. Run from the repository root:
+
+    python -m api.server --host 0.0.0.0 --port 8000 --workers 4
+"""
+import argparse
+import os
+
+import uvicorn
+
+from api.config import EVENT_BROKER_URL, WEB_CONCURRENCY
+
+
+def cpu_count() -> int:
+    """CPU cores this process may run on, which in a container can be fewer than the host has"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY, or one worker per CPU core when it is 0"""
+    return WEB_CONCURRENCY or cpu_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=worker_count(),
+                        help='worker processes (default: WEB_CONCURRENCY, else one per CPU core)')
+    parser.add_argument('--log-level', default='info')
+    parser.add_argument('--access-log', action='store_true',
+                        help='log every request; /metrics already counts and times them')
+    args = parser.parse_args()
+
+    if args.workers > 1 and not EVENT_BROKER_URL:
+        print("EVENT_BROKER_URL is not set, /events subscribers only see writes served by their own worker")
+    uvicorn.run(
+        'api.app:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        access_log=args.access_log,
+    )
+
+
+if __name__ == '__main__':
+    main()
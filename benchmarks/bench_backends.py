@@ -0,0 +1,141 @@
+"""Per-endpoint request latency of the API on each storage backend.
+
+Each backend runs in its own process, since the repositories are chosen at
+import time. The menu cache is disabled so that menu reads reach the store.
+Run from the repository root:
+
+    python -m benchmarks.bench_backends --requests 200 --orders 500 --latency-ms 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ENDPOINTS = [
+    'GET /menu/{item_id}',
+    'GET /menu/?limit=100',
+    'POST /orders/',
+    'GET /orders/{order_id}',
+    'PATCH /orders/{order_id}',
+    'GET /orders/?since=&limit=100',
+    'GET /orders/by-number/{order_number}',
+    'GET /stats/dashboard',
+]
+
+
+async def measure(app, requests: int, orders: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        item_ids = []
+        for i in range(20):
+            response = await client.post("/menu/", json={
+                'name': f'Item {i}', 'price': 9.99, 'description': None, 'category': 'Bench'
+            })
+            item_ids.append(response.json()['item_id'])
+        for start in range(0, orders, 100):
+            batch = [{
+                'order_number': f'{i:06d}',
+                'items': [{'item_id': item_ids[i % 20], 'quantity': 2}, {'item_id': item_ids[(i + 7) % 20], 'quantity': 1}],
+                'discount_pct': 0
+            } for i in range(start, min(start + 100, orders))]
+            (await client.post("/orders/batch", json=batch)).raise_for_status()
+        order_ids = [order['order_id'] for order in (await client.get("/orders/", params={'limit': 1000})).json()]
+
+        def request(endpoint: str, i: int):
+            order_id = order_ids[i % len(order_ids)]
+            if endpoint == 'GET /menu/{item_id}':
+                return client.get(f"/menu/{item_ids[i % 20]}")
+            if endpoint == 'GET /menu/?limit=100':
+                return client.get("/menu/", params={'limit': 100})
+            if endpoint == 'POST /orders/':
+                return client.post("/orders/", json={
+                    'order_number': 'bench', 'items': [{'item_id': item_ids[i % 20], 'quantity': 1}], 'discount_pct': 0
+                })
+            if endpoint == 'GET /orders/{order_id}':
+                return client.get(f"/orders/{order_id}")
+            if endpoint == 'PATCH /orders/{order_id}':
+                return client.patch(f"/orders/{order_id}", json={'discount_pct': 0.1})
+            if endpoint == 'GET /orders/?since=&limit=100':
+                return client.get("/orders/", params={'since': time.time() - 86400, 'limit': 100})
+            if endpoint == 'GET /orders/by-number/{order_number}':
+                return client.get(f"/orders/by-number/{i % orders:06d}")
+            return client.get("/stats/dashboard")
+
+        results = {}
+        for endpoint in ENDPOINTS:
+            latencies = []
+            for i in range(requests):
+                start = time.perf_counter()
+                response = await request(endpoint, i)
+                latencies.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+            latencies.sort()
+            results[endpoint] = {
+                'p50_ms': statistics.median(latencies),
+                'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+            }
+        return results
+
+
+def worker(backend: str, requests: int, orders: int, latency_ms: float, output: str):
+    os.environ['STORAGE_BACKEND'] = backend
+    os.environ['MENU_CACHE_TTL_SECONDS'] = '0'
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['SQLITE_PATH'] = os.path.join(directory, 'bench.db')
+        if backend == 'dynamodb':
+            from benchmarks.local_dynamodb import local_dynamodb
+            with local_dynamodb(latency_ms):
+                from api.app import app
+                results = asyncio.run(measure(app, requests, orders))
+        else:
+            from api.app import app
+            results = asyncio.run(measure(app, requests, orders))
+    with open(output, 'w') as f:
+        json.dump(results, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='sequential requests per endpoint')
+    parser.add_argument('--orders', type=int, default=500, help='orders seeded before measuring')
+    parser.add_argument('--latency-ms', type=float, default=10.0,
+                        help='simulated DynamoDB round-trip time')
+    parser.add_argument('--backends', nargs='+', default=['dynamodb', 'sqlite'])
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.requests, args.orders, args.latency_ms, args.output)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in args.backends:
+            output = os.path.join(directory, f'{backend}.json')
+            subprocess.run([
+                sys.executable, '-m', 'benchmarks.bench_backends', '--worker', backend, '--output', output,
+                '--requests', str(args.requests), '--orders', str(args.orders), '--latency-ms', str(args.latency_ms)
+            ], check=True, stdout=subprocess.DEVNULL)
+            with open(output) as f:
+                results[backend] = json.load(f)
+
+    header = f"{'endpoint':<38}" + ''.join(f"{backend + ' p50/p95 ms':>24}" for backend in args.backends)
+    print(header)
+    for endpoint in ENDPOINTS:
+        row = f"{endpoint:<38}"
+        for backend in args.backends:
+            timing = results[backend][endpoint]
+            row += f"{timing['p50_ms']:>15.2f} / {timing['p95_ms']:<6.2f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
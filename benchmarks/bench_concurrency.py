@@ -0,0 +1,71 @@
+"""Concurrent-request throughput of the API, blocking vs executor-backed DynamoDB calls.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_concurrency --requests 400 --concurrency 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+
+import httpx
+
+from benchmarks.local_dynamodb import local_dynamodb
+
+
+async def _blocking_call(self, operation: str, **kwargs) -> dict:
+    # The pre-executor behaviour: boto3 runs directly on the event loop
+    return getattr(self.table, operation)(**kwargs)
+
+
+async def drive(app, item_ids, total_requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"/menu/{item_ids[i % len(item_ids)]}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total_requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='simulated DynamoDB round-trip time')
+    args = parser.parse_args()
+
+    with local_dynamodb(latency_ms=args.latency_ms):
+        from api.app import app
+        from api.controllers import menu_controller
+        from api.repositories.base_repository import DynamoDBRepository
+
+        repository = menu_controller.menu_repository
+        item_ids = []
+        for i in range(20):
+            item = asyncio.run(repository.create_item({
+                'name': f'Item {i}', 'price': Decimal('9.99'),
+                'description': None, 'category': 'Bench'
+            }))
+            item_ids.append(item['item_id'])
+
+        results = {}
+        for label, call in [('blocking', _blocking_call), ('executor', DynamoDBRepository._call)]:
+            repository._call = call.__get__(repository)
+            elapsed = asyncio.run(drive(app, item_ids, args.requests, args.concurrency))
+            results[label] = args.requests / elapsed
+            print(f"{label:>9}: {args.requests} requests in {elapsed:.2f}s "
+                  f"-> {results[label]:.1f} req/s")
+
+        print(f"  speedup: {results['executor'] / results['blocking']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""Load test: mixed read/write workload with per-endpoint throughput and latency.
+
+Preloads a data set of the requested size, then keeps ``--concurrency``
+clients busy with a weighted mix of requests for ``--duration`` seconds. It
+reports requests per second and p50/p95/p99 latency for each endpoint and
+writes them as JSON, so that runs can be compared with ``--compare``.
+
+The app runs in-process by default, against moto or against DynamoDB Local
+when DYNAMODB_ENDPOINT_URL is set. With ``--target uvicorn`` it runs as a
+real server, which needs a store that both processes can reach: DynamoDB
+Local, or ``--backend sqlite``. Run from the repository root:
+
+    python -m benchmarks.bench_load --orders 1k --concurrency 32 --duration 30 --output load.json
+    python -m benchmarks.bench_load --orders 100k --backend sqlite --target uvicorn --compare load.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_DOWN
+
+import httpx
+
+# Relative weights of each request type in the workload
+DEFAULT_MIX = {
+    'get_order': 30,
+    'list_orders': 5,
+    'orders_in_range': 10,
+    'order_by_number': 10,
+    'get_menu_item': 15,
+    'list_menu': 5,
+    'dashboard': 5,
+    'create_order': 15,
+    'patch_order': 5,
+}
+
+ENDPOINTS = {
+    'get_order': 'GET /orders/{order_id}',
+    'list_orders': 'GET /orders/?limit=100',
+    'orders_in_range': 'GET /orders/?since=&limit=100',
+    'order_by_number': 'GET /orders/by-number/{order_number}',
+    'get_menu_item': 'GET /menu/{item_id}',
+    'list_menu': 'GET /menu/',
+    'dashboard': 'GET /stats/dashboard',
+    'create_order': 'POST /orders/',
+    'patch_order': 'PATCH /orders/{order_id}',
+}
+
+MENU_ITEMS = 50
+PRELOAD_BATCH = 500
+# Ids kept from the preload for the read requests to pick from
+SAMPLE_SIZE = 10_000
+
+
+def parse_size(value: str) -> int:
+    """'1000', '1k', '100k' or '1m'"""
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1].lower(), 1)
+    return int(float(value.rstrip('kKmM')) * multiplier)
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown request type {name!r}, expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))]
+
+
+async def preload(orders: int, seed: int) -> dict:
+    """Write the menu and ``orders`` orders straight through the repositories"""
+    from api.repositories.backends import get_menu_repository, get_order_repository, get_stats_repository
+
+    rng = random.Random(seed)
+    menu, order_repository, stats = get_menu_repository(), get_order_repository(), get_stats_repository()
+    items = [await menu.create_item({
+        'name': f'Item {i}', 'price': Decimal(rng.randrange(300, 3000)) / 100,
+        'description': 'Load test item', 'category': rng.choice(['Pizza', 'Pasta', 'Salad', 'Drinks'])
+    }) for i in range(MENU_ITEMS)]
+    await stats.record_menu_count_change(MENU_ITEMS)
+
+    now = time.time()
+    order_ids, order_numbers, preloaded = [], [], 0
+    for start in range(0, orders, PRELOAD_BATCH):
+        batch = []
+        for _ in range(min(PRELOAD_BATCH, orders - start)):
+            lines = [{'item_id': item['item_id'], 'quantity': rng.randint(1, 3), 'unit_price': item['price']}
+                     for item in rng.sample(items, rng.randint(1, 4))]
+            subtotal = sum(line['unit_price'] * line['quantity'] for line in lines).quantize(Decimal('0.01'))
+            discount = rng.choice([Decimal('0'), Decimal('0'), Decimal('0.1')])
+            batch.append({
+                'order_number': f'{rng.randrange(16 ** 6):06x}',
+                'items': lines,
+                'subtotal': subtotal,
+                'discount_pct': discount,
+                'total': (subtotal - subtotal * discount).quantize(Decimal('0.01'), rounding=ROUND_DOWN),
+                # Spread over the last 90 days
+                'order_date': str(now - rng.random() * 90 * 86400),
+            })
+        errors = await order_repository.create_orders(batch)
+        written = [order for index, order in enumerate(batch) if index not in errors]
+        await stats.record_order_changes([(None, order) for order in written])
+        for order in written:
+            # Reservoir sample, so that reads spread over the whole data set
+            preloaded += 1
+            if len(order_ids) < SAMPLE_SIZE:
+                order_ids.append(order['order_id'])
+                order_numbers.append(order['order_number'])
+            elif (slot := rng.randrange(preloaded)) < SAMPLE_SIZE:
+                order_ids[slot], order_numbers[slot] = order['order_id'], order['order_number']
+        if start and start % 100_000 == 0:
+            print(f"  preloaded {start} orders", file=sys.stderr)
+
+    return {'item_ids': [item['item_id'] for item in items], 'order_ids': order_ids, 'order_numbers': order_numbers}
+
+
+def request(client: httpx.AsyncClient, name: str, rng: random.Random, data: dict):
+    if name == 'get_order':
+        return client.get(f"/orders/{rng.choice(data['order_ids'])}")
+    if name == 'list_orders':
+        return client.get("/orders/", params={'limit': 100})
+    if name == 'orders_in_range':
+        until = time.time() - rng.random() * 80 * 86400
+        return client.get("/orders/", params={'since': until - 86400, 'until': until, 'limit': 100})
+    if name == 'order_by_number':
+        return client.get(f"/orders/by-number/{rng.choice(data['order_numbers'])}")
+    if name == 'get_menu_item':
+        return client.get(f"/menu/{rng.choice(data['item_ids'])}")
+    if name == 'list_menu':
+        return client.get("/menu/")
+    if name == 'dashboard':
+        return client.get("/stats/dashboard")
+    if name == 'create_order':
+        return client.post("/orders/", json={
+            'order_number': f'{rng.randrange(16 ** 6):06x}',
+            'items': [{'item_id': item_id, 'quantity': rng.randint(1, 3)}
+                      for item_id in rng.sample(data['item_ids'], rng.randint(1, 4))],
+            'discount_pct': 0
+        })
+    return client.patch(f"/orders/{rng.choice(data['order_ids'])}", json={'discount_pct': rng.choice([0, 0.1, 0.2])})
+
+
+async def run_workload(client: httpx.AsyncClient, data: dict, mix: dict, concurrency: int,
+                       duration: float, warmup: float, seed: int) -> dict:
+    """Closed-loop clients, each sending its next request as soon as the last one returns"""
+    names, weights = list(mix), list(mix.values())
+    samples = {name: [] for name in names}
+    statuses = {name: {} for name in names}
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        while loop.time() < stop_at:
+            name = rng.choices(names, weights)[0]
+            start = loop.time()
+            try:
+                status = (await request(client, name, rng, data)).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if start >= measure_from:
+                samples[name].append((loop.time() - start) * 1000)
+                statuses[name][status] = statuses[name].get(status, 0) + 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    endpoints = {}
+    for name in names:
+        latencies = sorted(samples[name])
+        errors = sum(count for status, count in statuses[name].items()
+                     if not isinstance(status, int) or status >= 400)
+        endpoints[ENDPOINTS[name]] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'statuses': {str(status): count for status, count in statuses[name].items()},
+            'throughput_rps': len(latencies) / duration,
+            'mean_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+        }
+    everything = sorted(latency for latencies in samples.values() for latency in latencies)
+    total = {
+        'requests': len(everything),
+        'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+        'throughput_rps': len(everything) / duration,
+        'p50_ms': percentile(everything, 0.50),
+        'p95_ms': percentile(everything, 0.95),
+        'p99_ms': percentile(everything, 0.99),
+    }
+    return {'total': total, 'endpoints': endpoints}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(workers: int):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api.app:app', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        env=os.environ.copy()
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/").raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@contextlib.contextmanager
+def store(backend: str, latency_ms: float):
+    """Point the repositories at a fresh local store, yields a setter for simulated latency"""
+    os.environ['STORAGE_BACKEND'] = backend
+    if backend == 'sqlite':
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ['SQLITE_PATH'] = os.path.join(directory, 'bench_load.db')
+            yield lambda ms: None
+        return
+
+    from benchmarks.local_dynamodb import local_dynamodb
+    with local_dynamodb(latency_ms) as latency:
+        yield lambda ms: setattr(latency, 'latency_ms', ms)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+async def drive(args, data: dict, base_url: str = None) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+    else:
+        from api.app import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", timeout=60)
+    async with client:
+        return await run_workload(client, data, args.mix, args.concurrency, args.duration, args.warmup, args.seed)
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'endpoint':<38}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+    print(header + ('   vs baseline (req/s, p95)' if baseline else ''))
+    rows = list(results['endpoints'].items()) + [('total', results['total'])]
+    for endpoint, stats in rows:
+        line = (f"{endpoint:<38}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.2f}"
+                f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['errors']:>8}")
+        before = None
+        if baseline:
+            before = baseline['total'] if endpoint == 'total' else baseline['endpoints'].get(endpoint)
+        if before and before['throughput_rps'] and before['p95_ms']:
+            line += (f"   {(stats['throughput_rps'] / before['throughput_rps'] - 1) * 100:+6.1f}%"
+                     f" {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:+6.1f}%")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=parse_size, default=parse_size('1k'),
+                        help='orders to preload, e.g. 1k, 100k, 1m')
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before measuring')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='request weights, e.g. get_order=50,create_order=10 (types: %s)' % ', '.join(ENDPOINTS))
+    parser.add_argument('--backend', choices=['dynamodb', 'sqlite'], default='dynamodb')
+    parser.add_argument('--target', choices=['inprocess', 'uvicorn'], default='inprocess')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='simulated DynamoDB round-trip time (in-process moto only)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    if args.target == 'uvicorn' and args.backend == 'dynamodb' and not os.getenv('DYNAMODB_ENDPOINT_URL'):
+        parser.error("--target uvicorn needs DynamoDB Local (DYNAMODB_ENDPOINT_URL) or --backend sqlite")
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    with store(args.backend, args.latency_ms) as set_latency:
+        print(f"Preloading {args.orders} orders...", file=sys.stderr)
+        set_latency(0)
+        started = time.monotonic()
+        data = asyncio.run(preload(args.orders, args.seed))
+        preload_seconds = time.monotonic() - started
+        set_latency(args.latency_ms)
+
+        print(f"Running for {args.warmup + args.duration:.0f}s at concurrency {args.concurrency}...", file=sys.stderr)
+        if args.target == 'uvicorn':
+            with uvicorn_server(args.workers) as base_url:
+                results = asyncio.run(drive(args, data, base_url))
+        else:
+            results = asyncio.run(drive(args, data))
+
+    results = {
+        'config': {
+            'orders': args.orders, 'concurrency': args.concurrency, 'duration_s': args.duration,
+            'warmup_s': args.warmup, 'mix': args.mix, 'backend': args.backend, 'target': args.target,
+            'workers': args.workers, 'latency_ms': args.latency_ms, 'seed': args.seed,
+        },
+        'environment': {'git_commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform()},
+        'started_at': started_at,
+        'preload_s': preload_seconds,
+        **results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Order pricing and dashboard aggregation, Decimal arithmetic vs. integer cents.
+
+Every path must produce the same subtotals, totals and revenue. Run from the
+repository root:
+
+    python -m benchmarks.bench_money --orders 100000 --lines 3 --repeat 5
+"""
+import argparse
+import random
+import time
+from decimal import ROUND_DOWN, Decimal
+
+from api import money
+from api.repositories.stats_repository import order_contribution
+
+
+def decimal_price(order: dict) -> dict:
+    """The Decimal calculate_price that integer cents replaced"""
+    subtotal = Decimal('0.0')
+    for line in order['items']:
+        subtotal += Decimal(str(line['unit_price'])) * Decimal(str(line['quantity']))
+    order['subtotal'] = subtotal.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    total = order['subtotal'] - order['subtotal'] * order['discount_pct']
+    order['total'] = total.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    return order
+
+
+def decimal_contribution(order: dict):
+    """The Decimal order_contribution that integer cents replaced"""
+    items = {}
+    for line in order['items']:
+        quantity = Decimal(str(line['quantity']))
+        entry = items.setdefault(line['item_id'], [Decimal('0'), Decimal('0')])
+        entry[0] += quantity
+        entry[1] += Decimal(str(line['unit_price'])) * quantity
+    return Decimal(str(order['total'])), items
+
+
+def aggregate(orders: list, contribution) -> tuple:
+    """Revenue and per-item revenue over many orders, as the stats rebuild sums them"""
+    revenue, items = 0, {}
+    for order in orders:
+        order_revenue, order_items = contribution(order)
+        revenue += order_revenue
+        for item_id, (_, item_revenue) in order_items.items():
+            items[item_id] = items.get(item_id, 0) + item_revenue
+    return revenue, items
+
+
+def cents_price(order: dict) -> dict:
+    subtotal, total = money.price_order(order['items'], order['discount_pct'])
+    return {**order, 'subtotal': money.from_cents(subtotal), 'total': money.from_cents(total)}
+
+
+def make_orders(count: int, lines: int, rng: random.Random):
+    prices = {f'item-{i}': Decimal(rng.randint(199, 4999)).scaleb(-2) for i in range(200)}
+    orders = [{
+        'items': [{'item_id': item_id, 'quantity': rng.randint(1, 5), 'unit_price': prices[item_id]}
+                  for item_id in rng.sample(sorted(prices), lines)],
+        'discount_pct': Decimal(rng.choice([0, 5, 10, 15, 25])).scaleb(-2),
+    } for _ in range(count)]
+    return prices, orders
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--lines', type=int, default=3, help='lines per order')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per path, the fastest is reported')
+    parser.add_argument('--seed', type=int, default=17)
+    args = parser.parse_args()
+
+    prices, orders = make_orders(args.orders, args.lines, random.Random(args.seed))
+
+    def priced_decimal():
+        return [decimal_price(dict(order)) for order in orders]
+
+    def priced_cents():
+        return [cents_price(order) for order in orders]
+
+    def priced_batch():
+        unit_cents = {item_id: money.to_cents(price) for item_id, price in prices.items()}
+        return [{**order, 'subtotal': money.from_cents(subtotal), 'total': money.from_cents(total)}
+                for order, (subtotal, total) in zip(orders, money.price_orders(orders, unit_cents))]
+
+    reference = [(order['subtotal'], order['total']) for order in priced_decimal()]
+    for name, fn in (('price_order', priced_cents), ('price_orders', priced_batch)):
+        if [(order['subtotal'], order['total']) for order in fn()] != reference:
+            raise SystemExit(f"{name} totals differ from the Decimal path")
+    priced = priced_decimal()
+    revenue, items = aggregate(priced, decimal_contribution)
+    revenue_cents, items_cents = aggregate(priced, order_contribution)
+    if money.from_cents(revenue_cents) != revenue or {
+        item_id: money.from_cents(cents) for item_id, cents in items_cents.items()
+    } != items:
+        raise SystemExit("Aggregates in cents differ from the Decimal sums")
+
+    results = [
+        ('pricing, Decimal', best_of(args.repeat, priced_decimal)),
+        ('pricing, cents per order', best_of(args.repeat, priced_cents)),
+        ('pricing, cents batch', best_of(args.repeat, priced_batch)),
+        ('aggregation, Decimal', best_of(args.repeat, lambda: aggregate(priced, decimal_contribution))),
+        ('aggregation, cents', best_of(args.repeat, lambda: aggregate(priced, order_contribution))),
+    ]
+    print(f"{args.orders} orders, {args.lines} lines each, identical totals and aggregates")
+    for name, seconds in results:
+        print(f"{name:<28}{seconds * 1000:>10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
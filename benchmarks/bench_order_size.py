@@ -0,0 +1,80 @@
+"""Stored bytes per order, embedded menu items vs. compact reference lines.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_order_size --lines 1 3 10 --description-length 120
+"""
+import argparse
+import json
+import math
+import uuid
+from decimal import Decimal
+
+from api.repositories.order_repository import compact_order
+
+
+def dynamodb_size(value) -> int:
+    """Approximate DynamoDB storage size of an attribute value, per the documented rules"""
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, Decimal)):
+        digits = len(str(abs(value)).replace('.', '').lstrip('0')) or 1
+        return math.ceil(digits / 2) + 1
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode()) + dynamodb_size(v) + 1 for k, v in value.items())
+    if isinstance(value, list):
+        return 3 + sum(dynamodb_size(v) + 1 for v in value)
+    raise TypeError(f"Unsupported type {type(value)}")
+
+
+def item_size(item: dict) -> int:
+    return sum(len(name.encode()) + dynamodb_size(value) for name, value in item.items())
+
+
+def legacy_order(lines: int, description_length: int) -> dict:
+    return {
+        'order_id': str(uuid.uuid4()),
+        'order_number': '3f2a9c',
+        'items': [
+            {
+                'item': {
+                    'item_id': str(uuid.uuid4()),
+                    'name': f'Menu item number {i}',
+                    'price': Decimal('12.99'),
+                    'description': 'x' * description_length,
+                    'category': 'Pizza',
+                },
+                'quantity': Decimal(2),
+            }
+            for i in range(lines)
+        ],
+        'subtotal': Decimal('25.98') * lines,
+        'discount_pct': Decimal('0.10'),
+        'total': Decimal('23.38') * lines,
+        'order_date': '1732800000.123456',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 3, 10])
+    parser.add_argument('--description-length', type=int, default=120)
+    args = parser.parse_args()
+
+    print(f"{'lines':>5} {'legacy B':>9} {'compact B':>9} {'saved':>6} {'legacy WCU':>10} "
+          f"{'compact WCU':>11} {'legacy JSON':>11} {'compact JSON':>12}")
+    for lines in args.lines:
+        legacy = legacy_order(lines, args.description_length)
+        compact = compact_order(legacy)
+        legacy_bytes, compact_bytes = item_size(legacy), item_size(compact)
+        legacy_json = len(json.dumps(legacy, default=str))
+        compact_json = len(json.dumps(compact, default=str))
+        print(f"{lines:>5} {legacy_bytes:>9} {compact_bytes:>9} {1 - compact_bytes / legacy_bytes:>6.0%} "
+              f"{math.ceil(legacy_bytes / 1024):>10} {math.ceil(compact_bytes / 1024):>11} "
+              f"{legacy_json:>11} {compact_json:>12}")
+
+
+if __name__ == '__main__':
+    main()
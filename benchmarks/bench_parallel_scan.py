@@ -0,0 +1,79 @@
+"""Full-table read of orders, serial scan chain vs. parallel segmented scan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parallel_scan --orders 3000 --page-size 100 --latency-ms 50
+
+moto evaluates every scan in-process under the GIL, which understates the
+gain; point DYNAMODB_ENDPOINT_URL at DynamoDB Local for realistic numbers.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+
+from benchmarks.local_dynamodb import local_dynamodb
+
+
+def seed_orders(table, count: int):
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                'order_id': str(uuid.uuid4()),
+                'order_number': f'{i:06d}',
+                'items': [],
+                'subtotal': Decimal('10.00'),
+                'discount_pct': Decimal('0.00'),
+                'total': Decimal('10.00'),
+                'order_date': str(time.time()),
+            })
+
+
+async def read_serial(repository, page_size: int) -> int:
+    count = 0
+    async for page in repository.iter_pages(page_size):
+        count += len(page)
+    return count
+
+
+async def read_parallel(repository, page_size: int, segments: int) -> int:
+    count = 0
+    async for page in repository.parallel_scan(segments, page_size=page_size):
+        count += len(page)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=3000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=50.0,
+                        help='simulated DynamoDB round-trip time')
+    parser.add_argument('--segments', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    with local_dynamodb() as latency:
+        from api.repositories.order_repository import OrderRepository
+
+        repository = OrderRepository()
+        seed_orders(repository.table, args.orders)
+        latency.latency_ms = args.latency_ms
+
+        runs = [('serial', lambda: read_serial(repository, args.page_size))]
+        for segments in args.segments:
+            runs.append((f'{segments} segments',
+                         lambda segments=segments: read_parallel(repository, args.page_size, segments)))
+
+        baseline = None
+        for label, run in runs:
+            start = time.perf_counter()
+            count = asyncio.run(run())
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{label:>12}: {count} orders in {elapsed:.2f}s "
+                  f"-> {count / elapsed:.0f} items/s ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
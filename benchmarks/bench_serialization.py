@@ -0,0 +1,86 @@
+"""Rendering an order listing, response model validation vs. the direct orjson path.
+
+Both paths start from the Decimal-valued dicts DynamoDB returns and must
+produce identical bytes. Run from the repository root:
+
+    python -m benchmarks.bench_serialization --orders 10000 --lines 3 --repeat 5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.controllers.serialization import json_response
+from api.repositories.order_repository import compact_order
+from api.schemas.order_schemas import OrderResponse
+
+
+def stored_order(index: int, lines: int) -> dict:
+    """An order as get_page returns it, every number a Decimal"""
+    return {
+        'order_id': str(uuid.uuid4()),
+        'order_number': f'{index:06d}',
+        'items': [
+            {'item_id': str(uuid.uuid4()), 'quantity': Decimal(line % 3 + 1), 'unit_price': Decimal('12.99')}
+            for line in range(lines)
+        ],
+        'subtotal': Decimal('38.97'),
+        'discount_pct': Decimal('0.10'),
+        'total': Decimal('35.07'),
+        'order_date': '1732800000.123456',
+        'order_day': '2024-11-28',
+        'order_ts': Decimal('1732800000.123456'),
+        'version': Decimal(1),
+    }
+
+
+def render_with_model(orders: List[dict]) -> bytes:
+    """What FastAPI does with response_model=List[OrderResponse], response_model_exclude_unset=True"""
+    field = create_response_field(name='response', type_=List[OrderResponse])
+    content = asyncio.run(serialize_response(
+        field=field, response_content=[compact_order(order) for order in orders], exclude_unset=True
+    ))
+    return JSONResponse(content).body
+
+
+def render_direct(orders: List[dict]) -> bytes:
+    return json_response(OrderResponse, [compact_order(order) for order in orders], exclude_unset=True).body
+
+
+def best_of(repeat: int, render, orders: List[dict]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(orders)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--lines', type=int, default=3, help='lines per order')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per path, the fastest is reported')
+    args = parser.parse_args()
+
+    orders = [stored_order(i, args.lines) for i in range(args.orders)]
+    body = render_with_model(orders)
+    if render_direct(orders) != body:
+        raise SystemExit("Direct rendering differs from the response model output")
+
+    model_seconds = best_of(args.repeat, render_with_model, orders)
+    direct_seconds = best_of(args.repeat, render_direct, orders)
+    print(f"{args.orders} orders, {args.lines} lines each, {len(body)} bytes, identical output")
+    print(f"{'response model':<16}{model_seconds * 1000:>10.1f} ms")
+    print(f"{'direct (orjson)':<16}{direct_seconds * 1000:>10.1f} ms")
+    print(f"speedup: {model_seconds / direct_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
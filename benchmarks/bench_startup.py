@@ -0,0 +1,111 @@
+"""Cold start and steady-state throughput of the production server, with and without storage warm-up.
+
+For each worker count, with warm-up on and off (STARTUP_WARM_CONNECTIONS),
+this starts ``python -m api.server`` and measures:
+- the time until the server answers;
+- the latency of the first request of each kind;
+- throughput and latency under the bench_load request mix.
+
+The server processes need a store they can reach: ``--backend sqlite``, or
+DynamoDB Local via DYNAMODB_ENDPOINT_URL. Run from the repository root:
+
+    python -m benchmarks.bench_startup --backend sqlite --workers 1,4 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_load import DEFAULT_MIX, free_port, preload, request, run_workload, store
+
+FIRST_REQUESTS = ['get_menu_item', 'get_order', 'create_order']
+
+
+@contextlib.contextmanager
+def server(workers: int, warm_connections: int):
+    """Start the production server, yields (base_url, seconds until it answered)"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'api.server', '--port', str(port), '--workers', str(workers),
+         '--log-level', 'warning'],
+        env={**os.environ, 'STARTUP_WARM_CONNECTIONS': str(warm_connections)},
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                httpx.get(base_url + "/").raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.01)
+        yield base_url, time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def first_requests(base_url: str, data: dict) -> dict:
+    """Latency in ms of the first request of each kind on a fresh server"""
+    rng = random.Random(1)
+    latencies = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for name in FIRST_REQUESTS:
+            start = time.perf_counter()
+            (await request(client, name, rng, data)).raise_for_status()
+            latencies[name] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+async def steady_state(base_url: str, data: dict, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        return await run_workload(client, data, DEFAULT_MIX, args.concurrency, args.duration, args.warmup, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['dynamodb', 'sqlite'], default='sqlite')
+    parser.add_argument('--workers', default=f"1,{os.cpu_count() or 1}",
+                        help='comma-separated worker counts to compare')
+    parser.add_argument('--warm-connections', type=int, default=8,
+                        help='STARTUP_WARM_CONNECTIONS for the warm runs')
+    parser.add_argument('--orders', type=int, default=2000, help='orders to preload')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds of load')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds of load first')
+    args = parser.parse_args()
+
+    if args.backend == 'dynamodb' and not os.getenv('DYNAMODB_ENDPOINT_URL'):
+        parser.error("the dynamodb backend needs DynamoDB Local (DYNAMODB_ENDPOINT_URL)")
+
+    worker_counts = sorted({int(count) for count in args.workers.split(',')})
+    with store(args.backend, 0):
+        data = asyncio.run(preload(args.orders, 1))
+        header = f"{'workers':>7} {'warm-up':>8} {'ready s':>8}" + ''.join(
+            f"{'1st ' + name + ' ms':>22}" for name in FIRST_REQUESTS
+        ) + f"{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"
+        print(header)
+        for workers in worker_counts:
+            for warm_connections in (0, args.warm_connections):
+                with server(workers, warm_connections) as (base_url, ready):
+                    first = asyncio.run(first_requests(base_url, data))
+                    total = asyncio.run(steady_state(base_url, data, args))['total']
+                print(f"{workers:>7} {'on' if warm_connections else 'off':>8} {ready:>8.2f}"
+                      + ''.join(f"{first[name]:>22.1f}" for name in FIRST_REQUESTS)
+                      + f"{total['throughput_rps']:>9.1f}{total['p50_ms']:>9.2f}{total['p99_ms']:>9.2f}"
+                      f"{total['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
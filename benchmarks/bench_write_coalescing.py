@@ -0,0 +1,73 @@
+"""Order creation throughput and latency with one put_item per order vs. coalesced batch writes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_write_coalescing --orders 2000 --concurrency 200 --latency-ms 20 --window-ms 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks.local_dynamodb import local_dynamodb
+
+
+def make_order(i: int) -> dict:
+    return {
+        'order_number': f'{i:06d}',
+        'items': [{'item_id': 'bench-item', 'quantity': 2, 'unit_price': Decimal('9.99')}],
+        'subtotal': Decimal('19.98'), 'discount_pct': Decimal('0'), 'total': Decimal('19.98'),
+        'order_date': str(time.time()),
+    }
+
+
+async def drive(repository, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await repository.create_order(make_order(i))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='simulated DynamoDB round-trip time')
+    parser.add_argument('--window-ms', type=float, default=5.0,
+                        help='coalescing window')
+    args = parser.parse_args()
+
+    with local_dynamodb(latency_ms=args.latency_ms):
+        from api.repositories.base_repository import WriteCoalescer
+        from api.repositories.order_repository import OrderRepository
+
+        repository = OrderRepository()
+        coalescer = WriteCoalescer(repository.batch_put, args.window_ms / 1000, label=repository.table_name)
+        results = {}
+        for label, stage in [('put_item', None), ('coalesced', coalescer)]:
+            repository.coalescer = stage
+            elapsed, latencies = asyncio.run(drive(repository, args.orders, args.concurrency))
+            results[label] = args.orders / elapsed
+            print(f"{label:>10}: {args.orders} orders in {elapsed:.2f}s -> {results[label]:.1f} orders/s, "
+                  f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                  f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+        print(f"   speedup: {results['coalesced'] / results['put_item']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import contextlib
+import os
+import time
+
+import boto3
+
+from scripts.basic_setup import BasicAWSSetup
+
+
+class SimulatedLatency:
+    """botocore hook that sleeps before every DynamoDB call, adjustable mid-run"""
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+
+    def __call__(self, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+
+@contextlib.contextmanager
+def local_dynamodb(latency_ms: float = 0.0):
+    """Local DynamoDB stand-in for benchmarks.
+
+    Uses DynamoDB Local when DYNAMODB_ENDPOINT_URL is set, otherwise moto's
+    in-process mock. ``latency_ms`` is added to every call to emulate the
+    network round trip to the real service; set ``.latency_ms`` on the
+    yielded object to change it, e.g. to 0 while seeding data.
+    """
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+    if os.getenv('DYNAMODB_ENDPOINT_URL'):
+        mock = contextlib.nullcontext()
+    else:
+        from moto import mock_aws
+        mock = mock_aws()
+
+    with mock:
+        session = boto3._get_default_session()
+        latency = SimulatedLatency(latency_ms)
+        session.events.register('before-call.dynamodb', latency)
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            BasicAWSSetup().create_dynamodb_tables()
+        try:
+            yield latency
+        finally:
+            session.events.unregister('before-call.dynamodb', latency)
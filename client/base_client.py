@@ -0,0 +1,157 @@
+import asyncio
+import email.utils
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.2
+DEFAULT_POOL_SIZE = 10
+# Server errors and throttling are worth another try, anything else will fail the same way again
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# POST and PATCH are not retried after the request was sent, they might have been applied already
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class BaseClient:
+    """Settings and headers shared by the sync and async clients"""
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
+        self.headers = {
+            "Content-Type": "application/json",
+            **({"X-API-Key": api_key} if api_key else {})
+        }
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+
+    def _if_match(self, version: Optional[int]) -> Dict:
+        # Make the write conditional on the version last read
+        if version is None:
+            return self.headers
+        return {**self.headers, 'If-Match': f'"{version}"'}
+
+
+class SyncClient(BaseClient):
+    """Blocking client on one pooled keep-alive session, retrying with backoff"""
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, session: Optional[requests.Session] = None,
+                 **options):
+        super().__init__(base_url, api_key, **options)
+        self.session = session or self._make_session()
+
+    def _make_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            # Hand the last error response back so that raise_for_status reports it
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _request(self, method: str, path: str, headers: Optional[Dict] = None, **kwargs) -> requests.Response:
+        response = self.session.request(
+            method, f"{self.base_url}{path}", headers=headers or self.headers, timeout=self.timeout, **kwargs
+        )
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncClient(BaseClient):
+    """Non-blocking client on one pooled httpx connection pool, retrying with backoff.
+
+    At most ``pool_size`` requests are in flight at once; the fan-out helpers
+    queue the rest.
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, client: Optional[httpx.AsyncClient] = None,
+                 **options):
+        super().__init__(base_url, api_key, **options)
+        self.client = client or httpx.AsyncClient(
+            timeout=self.timeout,
+            # Connection failures happen before anything is sent, so every method may retry them
+            transport=httpx.AsyncHTTPTransport(
+                retries=self.retries,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            ),
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so that clients throttled together do not come back together
+        return random.uniform(0, self.backoff_factor * 2 ** attempt)
+
+    async def _request(self, method: str, path: str, headers: Optional[Dict] = None,
+                       **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            response = await self.client.request(method, f"{self.base_url}{path}", headers=headers or self.headers,
+                                                 **kwargs)
+            if (response.status_code not in RETRY_STATUSES or method not in RETRY_METHODS
+                    or attempt == self.retries):
+                break
+            delay = _retry_after(response)
+            await asyncio.sleep(self._backoff(attempt) if delay is None else delay)
+        response.raise_for_status()
+        return response
+
+    async def gather_limited(self, fn: Callable[[T], Awaitable[R]], args: Iterable[T],
+                             concurrency: Optional[int] = None) -> List[R]:
+        """Run ``fn`` over ``args`` with at most ``concurrency`` calls in flight, results in input order"""
+        semaphore = asyncio.Semaphore(concurrency or self.pool_size)
+
+        async def call(arg: T) -> R:
+            async with semaphore:
+                return await fn(arg)
+
+        return await asyncio.gather(*(call(arg) for arg in args))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
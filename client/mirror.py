@@ -0,0 +1,110 @@
+"""Local copies of the orders or the menu, kept current through the delta-sync endpoints"""
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+CHANGES_PAGE_SIZE = 500
+
+
+def changes_params(since: Optional[int], limit: int) -> Dict:
+    """Query for a changes endpoint, without ``since`` it returns only the current position"""
+    return {"limit": limit, **({"since": since} if since is not None else {})}
+
+
+def _gone(error: Exception) -> bool:
+    # requests.HTTPError and httpx.HTTPStatusError both carry the response
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code == 410
+
+
+class _BaseMirror:
+    def __init__(self, key_name: str, field: str):
+        self.key_name = key_name
+        self.field = field
+        self.items: Dict[str, Dict] = {}
+        # Position in the server's change log, None until the first full load
+        self.since: Optional[int] = None
+
+    def _apply(self, page: Dict) -> int:
+        for change in page["changes"]:
+            if change["deleted"]:
+                self.items.pop(change[self.key_name], None)
+            else:
+                self.items[change[self.key_name]] = change[self.field]
+        self.since = page["next_since"]
+        return len(page["changes"])
+
+
+class Mirror(_BaseMirror):
+    """Dict of every order or menu item by id in ``items``, brought up to date by sync().
+
+    The first sync reads everything. Later ones fetch only what changed since
+    the previous sync, deletes included. If the server has trimmed its change
+    log past our position, sync() reads everything again.
+    """
+
+    def __init__(self, get_changes: Callable[..., Dict], iter_all: Callable[[], Iterator[Dict]],
+                 key_name: str, field: str):
+        super().__init__(key_name, field)
+        self.get_changes = get_changes
+        self.iter_all = iter_all
+
+    def sync(self) -> int:
+        """Bring ``items`` up to date, returns the number of changes applied (every item on a full load)"""
+        if self.since is None:
+            return self.reload()
+        try:
+            return self._catch_up()
+        except Exception as e:
+            if not _gone(e):
+                raise
+            return self.reload()
+
+    def reload(self) -> int:
+        """Read everything, then catch up with what changed while reading"""
+        since = self.get_changes(None)["next_since"]
+        self.items = {item[self.key_name]: item for item in self.iter_all()}
+        self.since = since
+        return len(self.items) + self._catch_up()
+
+    def _catch_up(self) -> int:
+        applied = 0
+        while True:
+            page = self.get_changes(self.since, CHANGES_PAGE_SIZE)
+            applied += self._apply(page)
+            if not page["has_more"]:
+                return applied
+
+
+class AsyncMirror(_BaseMirror):
+    """Async twin of Mirror"""
+
+    def __init__(self, get_changes: Callable[..., Awaitable[Dict]], iter_all: Callable[[], AsyncIterator[Dict]],
+                 key_name: str, field: str):
+        super().__init__(key_name, field)
+        self.get_changes = get_changes
+        self.iter_all = iter_all
+
+    async def sync(self) -> int:
+        """Bring ``items`` up to date, returns the number of changes applied (every item on a full load)"""
+        if self.since is None:
+            return await self.reload()
+        try:
+            return await self._catch_up()
+        except Exception as e:
+            if not _gone(e):
+                raise
+            return await self.reload()
+
+    async def reload(self) -> int:
+        """Read everything, then catch up with what changed while reading"""
+        since = (await self.get_changes(None))["next_since"]
+        self.items = {item[self.key_name]: item async for item in self.iter_all()}
+        self.since = since
+        return len(self.items) + await self._catch_up()
+
+    async def _catch_up(self) -> int:
+        applied = 0
+        while True:
+            page = await self.get_changes(self.since, CHANGES_PAGE_SIZE)
+            applied += self._apply(page)
+            if not page["has_more"]:
+                return applied
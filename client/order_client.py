@@ -1,60 +1,176 @@
-import requests
-from typing import Dict, List, Optional
+import json
 
-class OrderClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
-        self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
-        self.headers = {
-            "Content-Type": "application/json",
-            **({"X-API-Key": api_key} if api_key else {})
-        }
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from client.base_client import AsyncClient, SyncClient
+from client.mirror import CHANGES_PAGE_SIZE, AsyncMirror, Mirror, changes_params
+
+
+def _window(since: Optional[float], until: Optional[float], fields: Optional[List[str]] = None) -> Dict:
+    params = {k: v for k, v in (("since", since), ("until", until)) if v is not None}
+    if fields:
+        params["fields"] = ",".join(fields)
+    return params
+
+
+class OrderClient(SyncClient):
+    """Order API client; takes timeout, retries, backoff_factor and pool_size keyword options"""
+
+    def iter_orders(self, page_size: int = 100, since: Optional[float] = None,
+                    until: Optional[float] = None, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Lazily walk all orders, or those placed between since and until (newest first).
+
+        ``fields`` limits each order to the named attributes, e.g. ["order_id", "total"].
+        """
+        window = _window(since, until, fields)
+        params = {"limit": page_size, **window}
+        while True:
+            response = self._request("GET", "/orders/", params=params)
+            yield from response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+            params = {"limit": page_size, "cursor": cursor, **window}
 
     def get_all_orders(self) -> List[Dict]:
         """Get all orders"""
-        response = requests.get(f"{self.base_url}/orders/", headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return list(self.iter_orders())
+
+    def export_orders(self) -> Iterator[Dict]:
+        """Stream the full order history, yielding orders as they arrive (unordered)"""
+        with self._request("GET", "/orders/export", stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def iter_archived_orders(self, since: float, until: float, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Stream archived orders placed between since and until, oldest month first"""
+        params = _window(since, until, fields)
+        with self._request("GET", "/orders/archive", params=params, stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
 
     def get_order(self, order_id: str) -> Dict:
         """Get a specific order"""
-        response = requests.get(f"{self.base_url}/orders/{order_id}", headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return self._request("GET", f"/orders/{order_id}").json()
+
+    def get_orders_by_number(self, order_number: str) -> List[Dict]:
+        """Get the orders with a receipt order number, newest first"""
+        return self._request("GET", f"/orders/by-number/{order_number}").json()
+
+    def get_order_changes(self, since: Optional[int] = None, limit: int = CHANGES_PAGE_SIZE) -> Dict:
+        """Orders changed after position ``since``; without it, only the current position"""
+        return self._request("GET", "/orders/changes", params=changes_params(since, limit)).json()
+
+    def mirror_orders(self) -> Mirror:
+        """A local copy of every order, call sync() on it to bring it up to date"""
+        return Mirror(self.get_order_changes, lambda: self.iter_orders(CHANGES_PAGE_SIZE), "order_id", "order")
 
     def create_order(self, order_data: Dict) -> Dict:
         """Create a new order"""
-        response = requests.post(
-            f"{self.base_url}/orders/",
-            json=order_data,
-            headers=self.headers
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._request("POST", "/orders/", json=order_data).json()
+
+    def create_orders(self, orders: List[Dict]) -> Dict:
+        """Create many orders in one request, the result reports each order's outcome"""
+        return self._request("POST", "/orders/batch", json=orders).json()
+
+    def update_order(self, order_id: str, order_data: Dict, version: Optional[int] = None) -> Dict:
+        """Update an entire order"""
+        return self._request("PUT", f"/orders/{order_id}", json=order_data, headers=self._if_match(version)).json()
+
+    def patch_order(self, order_id: str, order_data: Dict, version: Optional[int] = None) -> Dict:
+        """Partially update a order"""
+        return self._request("PATCH", f"/orders/{order_id}", json=order_data, headers=self._if_match(version)).json()
+
+    def delete_order(self, order_id: str, version: Optional[int] = None) -> None:
+        """Delete a order"""
+        self._request("DELETE", f"/orders/{order_id}", headers=self._if_match(version))
+
+
+class AsyncOrderClient(AsyncClient):
+    """Async twin of OrderClient with the same method names, plus concurrent fan-out helpers"""
+
+    async def iter_orders(self, page_size: int = 100, since: Optional[float] = None,
+                          until: Optional[float] = None, fields: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """Lazily walk all orders, or those placed between since and until (newest first).
+
+        ``fields`` limits each order to the named attributes, e.g. ["order_id", "total"].
+        """
+        window = _window(since, until, fields)
+        params = {"limit": page_size, **window}
+        while True:
+            response = await self._request("GET", "/orders/", params=params)
+            for order in response.json():
+                yield order
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+            params = {"limit": page_size, "cursor": cursor, **window}
+
+    async def get_all_orders(self) -> List[Dict]:
+        """Get all orders"""
+        return [order async for order in self.iter_orders()]
+
+    async def export_orders(self) -> AsyncIterator[Dict]:
+        """Stream the full order history, yielding orders as they arrive (unordered)"""
+        async with self.client.stream("GET", f"{self.base_url}/orders/export", headers=self.headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def iter_archived_orders(self, since: float, until: float,
+                                   fields: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """Stream archived orders placed between since and until, oldest month first"""
+        params = _window(since, until, fields)
+        async with self.client.stream("GET", f"{self.base_url}/orders/archive", params=params,
+                                      headers=self.headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def get_order(self, order_id: str) -> Dict:
+        """Get a specific order"""
+        return (await self._request("GET", f"/orders/{order_id}")).json()
+
+    async def get_orders(self, order_ids: List[str], concurrency: Optional[int] = None) -> List[Dict]:
+        """Get many orders in parallel, at most ``concurrency`` requests at a time, in input order"""
+        return await self.gather_limited(self.get_order, order_ids, concurrency)
+
+    async def get_orders_by_number(self, order_number: str) -> List[Dict]:
+        """Get the orders with a receipt order number, newest first"""
+        return (await self._request("GET", f"/orders/by-number/{order_number}")).json()
+
+    async def get_order_changes(self, since: Optional[int] = None, limit: int = CHANGES_PAGE_SIZE) -> Dict:
+        """Orders changed after position ``since``; without it, only the current position"""
+        return (await self._request("GET", "/orders/changes", params=changes_params(since, limit))).json()
+
+    def mirror_orders(self) -> AsyncMirror:
+        """A local copy of every order, await sync() on it to bring it up to date"""
+        return AsyncMirror(self.get_order_changes, lambda: self.iter_orders(CHANGES_PAGE_SIZE), "order_id", "order")
+
+    async def create_order(self, order_data: Dict) -> Dict:
+        """Create a new order"""
+        return (await self._request("POST", "/orders/", json=order_data)).json()
+
+    async def create_orders(self, orders: List[Dict]) -> Dict:
+        """Create many orders in one request, the result reports each order's outcome"""
+        return (await self._request("POST", "/orders/batch", json=orders)).json()
 
-    def update_order(self, order_id: str, order_data: Dict) -> Dict:
+    async def update_order(self, order_id: str, order_data: Dict, version: Optional[int] = None) -> Dict:
         """Update an entire order"""
-        response = requests.put(
-            f"{self.base_url}/orders/{order_id}",
-            json=order_data,
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = await self._request("PUT", f"/orders/{order_id}", json=order_data,
+                                       headers=self._if_match(version))
         return response.json()
 
-    def patch_order(self, order_id: str, order_data: Dict) -> Dict:
+    async def patch_order(self, order_id: str, order_data: Dict, version: Optional[int] = None) -> Dict:
         """Partially update a order"""
-        response = requests.patch(
-            f"{self.base_url}/orders/{order_id}",
-            json=order_data,
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = await self._request("PATCH", f"/orders/{order_id}", json=order_data,
+                                       headers=self._if_match(version))
         return response.json()
 
-    def delete_order(self, order_id: str) -> None:
+    async def delete_order(self, order_id: str, version: Optional[int] = None) -> None:
         """Delete a order"""
-        response = requests.delete(
-            f"{self.base_url}/orders/{order_id}",
-            headers=self.headers
-        )
-        response.raise_for_status()
\ No newline at end of file
+        await self._request("DELETE", f"/orders/{order_id}", headers=self._if_match(version))
@@ -1,60 +1,132 @@
-import requests
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
-class RestaurantClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
-        self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
-        self.headers = {
-            "Content-Type": "application/json",
-            **({"X-API-Key": api_key} if api_key else {})
-        }
+from client.base_client import AsyncClient, SyncClient
+from client.mirror import CHANGES_PAGE_SIZE, AsyncMirror, Mirror, changes_params
+
+MENU_BATCH_SIZE = 300
+
+
+def _merge_batches(pages: List[Dict]) -> Dict:
+    result = {"items": [], "missing": []}
+    for page in pages:
+        result["items"].extend(page["items"])
+        result["missing"].extend(page["missing"])
+    return result
+
+
+class RestaurantClient(SyncClient):
+    """Menu API client; takes timeout, retries, backoff_factor and pool_size keyword options"""
+
+    def iter_menu_items(self, page_size: int = 100, fresh: bool = False) -> Iterator[Dict]:
+        """Lazily walk all menu items, fetching one page at a time; ``fresh`` skips the server's cache"""
+        extra = {"fresh": 1} if fresh else {}
+        params = {"limit": page_size, **extra}
+        while True:
+            response = self._request("GET", "/menu/", params=params)
+            yield from response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+            params = {"limit": page_size, "cursor": cursor, **extra}
 
     def get_all_menu_items(self) -> List[Dict]:
         """Get all menu items"""
-        response = requests.get(f"{self.base_url}/menu/", headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return list(self.iter_menu_items())
 
     def get_menu_item(self, item_id: str) -> Dict:
         """Get a specific menu item"""
-        response = requests.get(f"{self.base_url}/menu/{item_id}", headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return self._request("GET", f"/menu/{item_id}").json()
+
+    def get_menu_items(self, item_ids: List[str], chunk_size: int = MENU_BATCH_SIZE) -> Dict:
+        """Get several menu items, returns {"items": [...], "missing": [ids]}"""
+        return _merge_batches([
+            self._request("GET", "/menu/batch", params={"ids": ",".join(item_ids[start:start + chunk_size])}).json()
+            for start in range(0, len(item_ids), chunk_size)
+        ])
+
+    def get_menu_changes(self, since: Optional[int] = None, limit: int = CHANGES_PAGE_SIZE) -> Dict:
+        """Menu items changed after position ``since``; without it, only the current position"""
+        return self._request("GET", "/menu/changes", params=changes_params(since, limit)).json()
+
+    def mirror_menu(self) -> Mirror:
+        """A local copy of the menu, call sync() on it to bring it up to date"""
+        # The full read skips the server's cache, which can predate the position the mirror syncs from
+        return Mirror(self.get_menu_changes, lambda: self.iter_menu_items(CHANGES_PAGE_SIZE, fresh=True),
+                      "item_id", "item")
 
     def create_menu_item(self, item_data: Dict) -> Dict:
         """Create a new menu item"""
-        response = requests.post(
-            f"{self.base_url}/menu/",
-            json=item_data,
-            headers=self.headers
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._request("POST", "/menu/", json=item_data).json()
+
+    def update_menu_item(self, item_id: str, item_data: Dict, version: Optional[int] = None) -> Dict:
+        """Update an entire menu item"""
+        return self._request("PUT", f"/menu/{item_id}", json=item_data, headers=self._if_match(version)).json()
+
+    def patch_menu_item(self, item_id: str, item_data: Dict, version: Optional[int] = None) -> Dict:
+        """Partially update a menu item"""
+        return self._request("PATCH", f"/menu/{item_id}", json=item_data, headers=self._if_match(version)).json()
+
+    def delete_menu_item(self, item_id: str, version: Optional[int] = None) -> None:
+        """Delete a menu item"""
+        self._request("DELETE", f"/menu/{item_id}", headers=self._if_match(version))
+
+
+class AsyncRestaurantClient(AsyncClient):
+    """Async twin of RestaurantClient with the same method names"""
+
+    async def iter_menu_items(self, page_size: int = 100, fresh: bool = False) -> AsyncIterator[Dict]:
+        """Lazily walk all menu items, fetching one page at a time; ``fresh`` skips the server's cache"""
+        extra = {"fresh": 1} if fresh else {}
+        params = {"limit": page_size, **extra}
+        while True:
+            response = await self._request("GET", "/menu/", params=params)
+            for item in response.json():
+                yield item
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+            params = {"limit": page_size, "cursor": cursor, **extra}
+
+    async def get_all_menu_items(self) -> List[Dict]:
+        """Get all menu items"""
+        return [item async for item in self.iter_menu_items()]
+
+    async def get_menu_item(self, item_id: str) -> Dict:
+        """Get a specific menu item"""
+        return (await self._request("GET", f"/menu/{item_id}")).json()
+
+    async def get_menu_items(self, item_ids: List[str], chunk_size: int = MENU_BATCH_SIZE,
+                             concurrency: Optional[int] = None) -> Dict:
+        """Get several menu items, one batch request per chunk in parallel, returns {"items", "missing"}"""
+        async def get_chunk(start: int) -> Dict:
+            params = {"ids": ",".join(item_ids[start:start + chunk_size])}
+            return (await self._request("GET", "/menu/batch", params=params)).json()
+
+        return _merge_batches(await self.gather_limited(get_chunk, range(0, len(item_ids), chunk_size), concurrency))
+
+    async def get_menu_changes(self, since: Optional[int] = None, limit: int = CHANGES_PAGE_SIZE) -> Dict:
+        """Menu items changed after position ``since``; without it, only the current position"""
+        return (await self._request("GET", "/menu/changes", params=changes_params(since, limit))).json()
+
+    def mirror_menu(self) -> AsyncMirror:
+        """A local copy of the menu, await sync() on it to bring it up to date"""
+        return AsyncMirror(self.get_menu_changes, lambda: self.iter_menu_items(CHANGES_PAGE_SIZE, fresh=True),
+                           "item_id", "item")
+
+    async def create_menu_item(self, item_data: Dict) -> Dict:
+        """Create a new menu item"""
+        return (await self._request("POST", "/menu/", json=item_data)).json()
 
-    def update_menu_item(self, item_id: str, item_data: Dict) -> Dict:
+    async def update_menu_item(self, item_id: str, item_data: Dict, version: Optional[int] = None) -> Dict:
         """Update an entire menu item"""
-        response = requests.put(
-            f"{self.base_url}/menu/{item_id}",
-            json=item_data,
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = await self._request("PUT", f"/menu/{item_id}", json=item_data, headers=self._if_match(version))
         return response.json()
 
-    def patch_menu_item(self, item_id: str, item_data: Dict) -> Dict:
+    async def patch_menu_item(self, item_id: str, item_data: Dict, version: Optional[int] = None) -> Dict:
         """Partially update a menu item"""
-        response = requests.patch(
-            f"{self.base_url}/menu/{item_id}",
-            json=item_data,
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = await self._request("PATCH", f"/menu/{item_id}", json=item_data, headers=self._if_match(version))
         return response.json()
 
-    def delete_menu_item(self, item_id: str) -> None:
+    async def delete_menu_item(self, item_id: str, version: Optional[int] = None) -> None:
         """Delete a menu item"""
-        response = requests.delete(
-            f"{self.base_url}/menu/{item_id}",
-            headers=self.headers
-        )
-        response.raise_for_status()
\ No newline at end of file
+        await self._request("DELETE", f"/menu/{item_id}", headers=self._if_match(version))
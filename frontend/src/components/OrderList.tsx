@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { orderApi } from '../services/api';
-import { Order } from '../types';
+import { Order, OrderPayload } from '../types';
 import { Eye, Trash2, Plus } from 'lucide-react';
 import { format } from 'date-fns';
 import toast from 'react-hot-toast';
@@ -40,7 +40,7 @@ const OrderList = () => {
     }
   };
 
-  const handleSubmit = async (data: Partial<Order>) => {
+  const handleSubmit = async (data: OrderPayload) => {
       try {
           if (editingOrder) {
               await orderApi.update(editingOrder.order_id, data);
@@ -1,9 +1,9 @@
 import React from 'react';
-import { Order } from '../../types';
+import { RecentOrder } from '../../types';
 import { format } from 'date-fns';
 
 interface RecentOrdersProps {
-  orders: Order[];
+  orders: RecentOrder[];
 }
 
 export const RecentOrders: React.FC<RecentOrdersProps> = ({ orders }) => {
@@ -19,7 +19,7 @@ export const RecentOrders: React.FC<RecentOrdersProps> = ({ orders }) => {
             <p className="text-sm text-gray-500">
               {format(new Date(Number(order.order_date) * 1000), 'MMM d, yyyy h:mm a')}
             </p>
-            <p className="text-sm text-gray-500">{order.items.length} items</p>
+            <p className="text-sm text-gray-500">{order.item_count} items</p>
           </div>
           <div className="text-right">
             <p className="font-medium">${Number(order.total).toFixed(2)}</p>
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { MenuItem, Order, OrderItem } from '../../types';
+import { MenuItem, Order, OrderItem, OrderPayload } from '../../types';
 import { menuApi } from '../../services/api';
 import { Plus, Minus, Trash2 } from 'lucide-react';
 import toast from 'react-hot-toast';
@@ -10,7 +10,7 @@ const generateOrderNumber = () => {
 
 interface OrderFormProps {
   initialData?: Order;
-  onSubmit: (data: Partial<Order>) => void;
+  onSubmit: (data: OrderPayload) => void;
   onCancel: () => void;
 }
 
@@ -57,7 +57,7 @@ export const OrderForm: React.FC<OrderFormProps> = ({
         )
       );
     } else {
-      setSelectedItems([...selectedItems, { item: menuItem, quantity: 1 }]);
+      setSelectedItems([...selectedItems, { item_id: menuItem.item_id, item: menuItem, quantity: 1 }]);
     }
   };
 
@@ -90,10 +90,11 @@ export const OrderForm: React.FC<OrderFormProps> = ({
       const { subtotal, total } = calculateTotals();
       const discountDecimal = Math.min(Math.max(discountPct / 100, 0), 1);
 
-      const orderData = {
+      const orderData: OrderPayload = {
           order_number: initialData?.order_number || generateOrderNumber(),
+          // Prices are resolved server-side from the menu
           items: selectedItems.map((item) => ({
-              item: item.item,
+              item_id: item.item.item_id,
               quantity: item.quantity,
           })),
           subtotal: subtotal.toFixed(2),
@@ -1,14 +1,16 @@
 import { useState, useEffect } from 'react';
-import { menuApi, orderApi } from '../services/api';
-import { MenuItem, Order } from '../types';
-import { subDays } from 'date-fns';
+import { statsApi, subscribeEvents } from '../services/api';
+import { MenuItem, RecentOrder } from '../types';
+
+// Coalesce bursts of change events (e.g. a batch of orders) into one refetch
+const REFRESH_DEBOUNCE_MS = 500;
 
 interface DashboardStats {
   totalRevenue: number;
   totalOrders: number;
   menuItemsCount: number;
   averageOrderAmount: number;
-  recentOrders: Order[];
+  recentOrders: RecentOrder[];
   popularItems: Array<{
     item: MenuItem;
     totalOrdered: number;
@@ -31,52 +33,20 @@ export const useDashboardData = (): DashboardStats => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [ordersResponse, menuResponse] = await Promise.all([
-          orderApi.getAll(),
-          menuApi.getAll(),
-        ]);
-
-        const orders = ordersResponse.data;
-        const menuItems = menuResponse.data;
-
-        // Calculate total revenue and average order amount
-        const totalRevenue = orders.reduce((sum, order) => sum + Number(order.total), 0);
-        const averageOrderAmount = orders.length > 0 ? Number(totalRevenue) / orders.length : 0;
-
-        // Get recent orders (last 30 days)
-        const thirtyDaysAgo = subDays(new Date(), 30);
-        const recentOrders = orders
-          .filter(order => new Date(Number(order.order_date) * 1000) >= thirtyDaysAgo)
-          .sort((a, b) => new Date(Number(b.order_date) * 1000).getTime() - new Date(Number(a.order_date) * 1000).getTime())
-          .slice(0, 5);
-
-        // Calculate popular items
-        const itemStats = new Map<string, { totalOrdered: number; revenue: number; item: MenuItem }>();
-        
-        orders.forEach(order => {
-          order.items.forEach(orderItem => {
-            const stats = itemStats.get(orderItem.item.item_id) || {
-              totalOrdered: 0,
-              revenue: 0,
-              item: orderItem.item,
-            };
-            stats.totalOrdered += orderItem.quantity;
-            stats.revenue += Number(orderItem.item.price) * orderItem.quantity;
-            itemStats.set(orderItem.item.item_id, stats);
-          });
-        });
-
-        const popularItems = Array.from(itemStats.values())
-          .sort((a, b) => b.totalOrdered - a.totalOrdered)
-          .slice(0, 5);
+        // Aggregates are maintained server-side, one request regardless of order history
+        const { data } = await statsApi.getDashboard();
 
         setStats({
-          totalRevenue,
-          totalOrders: orders.length,
-          menuItemsCount: menuItems.length,
-          averageOrderAmount,
-          recentOrders,
-          popularItems,
+          totalRevenue: Number(data.total_revenue),
+          totalOrders: data.total_orders,
+          menuItemsCount: data.menu_items_count,
+          averageOrderAmount: Number(data.average_order_amount),
+          recentOrders: data.recent_orders,
+          popularItems: data.popular_items.map(({ item, total_ordered, revenue }) => ({
+            item,
+            totalOrdered: total_ordered,
+            revenue: Number(revenue),
+          })),
           isLoading: false,
         });
       } catch (error) {
@@ -86,6 +56,16 @@ export const useDashboardData = (): DashboardStats => {
     };
 
     fetchData();
+
+    let refresh: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = subscribeEvents(() => {
+      clearTimeout(refresh);
+      refresh = setTimeout(fetchData, REFRESH_DEBOUNCE_MS);
+    });
+    return () => {
+      clearTimeout(refresh);
+      unsubscribe();
+    };
   }, []);
 
   return stats;
@@ -1,11 +1,24 @@
 import axios from 'axios';
-import {MenuItem, Order} from '../types';
+import {DashboardStats, MenuItem, Order, OrderPayload} from '../types';
 
 const API_URL = 'http://localhost:8000';
+const PAGE_SIZE = 500;
+
+// List endpoints are cursor-paginated, follow X-Next-Cursor until exhausted
+const getAllPages = async <T,>(url: string, params: Record<string, string> = {}): Promise<{ data: T[] }> => {
+  const data: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await axios.get<T[]>(url, { params: { ...params, limit: PAGE_SIZE, cursor } });
+    data.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { data };
+};
 
 // Menu API
 export const menuApi = {
-  getAll: () => axios.get<MenuItem[]>(`${API_URL}/menu/`),
+  getAll: () => getAllPages<MenuItem>(`${API_URL}/menu/`),
   getOne: (id: string) => axios.get<MenuItem>(`${API_URL}/menu/${id}/`),
   create: (item: Partial<MenuItem>) =>
     axios.post<MenuItem>(`${API_URL}/menu/`, item),
@@ -18,13 +31,33 @@ export const menuApi = {
 
 // Orders API
 export const orderApi = {
-  getAll: () => axios.get<Order[]>(`${API_URL}/orders/`),
-  getOne: (id: string) => axios.get<Order>(`${API_URL}/orders/${id}/`),
-  create: (order: Partial<Order>) =>
+  getAll: () => getAllPages<Order>(`${API_URL}/orders/`, { expand: 'items' }),
+  getOne: (id: string) => axios.get<Order>(`${API_URL}/orders/${id}/`, { params: { expand: 'items' } }),
+  getByNumber: (orderNumber: string) =>
+    axios.get<Order[]>(`${API_URL}/orders/by-number/${orderNumber}`, { params: { expand: 'items' } }),
+  create: (order: OrderPayload) =>
     axios.post<Order>(`${API_URL}/orders/`, order),
-  update: (id: string, order: Partial<Order>) =>
+  update: (id: string, order: OrderPayload) =>
     axios.put<Order>(`${API_URL}/orders/${id}/`, order),
-  patch: (id: string, order: Partial<Order>) => 
+  patch: (id: string, order: OrderPayload) => 
     axios.patch<Order>(`${API_URL}/orders/${id}/`, order),
   delete: (id: string) => axios.delete(`${API_URL}/orders/${id}/`)
-};
\ No newline at end of file
+};
+
+// Stats API
+export const statsApi = {
+  getDashboard: () => axios.get<DashboardStats>(`${API_URL}/stats/dashboard`)
+};
+
+// Change events API: calls onChange for every order or menu write; after an
+// overflow event (we fell behind and missed some) the browser reconnects and
+// the caller should re-read everything it shows
+export const subscribeEvents = (
+  onChange: (topic: 'order' | 'menu' | 'overflow') => void,
+  topics: string[] = ['order', 'menu']
+): (() => void) => {
+  const source = new EventSource(`${API_URL}/events?topics=${topics.join(',')}`);
+  topics.forEach(topic => source.addEventListener(topic, () => onChange(topic as 'order' | 'menu')));
+  source.addEventListener('overflow', () => onChange('overflow'));
+  return () => source.close();
+};
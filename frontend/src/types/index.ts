@@ -8,8 +8,11 @@ export interface MenuItem {
 }
 
 export interface OrderItem {
-  item: MenuItem;
+  item_id: string;
   quantity: number;
+  unit_price?: string;
+  // Present when the order was fetched with ?expand=items
+  item: MenuItem;
 }
 
 export interface Order {
@@ -20,4 +23,31 @@ export interface Order {
   total: string;
   discount_pct: string;
   order_date: string;
-}
\ No newline at end of file
+}
+
+// Request body for creating/updating orders, lines only reference menu items
+export type OrderPayload = Omit<Partial<Order>, 'items'> & {
+  items?: Array<Pick<OrderItem, 'item_id' | 'quantity'>>;
+};
+
+export interface RecentOrder {
+  order_id: string;
+  order_number: string;
+  order_date: string;
+  total: string;
+  discount_pct: string;
+  item_count: number;
+}
+
+export interface DashboardStats {
+  total_revenue: string;
+  total_orders: number;
+  menu_items_count: number;
+  average_order_amount: string;
+  recent_orders: RecentOrder[];
+  popular_items: Array<{
+    item: MenuItem;
+    total_ordered: number;
+    revenue: string;
+  }>;
+}
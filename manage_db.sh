@@ -1,8 +1,8 @@
 #!/bin/bash
 
 # Check if the script is called with the correct number of arguments
-if [ "$1" != "setup" ] && [ "$1" != "teardown" ]; then
-    echo "Usage: ./manage_db.sh [setup|teardown]"
+if [ "$1" != "setup" ] && [ "$1" != "teardown" ] && [ "$1" != "rebuild-stats" ] && [ "$1" != "trim-changes" ] && [ "$1" != "archive-orders" ]; then
+    echo "Usage: ./manage_db.sh [setup|teardown|rebuild-stats|trim-changes|archive-orders]"
     exit 1
 fi
 
@@ -29,6 +29,13 @@ fi
 # Run the appropriate script
 if [ "$1" == "setup" ]; then
     python scripts/basic_setup.py
+    python -m scripts.rebuild_stats
+elif [ "$1" == "rebuild-stats" ]; then
+    python -m scripts.rebuild_stats
+elif [ "$1" == "trim-changes" ]; then
+    python -m scripts.trim_change_log
+elif [ "$1" == "archive-orders" ]; then
+    python -m scripts.archive_orders
 elif [ "$1" == "teardown" ]; then
     python scripts/basic_teardown.py
 else
@@ -0,0 +1,77 @@
+"""Add any missing secondary indexes to an existing orders table.
+
+New tables get them from scripts/basic_setup.py. DynamoDB builds one index
+at a time in the background, and the table stays usable meanwhile. Run from
+the repository root:
+
+    python -m scripts.add_order_indexes
+"""
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.repositories.order_repository import ORDER_DATE_INDEX, ORDER_NUMBER_INDEX, OrderRepository
+
+ORDER_INDEXES = {
+    ORDER_DATE_INDEX: {
+        'AttributeDefinitions': [
+            {'AttributeName': 'order_day', 'AttributeType': 'S'},
+            {'AttributeName': 'order_ts', 'AttributeType': 'N'}
+        ],
+        'KeySchema': [
+            {'AttributeName': 'order_day', 'KeyType': 'HASH'},
+            {'AttributeName': 'order_ts', 'KeyType': 'RANGE'}
+        ]
+    },
+    ORDER_NUMBER_INDEX: {
+        'AttributeDefinitions': [
+            {'AttributeName': 'order_number', 'AttributeType': 'S'}
+        ],
+        'KeySchema': [
+            {'AttributeName': 'order_number', 'KeyType': 'HASH'}
+        ]
+    }
+}
+
+
+def wait_until_active(client, table_name: str, poll_seconds: float = 5):
+    while True:
+        table = client.describe_table(TableName=table_name)['Table']
+        indexes = table.get('GlobalSecondaryIndexes', [])
+        if table['TableStatus'] == 'ACTIVE' and all(index['IndexStatus'] == 'ACTIVE' for index in indexes):
+            return
+        time.sleep(poll_seconds)
+
+
+def ensure_indexes(repository: OrderRepository):
+    """Create whichever order indexes the table does not have yet"""
+    client = repository.dynamodb.meta.client
+    for index_name, index_config in ORDER_INDEXES.items():
+        table = client.describe_table(TableName=repository.table_name)['Table']
+        if any(index['IndexName'] == index_name for index in table.get('GlobalSecondaryIndexes', [])):
+            continue
+        print(f"Creating index {index_name}...")
+        index = {
+            'IndexName': index_name,
+            'KeySchema': index_config['KeySchema'],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+        if table.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+            throughput = table['ProvisionedThroughput']
+            index['ProvisionedThroughput'] = {
+                'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+                'WriteCapacityUnits': throughput['WriteCapacityUnits']
+            }
+        client.update_table(
+            TableName=repository.table_name,
+            AttributeDefinitions=index_config['AttributeDefinitions'],
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+        # Only one index can be created per table update
+        wait_until_active(client, repository.table_name)
+        print(f"Index {index_name} is active")
+
+
+if __name__ == '__main__':
+    ensure_indexes(OrderRepository())
@@ -0,0 +1,123 @@
+"""Move orders placed more than ORDER_ARCHIVE_AFTER_DAYS ago from the orders table into the order archive.
+
+Old orders are found through the order date index. For each page of them,
+the job:
+1. writes the page to the archive journal;
+2. deletes each order that is still at the version it read, so orders
+   changed in the meantime stay in the table;
+3. appends the deleted orders to the run's monthly archive files;
+4. clears the journal.
+
+A run that stops part-way is completed by the next one, which first
+archives the journal's orders that are gone from the table.
+
+Dashboard stats are left as they are, because they count archived orders
+too. Archiving writes no change events and no change log entries. Orders
+without an order_day index attribute need scripts/backfill_order_dates.py
+first.
+
+Each run resumes from where the previous one finished. The first run looks
+back --lookback-days before the cutoff. Run it daily, from the repository
+root:
+
+    python -m scripts.archive_orders
+    python -m scripts.archive_orders --older-than-days 180 --lookback-days 3650 --dry-run
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi import HTTPException
+
+from api.config import ORDER_ARCHIVE_AFTER_DAYS, PAGE_SIZE_MAX
+from api.repositories.archive_repository import OrderArchiveRepository
+from api.repositories.backends import OrderStore, get_order_repository
+
+LOOKBACK_DAYS = 5 * 365
+
+
+async def finish_interrupted_run(orders: OrderStore, archive: OrderArchiveRepository, run: str) -> int:
+    """Archive the orders an interrupted run deleted but may not have archived, returns how many"""
+    pending = await archive.read_journal()
+    if pending is None:
+        return 0
+    _, page = pending
+    # Consistent reads, a deleted order that still looked present would be lost
+    present = {order['order_id'] for order in
+               await orders.get_many([order['order_id'] for order in page], consistent_read=True)}
+    gone = [order for order in page if order['order_id'] not in present]
+    await archive.append(run, gone)
+    await archive.clear_journal()
+    return len(gone)
+
+
+async def delete_unchanged(orders: OrderStore, page: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """Delete the orders still at the version read, returns (deleted, changed since read)"""
+    async def delete(order: dict) -> int:
+        try:
+            await orders.delete_order(order['order_id'], int(order.get('version') or 0))
+            return 200
+        except HTTPException as e:
+            if e.status_code in (404, 412):
+                return e.status_code
+            raise
+
+    statuses = await asyncio.gather(*(delete(order) for order in page))
+    deleted = [order for order, status in zip(page, statuses) if status == 200]
+    changed = [order for order, status in zip(page, statuses) if status == 412]
+    return deleted, changed
+
+
+async def archive_orders(orders: OrderStore, archive: OrderArchiveRepository, older_than_days: float,
+                         lookback_days: float = LOOKBACK_DAYS, dry_run: bool = False) -> dict:
+    run = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+    recovered = 0 if dry_run else await finish_interrupted_run(orders, archive, run)
+
+    cutoff = time.time() - older_than_days * 86400
+    since = archive.archived_through()
+    if since is None:
+        since = cutoff - lookback_days * 86400
+    archived, changed, cursor = 0, [], None
+    while since <= cutoff:
+        page, cursor = await orders.get_range_page(since, cutoff, PAGE_SIZE_MAX, cursor)
+        if page and dry_run:
+            archived += len(page)
+        elif page:
+            await archive.write_journal(run, page)
+            deleted, page_changed = await delete_unchanged(orders, page)
+            await archive.append(run, deleted)
+            await archive.clear_journal()
+            archived += len(deleted)
+            changed.extend(page_changed)
+        if not cursor:
+            break
+
+    if not dry_run and since <= cutoff:
+        # The next run starts here, or at the oldest order that changed while this one ran
+        archive.set_archived_through(min([float(order['order_date']) for order in changed], default=cutoff))
+    return {'archived': archived, 'recovered': recovered, 'changed': len(changed), 'since': since, 'until': cutoff}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--older-than-days', type=float, default=ORDER_ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--lookback-days', type=float, default=LOOKBACK_DAYS,
+                        help='how far before the cutoff the first run looks for orders')
+    parser.add_argument('--dry-run', action='store_true', help='count the orders to archive, change nothing')
+    args = parser.parse_args()
+
+    result = asyncio.run(archive_orders(get_order_repository(), OrderArchiveRepository(), args.older_than_days,
+                                        args.lookback_days, args.dry_run))
+    window = f"placed {datetime.fromtimestamp(result['since'], timezone.utc):%Y-%m-%d} " \
+             f"to {datetime.fromtimestamp(result['until'], timezone.utc):%Y-%m-%d}"
+    if args.dry_run:
+        print(f"Would archive {result['archived']} orders {window}")
+    else:
+        print(f"Archived {result['archived']} orders {window}, finished {result['recovered']} from an interrupted run, "
+              f"left {result['changed']} that changed during the run")
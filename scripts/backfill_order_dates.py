@@ -0,0 +1,71 @@
+"""Add the order indexes to an existing orders table and backfill the date index keys.
+
+Orders written before the index existed lack the order_day / order_ts
+attributes, so they are invisible to ?since=&until= queries until this runs.
+Each order is updated only if its order_date is unchanged since it was read,
+so it is safe to run while the API is serving. Run from the repository root:
+
+    python -m scripts.backfill_order_dates [--dry-run]
+"""
+import argparse
+import asyncio
+
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.repositories.order_repository import OrderRepository, order_date_keys
+from scripts.add_order_indexes import ensure_indexes
+
+
+def needs_backfill(order: dict) -> bool:
+    if 'order_date' not in order:
+        return False
+    return any(order.get(name) != value for name, value in order_date_keys(order['order_date']).items())
+
+
+async def backfill_order(repository: OrderRepository, order: dict) -> bool:
+    """Set the index keys unless the order changed since it was scanned"""
+    keys = order_date_keys(order['order_date'])
+    try:
+        await repository._call(
+            'update_item',
+            Key={'order_id': order['order_id']},
+            UpdateExpression="SET order_day = :order_day, order_ts = :order_ts",
+            ConditionExpression="order_date = :order_date",
+            ExpressionAttributeValues={
+                ':order_day': keys['order_day'],
+                ':order_ts': keys['order_ts'],
+                ':order_date': order['order_date']
+            }
+        )
+        return True
+    except ClientError as e:
+        # Rewritten or deleted meanwhile, and any rewrite sets the keys itself
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+async def backfill(dry_run: bool = False):
+    repository = OrderRepository()
+    if not dry_run:
+        ensure_indexes(repository)
+    scanned = backfilled = 0
+    async for page in repository.parallel_scan():
+        scanned += len(page)
+        pending = [order for order in page if needs_backfill(order)]
+        if dry_run:
+            backfilled += len(pending)
+            continue
+        results = await asyncio.gather(*(backfill_order(repository, order) for order in pending))
+        backfilled += sum(results)
+
+    action = "Would backfill" if dry_run else "Backfilled"
+    print(f"{action} {backfilled} of {scanned} orders")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='only count the orders to backfill')
+    asyncio.run(backfill(parser.parse_args().dry_run))
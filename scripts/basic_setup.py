@@ -1,5 +1,5 @@
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 
 import boto3
 from decimal import Decimal, ROUND_DOWN
@@ -10,7 +10,8 @@ load_dotenv()
 class BasicAWSSetup:
     def __init__(self, region=os.getenv('AWS_DEFAULT_REGION')):
         self.region = region
-        self.dynamodb = boto3.client('dynamodb', region_name=region)
+        self.endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL') or None
+        self.dynamodb = boto3.client('dynamodb', region_name=region, endpoint_url=self.endpoint_url)
 
     def create_dynamodb_tables(self):
         """Create DynamoDB tables for the restaurant API"""
@@ -25,10 +26,54 @@ class BasicAWSSetup:
             },
             'orders': {
                 'AttributeDefinitions': [
-                    {'AttributeName': 'order_id', 'AttributeType': 'S'}
+                    {'AttributeName': 'order_id', 'AttributeType': 'S'},
+                    {'AttributeName': 'order_day', 'AttributeType': 'S'},
+                    {'AttributeName': 'order_ts', 'AttributeType': 'N'},
+                    {'AttributeName': 'order_number', 'AttributeType': 'S'}
                 ],
                 'KeySchema': [
                     {'AttributeName': 'order_id', 'KeyType': 'HASH'}
+                ],
+                # Time-range reads: one partition per UTC day, sorted by order timestamp
+                'GlobalSecondaryIndexes': [
+                    {
+                        'IndexName': 'order_date_index',
+                        'KeySchema': [
+                            {'AttributeName': 'order_day', 'KeyType': 'HASH'},
+                            {'AttributeName': 'order_ts', 'KeyType': 'RANGE'}
+                        ],
+                        'Projection': {'ProjectionType': 'ALL'}
+                    },
+                    # Receipt lookups by the short order number
+                    {
+                        'IndexName': 'order_number_index',
+                        'KeySchema': [
+                            {'AttributeName': 'order_number', 'KeyType': 'HASH'}
+                        ],
+                        'Projection': {'ProjectionType': 'ALL'}
+                    }
+                ]
+            },
+            'dashboard_stats': {
+                'AttributeDefinitions': [
+                    {'AttributeName': 'stat_type', 'AttributeType': 'S'},
+                    {'AttributeName': 'stat_key', 'AttributeType': 'S'}
+                ],
+                'KeySchema': [
+                    {'AttributeName': 'stat_type', 'KeyType': 'HASH'},
+                    {'AttributeName': 'stat_key', 'KeyType': 'RANGE'}
+                ],
+                'TimeToLiveAttribute': 'expires_at'
+            },
+            # Delta sync: one partition per table, entries sorted by change sequence
+            'change_log': {
+                'AttributeDefinitions': [
+                    {'AttributeName': 'stream', 'AttributeType': 'S'},
+                    {'AttributeName': 'seq', 'AttributeType': 'N'}
+                ],
+                'KeySchema': [
+                    {'AttributeName': 'stream', 'KeyType': 'HASH'},
+                    {'AttributeName': 'seq', 'KeyType': 'RANGE'}
                 ]
             }
         }
@@ -40,11 +85,21 @@ class BasicAWSSetup:
                     TableName=table_name,
                     AttributeDefinitions=table_config['AttributeDefinitions'],
                     KeySchema=table_config['KeySchema'],
+                    **({'GlobalSecondaryIndexes': table_config['GlobalSecondaryIndexes']}
+                       if 'GlobalSecondaryIndexes' in table_config else {}),
                     BillingMode='PAY_PER_REQUEST'  # More cost-effective for development
                 )
                 # Wait for table creation
                 waiter = self.dynamodb.get_waiter('table_exists')
                 waiter.wait(TableName=table_name)
+                if 'TimeToLiveAttribute' in table_config:
+                    self.dynamodb.update_time_to_live(
+                        TableName=table_name,
+                        TimeToLiveSpecification={
+                            'Enabled': True,
+                            'AttributeName': table_config['TimeToLiveAttribute']
+                        }
+                    )
                 print(f"Table {table_name} created successfully")
             except ClientError as e:
                 if e.response['Error']['Code'] == 'ResourceInUseException':
@@ -79,32 +134,14 @@ class BasicAWSSetup:
             }
         ]
 
+        # Order lines reference menu items and snapshot the unit price
         orders = [
-        {
+            {
                 'order_id': 'id1',
                 'order_number': '000001',
                 'items': [
-                    {'item':
-                        {
-                            'item_id': 'item2',
-                            'name': 'Spaghetti Carbonara',
-                            'price': Decimal('14.99'),
-                            'description': 'Creamy pasta with pancetta',
-                            'category': 'Pasta'
-                        },
-                        'quantity': 1
-                    },
-                    {
-                        'item':
-                            {
-                                'item_id': 'item3',
-                                'name': 'Caesar Salad',
-                                'price': Decimal('8.99'),
-                                'description': 'Fresh romaine lettuce with Caesar dressing',
-                                'category': 'Salad'
-                            },
-                        'quantity': 1
-                    }
+                    {'item_id': 'item2', 'quantity': 1, 'unit_price': Decimal('14.99')},
+                    {'item_id': 'item3', 'quantity': 1, 'unit_price': Decimal('8.99')}
                 ],
                 'subtotal': Decimal('23.98'),
                 'total': Decimal('23.98'),
@@ -115,25 +152,20 @@ class BasicAWSSetup:
                 'order_id': 'id2',
                 'order_number': '000002',
                 'items': [
-                    {
-                        'item':
-                            {
-                                'item_id': 'item1',
-                                'name': 'Margherita Pizza',
-                                'price': Decimal('12.99'),
-                                'description': 'Classic tomato and mozzarella pizza',
-                                'category': 'Pizza'
-                            },
-                        'quantity': 1,
-                    }],
+                    {'item_id': 'item1', 'quantity': 1, 'unit_price': Decimal('12.99')}
+                ],
                 'subtotal': Decimal('12.99'),
                 'discount_pct': Decimal('0.25'),
                 'total': Decimal('9.7425').quantize(Decimal('0.01'), rounding=ROUND_DOWN),
                 'order_date': str(datetime.now().timestamp())
             },
         ]
+        for order in orders:
+            # Keys for the order_date_index
+            order['order_ts'] = Decimal(order['order_date'])
+            order['order_day'] = datetime.fromtimestamp(float(order['order_date']), timezone.utc).strftime('%Y-%m-%d')
 
-        menu_table = boto3.resource('dynamodb').Table('menu_items')
+        menu_table = boto3.resource('dynamodb', endpoint_url=self.endpoint_url).Table('menu_items')
         for item in menu_items:
             try:
                 menu_table.put_item(Item=item)
@@ -141,7 +173,7 @@ class BasicAWSSetup:
             except ClientError as e:
                 print(f"Error adding item {item['name']}: {str(e)}")
 
-        order_table = boto3.resource('dynamodb').Table('orders')
+        order_table = boto3.resource('dynamodb', endpoint_url=self.endpoint_url).Table('orders')
         for order in orders:
             try:
                 order_table.put_item(Item=order)
@@ -155,13 +187,13 @@ class BasicAWSSetup:
         print("\nStep 1: Creating DynamoDB tables...")
         self.create_dynamodb_tables()
         print("\ndebug: scan tables")
-        print(boto3.resource('dynamodb').Table('menu_items').scan())
-        print(boto3.resource('dynamodb').Table('orders').scan())
+        print(boto3.resource('dynamodb', endpoint_url=self.endpoint_url).Table('menu_items').scan())
+        print(boto3.resource('dynamodb', endpoint_url=self.endpoint_url).Table('orders').scan())
         print("\n\nStep 2: Adding sample data...")
         self.populate_sample_data()
         print("\ndebug: scan tables")
-        print(boto3.resource('dynamodb').Table('menu_items').scan())
-        print(boto3.resource('dynamodb').Table('orders').scan())
+        print(boto3.resource('dynamodb', endpoint_url=self.endpoint_url).Table('menu_items').scan())
+        print(boto3.resource('dynamodb', endpoint_url=self.endpoint_url).Table('orders').scan())
         print("\n\nSetup complete!")
 
 
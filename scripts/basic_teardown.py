@@ -9,11 +9,12 @@ load_dotenv()
 class BasicAWSCleanup:
     def __init__(self, region=os.getenv('AWS_DEFAULT_REGION')):
         self.region = region
-        self.dynamodb = boto3.client('dynamodb', region_name=region)
+        self.endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL') or None
+        self.dynamodb = boto3.client('dynamodb', region_name=region, endpoint_url=self.endpoint_url)
 
     def delete_dynamodb_tables(self):
         """Delete DynamoDB tables created for the restaurant API"""
-        tables = ['menu_items', 'orders']
+        tables = ['menu_items', 'orders', 'dashboard_stats', 'change_log']
 
         for table_name in tables:
             try:
@@ -0,0 +1,64 @@
+"""Relay change events between the API workers of one deployment.
+
+Each worker connects when EVENT_BROKER_URL points here and sends one line per
+change event. The relay copies every line to all connected workers, the
+sender included, and each worker hands it on to its own /events subscribers.
+A worker that stops reading is disconnected once its backlog passes
+--max-buffer. It reconnects on its own, and its subscribers get an overflow
+event only if their own buffers fill.
+
+Run from the repository root:
+
+    python -m scripts.event_broker --port 8900
+"""
+import argparse
+import asyncio
+from typing import Set
+
+
+class EventRelay:
+    def __init__(self, max_buffer: int):
+        self.max_buffer = max_buffer
+        self.writers: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        self.writers.add(writer)
+        print(f"Worker connected from {peer}, {len(self.writers)} connected")
+        try:
+            while line := await reader.readline():
+                self.broadcast(line)
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+            print(f"Worker {peer} disconnected, {len(self.writers)} connected")
+
+    def broadcast(self, line: bytes):
+        for writer in list(self.writers):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                # Never block the other workers behind one that stopped reading
+                print(f"Dropping worker {writer.get_extra_info('peername')}: {self.max_buffer} bytes behind")
+                self.writers.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
+
+
+async def serve(host: str, port: int, max_buffer: int):
+    relay = EventRelay(max_buffer)
+    server = await asyncio.start_server(relay.handle, host, port)
+    print(f"Event relay listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--max-buffer', type=int, default=4 * 1024 * 1024,
+                        help='bytes queued for one worker before it is disconnected')
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.max_buffer))
@@ -0,0 +1,44 @@
+"""Rewrite orders that embed full menu items into compact (item_id, quantity, unit_price) lines.
+
+Each embedded item's price becomes the line's unit price snapshot, so totals
+do not change. Safe to re-run; orders written while it runs may be
+overwritten, so run it when the API is quiet. Run from the repository root:
+
+    python -m scripts.migrate_compact_order_lines [--dry-run]
+"""
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.repositories.backends import get_order_repository
+from api.repositories.order_repository import compact_order
+
+
+def is_legacy(order: dict) -> bool:
+    return any('unit_price' not in line for line in order.get('items') or [])
+
+
+async def migrate(dry_run: bool = False):
+    repository = get_order_repository()
+    scanned = migrated = failed = 0
+    async for page in repository.parallel_scan():
+        scanned += len(page)
+        legacy = [compact_order(order) for order in page if is_legacy(order)]
+        if not legacy:
+            continue
+        errors = {} if dry_run else await repository.batch_put(legacy)
+        for index, error in errors.items():
+            print(f"Error migrating order {legacy[index]['order_id']}: {error}")
+        failed += len(errors)
+        migrated += len(legacy) - len(errors)
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"{action} {migrated} of {scanned} orders ({failed} failed)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='only count the orders to migrate')
+    asyncio.run(migrate(parser.parse_args().dry_run))
@@ -0,0 +1,34 @@
+"""Recompute the dashboard aggregates from the orders and menu_items tables of the configured backend.
+
+Archived orders (scripts/archive_orders.py) are counted too. Run from the
+repository root:
+
+    python -m scripts.rebuild_stats
+"""
+import asyncio
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.repositories.archive_repository import OrderArchiveRepository
+from api.repositories.backends import get_menu_repository, get_order_repository, get_stats_repository
+
+
+async def order_pages():
+    async for page in get_order_repository().parallel_scan():
+        yield page
+    async for page in OrderArchiveRepository().iter_pages():
+        yield page
+
+
+async def rebuild_stats():
+    menu_item_count = 0
+    async for page in get_menu_repository().parallel_scan(ProjectionExpression='item_id'):
+        menu_item_count += len(page)
+
+    order_count = await get_stats_repository().rebuild(order_pages(), menu_item_count)
+    print(f"Rebuilt dashboard stats from {order_count} orders and {menu_item_count} menu items")
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_stats())
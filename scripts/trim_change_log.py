@@ -0,0 +1,33 @@
+"""Remove change log entries older than CHANGE_LOG_RETENTION_DAYS from the configured backend.
+
+Clients that last synced before the trimmed point get 410 from the changes
+endpoints and reload in full. Run it daily, from the repository root:
+
+    python -m scripts.trim_change_log
+"""
+import argparse
+import asyncio
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.config import CHANGE_LOG_RETENTION_DAYS
+from api.repositories.backends import get_change_log_repository
+
+STREAMS = ('orders', 'menu_items')
+
+
+async def trim_change_log(retention_days: float):
+    change_log = get_change_log_repository()
+    before = time.time() - retention_days * 86400
+    for stream in STREAMS:
+        trimmed = await change_log.trim(stream, before)
+        print(f"Trimmed {trimmed} {stream} change log entries")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--retention-days', type=float, default=CHANGE_LOG_RETENTION_DAYS)
+    args = parser.parse_args()
+    asyncio.run(trim_change_log(args.retention_days))
@@ -0,0 +1,69 @@
+"""Archiving must move exactly the old orders out of the table and read them back, surviving interrupted runs.
+
+    python -m pytest tests/test_archive.py
+"""
+import asyncio
+import gzip
+import os
+import time
+from decimal import Decimal
+
+from api.repositories.archive_repository import OrderArchiveRepository
+from api.repositories.order_repository import SQLiteOrderRepository
+from api.repositories.sqlite_repository import SQLiteDatabase
+from scripts.archive_orders import archive_orders
+
+DAY = 86400
+
+
+def order(days_ago: float) -> dict:
+    return {'order_number': f'{int(days_ago):06d}', 'items': [], 'subtotal': Decimal('12.50'),
+            'discount_pct': Decimal('0'), 'total': Decimal('12.50'), 'order_date': str(time.time() - days_ago * DAY)}
+
+
+def archived(archive, **window) -> list:
+    async def collect():
+        return [order async for page in archive.iter_pages(**window) for order in page]
+    return asyncio.run(collect())
+
+
+def setup(tmp_path, ages):
+    orders = SQLiteOrderRepository(SQLiteDatabase(str(tmp_path / 'restaurant.db')))
+    archive = OrderArchiveRepository(str(tmp_path / 'archive'))
+    created = [asyncio.run(orders.create_order(order(days_ago))) for days_ago in ages]
+    return orders, archive, created
+
+
+def test_old_orders_move_to_the_archive(tmp_path):
+    orders, archive, created = setup(tmp_path, [400, 380, 90, 1])
+    result = asyncio.run(archive_orders(orders, archive, older_than_days=365))
+    assert (result['archived'], result['changed']) == (2, 0)
+
+    hot = {o['order_id'] for o in asyncio.run(orders.get_all())}
+    assert hot == {created[2]['order_id'], created[3]['order_id']}
+    assert sorted(o['order_id'] for o in archived(archive)) == sorted(o['order_id'] for o in created[:2])
+    # Read back exactly as stored, Decimals included
+    assert {o['order_id']: o for o in archived(archive)}[created[0]['order_id']] == created[0]
+    only_older = archived(archive, since=time.time() - 500 * DAY, until=time.time() - 390 * DAY)
+    assert [o['order_id'] for o in only_older] == [created[0]['order_id']]
+
+    # The next run starts where this one ended and finds nothing new
+    assert asyncio.run(archive_orders(orders, archive, older_than_days=365))['archived'] == 0
+
+
+def test_interrupted_run_is_completed_and_truncated_files_are_skipped(tmp_path):
+    orders, archive, created = setup(tmp_path, [400, 390])
+    # A run that deleted both orders, archived only the first and stopped inside the second's write
+    asyncio.run(archive.write_journal('crashed', created))
+    for o in created:
+        asyncio.run(orders.delete_order(o['order_id']))
+    asyncio.run(archive.append('crashed', created[:1]))
+    path = os.path.join(archive.root, archive.months()[0], 'part-crashed.jsonl.gz')
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(b'{"order_id": "half')[:20])
+
+    result = asyncio.run(archive_orders(orders, archive, older_than_days=365))
+    assert result['recovered'] == 2
+    # The first order is archived twice, and read once
+    assert sorted(o['order_id'] for o in archived(archive)) == sorted(o['order_id'] for o in created)
+    assert asyncio.run(archive.read_journal()) is None
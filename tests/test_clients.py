@@ -0,0 +1,120 @@
+"""The clients must retry idempotent requests on server and connection errors, never POSTs, on one pooled session.
+
+    python -m pytest tests/test_clients.py
+"""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from client.restaurant_client import AsyncRestaurantClient, RestaurantClient
+
+ITEM = {'item_id': 'a', 'name': 'Margherita', 'price': '12.99'}
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so that a reused connection shows up as one client port
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.calls.append((self.command, self.client_address[1]))
+        outcome = self.server.plan.pop(0) if self.server.plan else 200
+        if outcome == 'drop':
+            # Close without answering, the client sees the connection fail
+            self.close_connection = True
+            return
+        body = b'{"item_id": "a", "name": "Margherita", "price": "12.99"}' if outcome == 200 else b'{}'
+        self.send_response(outcome)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local API stand-in: answers each request with the next status in ``plan`` (200 when empty) or 'drop'"""
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.plan, httpd.calls = [], []
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def base_url(server) -> str:
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def sync_client(server) -> RestaurantClient:
+    return RestaurantClient(base_url(server), backoff_factor=0)
+
+
+def test_get_is_retried_on_server_errors(server):
+    server.plan = [502, 503]
+    with sync_client(server) as client:
+        assert client.get_menu_item('a') == ITEM
+    assert len(server.calls) == 3
+
+
+def test_get_is_retried_after_a_dropped_connection(server):
+    server.plan = ['drop']
+    with sync_client(server) as client:
+        assert client.get_menu_item('a') == ITEM
+    assert len(server.calls) == 2
+
+
+def test_post_is_not_retried(server):
+    server.plan = [503, 'drop']
+    with sync_client(server) as client:
+        with pytest.raises(requests.HTTPError):
+            client.create_menu_item(ITEM)
+        with pytest.raises(requests.ConnectionError):
+            client.create_menu_item(ITEM)
+    assert [method for method, _ in server.calls] == ['POST', 'POST']
+
+
+def test_calls_share_one_session_and_connection(server):
+    with sync_client(server) as client:
+        session = client.session
+        for _ in range(3):
+            client.get_menu_item('a')
+        assert client.session is session
+    assert len(server.calls) == 3
+    assert len({port for _, port in server.calls}) == 1
+
+
+def test_async_get_is_retried_on_server_errors_and_post_is_not(server):
+    async def run():
+        async with AsyncRestaurantClient(base_url(server), backoff_factor=0) as client:
+            server.plan = [502, 503]
+            item = await client.get_menu_item('a')
+            server.plan = [503]
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.create_menu_item(ITEM)
+            return item
+
+    assert asyncio.run(run()) == ITEM
+    assert [method for method, _ in server.calls] == ['GET', 'GET', 'GET', 'POST']
+
+
+def test_async_calls_share_one_connection(server):
+    async def run():
+        async with AsyncRestaurantClient(base_url(server)) as client:
+            pool = client.client
+            for _ in range(3):
+                await client.get_menu_item('a')
+            return client.client is pool
+
+    assert asyncio.run(run())
+    assert len({port for _, port in server.calls}) == 1
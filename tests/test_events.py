@@ -0,0 +1,54 @@
+"""The event broker must fan each change out once per subscriber and cut off slow subscribers.
+
+    python -m pytest tests/test_events.py
+"""
+import asyncio
+
+import orjson
+
+from api.events import EventBroker
+
+
+def drain(subscriber) -> list:
+    frames = []
+    while not subscriber.queue.empty():
+        frames.append(subscriber.queue.get_nowait())
+    return frames
+
+
+def data(frame: bytes) -> dict:
+    return orjson.loads(frame.split(b'data: ', 1)[1])
+
+
+def test_events_reach_subscribers_of_their_topic():
+    async def run():
+        broker = EventBroker(buffer_size=8, relay_url=None)
+        everything = broker.subscribe()
+        menu_only = broker.subscribe({'menu'})
+        broker.publish('order', {'action': 'created', 'order_id': 'o1'})
+        broker.publish('menu', {'action': 'deleted', 'item_id': 'm1'})
+        return drain(everything), drain(menu_only)
+
+    everything, menu_only = asyncio.run(run())
+    assert [data(frame)['action'] for frame in everything] == ['created', 'deleted']
+    assert everything[0].startswith(b'id: 1\nevent: order\n')
+    # Subscribers share the rendered frame rather than each getting a copy
+    assert menu_only == [everything[1]]
+
+
+def test_slow_subscriber_is_cut_off_with_an_overflow_event():
+    async def run():
+        broker = EventBroker(buffer_size=3, relay_url=None)
+        slow = broker.subscribe()
+        fast = broker.subscribe()
+        for n in range(5):
+            broker.publish('order', {'action': 'updated', 'order_id': f'o{n}'})
+            drain(fast)
+        return broker, slow
+
+    broker, slow = asyncio.run(run())
+    frames = drain(slow)
+    assert len(frames) == 4
+    assert frames[-1].startswith(b'event: overflow')
+    assert slow not in broker.subscribers
+    assert len(broker.subscribers) == 1
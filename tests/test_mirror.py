@@ -0,0 +1,54 @@
+"""A mirror's full load must not miss writes that another worker's cached menu pages predate.
+
+    python -m pytest tests/test_mirror.py
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import app
+from api.controllers import changes, menu_controller
+from api.repositories.change_log_repository import SQLiteChangeLogRepository
+from api.repositories.menu_repository import CachedMenuRepository, SQLiteMenuRepository
+from api.repositories.sqlite_repository import SQLiteDatabase
+from api.repositories.stats_repository import SQLiteStatsRepository
+from client.mirror import CHANGES_PAGE_SIZE, Mirror
+from client.restaurant_client import RestaurantClient
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Two workers' menu repositories, each with its own cache, on one store; requests go to the first"""
+    database = SQLiteDatabase(str(tmp_path / 'restaurant.db'))
+    monkeypatch.setattr(changes, 'change_log', SQLiteChangeLogRepository(database))
+    monkeypatch.setattr(menu_controller, 'stats_repository', SQLiteStatsRepository(database))
+    first, second = (CachedMenuRepository(SQLiteMenuRepository(database)) for _ in range(2))
+    monkeypatch.setattr(menu_controller, 'menu_repository', first)
+    return first, second
+
+
+def serve(monkeypatch, worker):
+    monkeypatch.setattr(menu_controller, 'menu_repository', worker)
+
+
+def test_full_load_reads_past_a_stale_menu_cache(workers, monkeypatch):
+    first, second = workers
+    client = RestaurantClient('http://testserver', session=TestClient(app))
+    item = client.create_menu_item({'name': 'Margherita', 'price': 12.99, 'description': None,
+                                    'category': 'Pizza'})
+    # The first worker caches the page the mirror reads, then the second worker changes the item
+    list(client.iter_menu_items(CHANGES_PAGE_SIZE))
+    serve(monkeypatch, second)
+    client.patch_menu_item(item['item_id'], {'price': 14.99})
+    serve(monkeypatch, first)
+
+    # Read through the cache, the change is already behind the position and is never replayed
+    cached = Mirror(client.get_menu_changes, lambda: client.iter_menu_items(CHANGES_PAGE_SIZE), 'item_id', 'item')
+    cached.sync()
+    assert cached.items[item['item_id']]['price'] == '12.99'
+
+    mirror = client.mirror_menu()
+    mirror.sync()
+    assert mirror.items[item['item_id']]['price'] == '14.99'
+    client.create_menu_item({'name': 'Marinara', 'price': 9.5, 'description': None, 'category': 'Pizza'})
+    assert mirror.sync() == 1
+    assert len(mirror.items) == 2
@@ -0,0 +1,65 @@
+"""Integer-cent pricing must give exactly the totals of the Decimal ROUND_DOWN arithmetic it replaced.
+
+    python -m pytest tests/test_money.py
+"""
+import random
+from decimal import ROUND_DOWN, Decimal
+
+import pytest
+
+from api import money
+
+
+def decimal_price(lines, discount_pct):
+    """The previous Decimal implementation of calculate_price"""
+    subtotal = Decimal('0.0')
+    for line in lines:
+        subtotal += Decimal(str(line['unit_price'])) * Decimal(str(line['quantity']))
+    subtotal = subtotal.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    total = (subtotal - subtotal * discount_pct).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    return subtotal, total
+
+
+def random_order(rng: random.Random) -> dict:
+    return {
+        'items': [{'item_id': f'item-{rng.randrange(50)}', 'quantity': Decimal(rng.randint(1, 999)),
+                   'unit_price': Decimal(rng.randint(1, 99999999)).scaleb(-2)}
+                  for _ in range(rng.randint(0, 8))],
+        'discount_pct': Decimal(rng.randint(0, 100)).scaleb(-2),
+    }
+
+
+def test_price_order_matches_decimal_round_down():
+    rng = random.Random(17)
+    for _ in range(5000):
+        order = random_order(rng)
+        subtotal, total = money.price_order(order['items'], order['discount_pct'])
+        assert (money.from_cents(subtotal), money.from_cents(total)) == decimal_price(order['items'],
+                                                                                     order['discount_pct'])
+
+
+def test_price_orders_matches_price_order():
+    rng = random.Random(3)
+    unit_cents = {f'item-{i}': rng.randint(1, 99999) for i in range(50)}
+    orders = [random_order(rng) for _ in range(500)]
+    for order in orders:
+        for line in order['items']:
+            line['unit_price'] = money.from_cents(unit_cents[line['item_id']])
+    assert money.price_orders(orders, unit_cents) == [
+        money.price_order(order['items'], order['discount_pct']) for order in orders
+    ]
+
+
+def test_discount_fractions_of_a_cent_go_to_the_customer():
+    assert money.apply_discount(15, Decimal('0.10')) == 13
+    assert money.divide_down(-7, 2) == -3
+
+
+def test_cents_round_trip():
+    assert money.to_cents(Decimal('12.99')) == 1299
+    assert money.to_cents(Decimal('1E+1')) == 1000
+    assert money.to_cents(10) == 1000
+    assert money.to_cents(9.99) == 999
+    assert str(money.from_cents(1000)) == '10.00'
+    with pytest.raises(ValueError):
+        money.to_cents(Decimal('0.001'))
@@ -0,0 +1,57 @@
+"""Orders must be priced at the menu's current price, whichever worker changed it.
+
+    python -m pytest tests/test_pricing.py
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import app
+from api.controllers import changes, menu_controller, order_controller
+from api.repositories.change_log_repository import SQLiteChangeLogRepository
+from api.repositories.menu_repository import CachedMenuRepository, SQLiteMenuRepository
+from api.repositories.order_repository import SQLiteOrderRepository
+from api.repositories.sqlite_repository import SQLiteDatabase
+from api.repositories.stats_repository import SQLiteStatsRepository
+from client.order_client import OrderClient
+from client.restaurant_client import RestaurantClient
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Two workers' menu repositories, each with its own cache, on one store"""
+    database = SQLiteDatabase(str(tmp_path / 'restaurant.db'))
+    stats = SQLiteStatsRepository(database)
+    monkeypatch.setattr(changes, 'change_log', SQLiteChangeLogRepository(database))
+    monkeypatch.setattr(menu_controller, 'stats_repository', stats)
+    monkeypatch.setattr(order_controller, 'stats_repository', stats)
+    monkeypatch.setattr(order_controller, 'order_repository', SQLiteOrderRepository(database))
+    return tuple(CachedMenuRepository(SQLiteMenuRepository(database)) for _ in range(2))
+
+
+def serve(monkeypatch, worker):
+    monkeypatch.setattr(menu_controller, 'menu_repository', worker)
+    monkeypatch.setattr(order_controller, 'menu_repository', worker)
+
+
+def test_order_after_a_price_change_on_another_worker_gets_the_new_price(workers, monkeypatch):
+    first, second = workers
+    session = TestClient(app)
+    menu = RestaurantClient('http://testserver', session=session)
+    orders = OrderClient('http://testserver', session=session)
+    serve(monkeypatch, first)
+    item = menu.create_menu_item({'name': 'Margherita', 'price': 12.99, 'description': None, 'category': 'Pizza'})
+    order = {'order_number': '000001', 'items': [{'item_id': item['item_id'], 'quantity': 2}]}
+
+    # The second worker prices an order, and reads the menu, before the first changes the price
+    serve(monkeypatch, second)
+    assert orders.create_order(order)['subtotal'] == '25.98'
+    menu.get_menu_item(item['item_id'])
+    serve(monkeypatch, first)
+    menu.patch_menu_item(item['item_id'], {'price': 14.99})
+
+    serve(monkeypatch, second)
+    created = orders.create_order(order)
+    assert created['items'][0]['unit_price'] == '14.99'
+    assert created['subtotal'] == '29.98'
+    batch = orders.create_orders([order, order])
+    assert [result['order']['total'] for result in batch['results']] == ['29.98', '29.98']
@@ -0,0 +1,281 @@
+"""Behaviour every storage backend must share, run against each of them.
+
+DynamoDB runs on moto's in-process mock, or on DynamoDB Local when
+DYNAMODB_ENDPOINT_URL is set. Run from the repository root:
+
+    python -m pytest tests/test_repository_contract.py
+"""
+import asyncio
+import time
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from api.repositories import change_log_repository
+from api.repositories.backends import BACKENDS
+from api.repositories.base_repository import connect_dynamodb
+from api.repositories.sqlite_repository import SQLiteDatabase
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request, tmp_path):
+    """(menu, orders, stats, change log) repositories on a fresh, empty store"""
+    classes = BACKENDS[request.param]
+    if request.param == 'sqlite':
+        database = SQLiteDatabase(str(tmp_path / 'restaurant.db'))
+        yield tuple(repository_class(database) for repository_class in classes)
+        return
+
+    pytest.importorskip('moto')
+    from benchmarks.local_dynamodb import local_dynamodb
+    with local_dynamodb():
+        dynamodb = connect_dynamodb()
+        yield tuple(repository_class(dynamodb) for repository_class in classes)
+        # DynamoDB Local keeps its tables between runs
+        client = dynamodb.meta.client
+        for table_name in ('menu_items', 'orders', 'dashboard_stats', 'change_log'):
+            client.delete_table(TableName=table_name)
+
+
+@pytest.fixture
+def repositories(backend):
+    """(menu, orders, stats) repositories on a fresh, empty store"""
+    return backend[:3]
+
+
+@pytest.fixture
+def change_log(backend):
+    return backend[3]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def menu_item(name='Margherita', price='12.99'):
+    return {'name': name, 'price': Decimal(price), 'description': None, 'category': 'Pizza'}
+
+
+def order(item_id, order_number='000001', quantity=2, unit_price='12.99', order_date=None):
+    subtotal = Decimal(unit_price) * quantity
+    return {
+        'order_number': order_number,
+        'items': [{'item_id': item_id, 'quantity': quantity, 'unit_price': Decimal(unit_price)}],
+        'subtotal': subtotal,
+        'discount_pct': Decimal('0'),
+        'total': subtotal,
+        'order_date': str(order_date if order_date is not None else time.time()),
+    }
+
+
+def status_of(coroutine) -> int:
+    with pytest.raises(HTTPException) as error:
+        run(coroutine)
+    return error.value.status_code
+
+
+def test_menu_item_round_trip(repositories):
+    menu, _, _ = repositories
+    created = run(menu.create_item(menu_item()))
+    assert created['version'] == 1
+
+    stored = run(menu.get_by_id(created['item_id']))
+    assert stored['name'] == 'Margherita'
+    assert stored['price'] == Decimal('12.99') and isinstance(stored['price'], Decimal)
+    assert stored['description'] is None
+    assert run(menu.get_by_id('missing')) is None
+
+    other = run(menu.create_item(menu_item('Carbonara')))
+    found = run(menu.get_many([created['item_id'], other['item_id'], 'missing', created['item_id']]))
+    assert sorted(item['name'] for item in found) == ['Carbonara', 'Margherita']
+
+
+def test_menu_versioned_writes(repositories):
+    menu, _, _ = repositories
+    item_id = run(menu.create_item(menu_item()))['item_id']
+
+    updated = run(menu.patch_item(item_id, {'price': Decimal('13.50')}, expected_version=1))
+    assert updated['version'] == 2 and updated['price'] == Decimal('13.5') and updated['name'] == 'Margherita'
+    assert run(menu.update_item(item_id, {'name': 'Unversioned'}))['version'] == 3
+
+    assert status_of(menu.patch_item(item_id, {'price': Decimal('1')}, expected_version=1)) == 412
+    assert status_of(menu.patch_item('missing', {'price': Decimal('1')})) == 404
+    assert status_of(menu.patch_item(item_id, {'price': None})) == 400
+
+    assert status_of(menu.delete_item(item_id, expected_version=2)) == 412
+    deleted = run(menu.delete_item(item_id, expected_version=3))
+    assert deleted['name'] == 'Unversioned'
+    assert status_of(menu.delete_item(item_id)) == 404
+    assert run(menu.get_by_id(item_id)) is None
+
+
+def test_pages_cover_every_item_once(repositories):
+    menu, _, _ = repositories
+    created = {run(menu.create_item(menu_item(f'Item {i}')))['item_id'] for i in range(7)}
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = run(menu.get_page(3, cursor))
+        assert len(items) <= 3
+        seen += [item['item_id'] for item in items]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(created)
+    assert {item['item_id'] for item in run(menu.get_all())} == created
+
+    async def scanned():
+        return [item['item_id'] async for page in menu.parallel_scan() for item in page]
+    assert sorted(run(scanned())) == sorted(created)
+
+
+def test_invalid_cursor_is_rejected(repositories):
+    menu, orders, _ = repositories
+    assert status_of(menu.get_page(10, 'not-a-cursor')) == 400
+    assert status_of(orders.get_range_page(0, time.time(), 10, 'not-a-cursor')) == 400
+
+
+def test_order_versioned_writes(repositories):
+    _, orders, _ = repositories
+    created = run(orders.create_order(order('item1')))
+    assert created['version'] == 1
+    assert run(orders.get_by_id(created['order_id']))['items'][0]['unit_price'] == Decimal('12.99')
+
+    previous, updated = run(orders.patch_order(created['order_id'], {'discount_pct': Decimal('0.25')}, 1))
+    assert previous['version'] == 1 and previous['discount_pct'] == 0
+    assert updated['version'] == 2 and updated['discount_pct'] == Decimal('0.25')
+    assert updated['order_number'] == '000001'
+    assert run(orders.get_by_id(created['order_id']))['discount_pct'] == Decimal('0.25')
+
+    assert status_of(orders.update_order(created['order_id'], {'discount_pct': Decimal('0')}, 1)) == 412
+    assert status_of(orders.update_order('missing', {'discount_pct': Decimal('0')})) == 404
+    assert status_of(orders.update_order(created['order_id'], {'order_id': 'other'})) == 400
+
+    deleted = run(orders.delete_order(created['order_id'], 2))
+    assert deleted['order_id'] == created['order_id']
+    assert status_of(orders.delete_order(created['order_id'])) == 404
+
+
+def test_order_time_range(repositories):
+    _, orders, _ = repositories
+    now = time.time()
+    # One order every 10 hours over five days
+    for i in range(12):
+        run(orders.create_order(order('item1', order_number=str(i), order_date=now - i * 36000)))
+
+    window, cursor = [], None
+    while True:
+        page, cursor = run(orders.get_range_page(now - 2 * 86400, now, 2, cursor))
+        assert len(page) <= 2
+        window += page
+        if not cursor:
+            break
+    assert [o['order_number'] for o in window] == [str(i) for i in range(5)]
+
+    empty, cursor = run(orders.get_range_page(now - 100 * 86400, now - 90 * 86400, 10))
+    assert empty == [] and cursor is None
+
+
+def test_order_number_lookup(repositories):
+    _, orders, _ = repositories
+    now = time.time()
+    run(orders.create_order(order('item1', order_number='abc123', order_date=now - 60)))
+    run(orders.create_order(order('item1', order_number='abc123', quantity=3, order_date=now)))
+    run(orders.create_order(order('item1', order_number='zzz999')))
+
+    matches = run(orders.get_by_number('abc123'))
+    assert [o['items'][0]['quantity'] for o in matches] == [3, 2]
+    assert run(orders.get_by_number('nope')) == []
+
+
+def test_order_batches(repositories):
+    _, orders, _ = repositories
+    batch = [order('item1', order_number=str(i)) for i in range(30)]
+    assert run(orders.create_orders(batch)) == {}
+    assert len({o['order_id'] for o in batch}) == 30
+    assert len(run(orders.get_all())) == 30
+
+    for stored in batch[:5]:
+        stored['discount_pct'] = Decimal('0.5')
+    assert run(orders.batch_put(batch[:5])) == {}
+    assert sum(o['discount_pct'] == Decimal('0.5') for o in run(orders.get_all())) == 5
+
+
+def test_dashboard_stats(repositories):
+    _, orders, stats = repositories
+    first = run(orders.create_order(order('item1', quantity=2, unit_price='10')))
+    second = run(orders.create_order(order('item2', quantity=1, unit_price='5')))
+    run(stats.record_order_changes([(None, first), (None, second)]))
+    run(stats.record_menu_count_change(2))
+
+    _, changed = run(orders.patch_order(first['order_id'], {
+        'items': [{'item_id': 'item1', 'quantity': 1, 'unit_price': Decimal('10')}],
+        'subtotal': Decimal('10'), 'total': Decimal('10'),
+    }))
+    run(stats.record_order_change(first, changed))
+    run(stats.record_order_change(run(orders.delete_order(second['order_id'])), None))
+
+    dashboard = run(stats.get_dashboard())
+    assert dashboard['total_orders'] == 1
+    assert dashboard['total_revenue'] == Decimal('10')
+    assert dashboard['average_order_amount'] == Decimal('10')
+    assert dashboard['menu_items_count'] == 2
+    assert [row['order_id'] for row in dashboard['recent_orders']] == [first['order_id']]
+    assert dashboard['popular_items'] == [{'item_id': 'item1', 'total_ordered': 1, 'revenue': Decimal('10')}]
+
+    async def rebuild():
+        return await stats.rebuild(orders.parallel_scan(), 2)
+    assert run(rebuild()) == 1
+    assert run(stats.get_dashboard()) == dashboard
+
+
+def test_change_log(change_log):
+    assert run(change_log.position('orders')) == 0
+    assert run(change_log.read('orders', 0, 10)) == ([], False)
+
+    run(change_log.record('orders', [('o1', 'created'), ('o2', 'created')]))
+    run(change_log.record('orders', [('o1', 'deleted')]))
+    run(change_log.record('menu_items', [('m1', 'created')]))
+    assert run(change_log.position('orders')) == 3
+
+    entries, more = run(change_log.read('orders', 0, 2))
+    assert [(entry['seq'], entry['key'], entry['action']) for entry in entries] == [
+        (1, 'o1', 'created'), (2, 'o2', 'created'),
+    ]
+    assert more
+    entries, more = run(change_log.read('orders', 2, 10))
+    assert [(entry['seq'], entry['key'], entry['action']) for entry in entries] == [(3, 'o1', 'deleted')]
+    assert not more
+    assert run(change_log.read('orders', 3, 10)) == ([], False)
+
+    # Positions past the end belong to some other store
+    assert status_of(change_log.read('orders', 4, 10)) == 410
+
+
+def test_change_log_trim(change_log):
+    run(change_log.record('orders', [('o1', 'created'), ('o2', 'created')]))
+    cutoff = time.time()
+    time.sleep(0.01)
+    run(change_log.record('orders', [('o3', 'created')]))
+
+    assert run(change_log.trim('orders', cutoff)) == 2
+    assert run(change_log.trim('orders', cutoff)) == 0
+    assert status_of(change_log.read('orders', 1, 10)) == 410
+    entries, _ = run(change_log.read('orders', 2, 10))
+    assert [entry['key'] for entry in entries] == ['o3']
+    assert run(change_log.position('orders')) == 3
+
+
+def test_change_log_waits_for_gaps_to_settle(tmp_path, monkeypatch):
+    database = SQLiteDatabase(str(tmp_path / 'restaurant.db'))
+    change_log = BACKENDS['sqlite'][3](database)
+    run(change_log.record('orders', [('o1', 'created'), ('o2', 'created'), ('o3', 'created')]))
+    # As if the write holding seq 2 had not logged its entry yet
+    run(database.write(lambda connection: connection.execute("DELETE FROM change_log WHERE seq = 2")))
+
+    entries, more = run(change_log.read('orders', 0, 10))
+    assert [entry['seq'] for entry in entries] == [1] and not more
+
+    monkeypatch.setattr(change_log_repository, 'CHANGE_LOG_SETTLE_SECONDS', 0)
+    entries, _ = run(change_log.read('orders', 1, 10))
+    assert [entry['seq'] for entry in entries] == [3]
@@ -0,0 +1,77 @@
+"""The direct JSON path must render exactly what FastAPI renders through the response models.
+
+    python -m pytest tests/test_serialization.py
+"""
+import asyncio
+from decimal import Decimal
+from typing import List
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.controllers.serialization import json_lines, json_response, parse_fields
+from api.schemas.menu_schemas import MenuItemBatchResponse, MenuItemResponse
+from api.schemas.order_schemas import OrderResponse
+
+
+def model_path(type_, content, exclude_unset=False) -> bytes:
+    field = create_response_field(name='response', type_=type_)
+    return JSONResponse(asyncio.run(serialize_response(
+        field=field, response_content=content, exclude_unset=exclude_unset
+    ))).body
+
+
+MENU_ITEMS = [
+    {'item_id': 'a', 'name': 'Café ☕', 'price': 10.0, 'description': None, 'category': 'Drinks', 'version': 3},
+    {'item_id': 'b', 'name': 'Pie "x"\\', 'price': 9.99, 'description': 'two\nlines\x1f', 'category': 'Cake'},
+    {'item_id': 'c', 'name': 'Stew', 'price': Decimal('12345678.90'), 'description': '', 'category': 'Main',
+     'created_at': '1700000000.0', 'version': Decimal(1)},
+    {'item_id': 'd', 'name': 'Bread', 'price': 3, 'description': None, 'category': 'Side'},
+]
+
+ORDERS = [
+    {'order_id': 'o1', 'order_number': '000001', 'version': Decimal(2), 'order_day': '2024-01-01',
+     'order_ts': Decimal('1704067200.5'), 'items': [
+         {'item_id': 'a', 'quantity': Decimal(2), 'unit_price': Decimal('10.00')},
+         {'item_id': 'b', 'quantity': Decimal(1), 'unit_price': Decimal('9.99'), 'item': MENU_ITEMS[1]},
+     ], 'subtotal': Decimal('29.99'), 'discount_pct': Decimal('0.1'), 'total': Decimal('26.99'),
+     'order_date': '1704067200.5'},
+    # Written before versioning, with no lines
+    {'order_id': 'o2', 'order_number': 'ü', 'items': [], 'subtotal': Decimal('0'), 'discount_pct': Decimal('0E-2'),
+     'total': Decimal('0.00'), 'order_date': '1'},
+]
+
+
+def test_menu_items_match_model_path():
+    assert json_response(MenuItemResponse, MENU_ITEMS).body == model_path(List[MenuItemResponse], MENU_ITEMS)
+
+
+def test_menu_batch_matches_model_path():
+    batch = {'items': MENU_ITEMS, 'missing': ['x', 'y']}
+    assert json_response(MenuItemBatchResponse, batch).body == model_path(MenuItemBatchResponse, batch)
+
+
+@pytest.mark.parametrize('exclude_unset', [True, False])
+def test_orders_match_model_path(exclude_unset):
+    expected = model_path(List[OrderResponse], ORDERS, exclude_unset)
+    assert json_response(OrderResponse, ORDERS, exclude_unset=exclude_unset).body == expected
+
+
+def test_json_lines_match_model_dump_json():
+    expected = ''.join(OrderResponse.model_validate(order).model_dump_json(exclude_unset=True) + '\n'
+                       for order in ORDERS)
+    assert json_lines(OrderResponse, ORDERS, exclude_unset=True) == expected.encode()
+
+
+def test_fields_trim_the_model_path():
+    only = parse_fields('order_id, total,order_date', OrderResponse)
+    expected = [{k: v for k, v in order.items() if k in only}
+                for order in orjson.loads(model_path(List[OrderResponse], ORDERS))]
+    assert orjson.loads(json_response(OrderResponse, ORDERS, only=only).body) == expected
+    with pytest.raises(HTTPException) as error:
+        parse_fields('order_id,secret', OrderResponse)
+    assert error.value.status_code == 400
@@ -0,0 +1,46 @@
+"""A worker must warm its storage before serving, and the server must size its worker pool from the CPU count.
+
+    python -m pytest tests/test_server.py
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import server
+from api.app import app
+from api.config import STARTUP_WARM_CONNECTIONS
+from api.controllers import menu_controller, order_controller
+from api.repositories.menu_repository import CachedMenuRepository, SQLiteMenuRepository
+from api.repositories.order_repository import SQLiteOrderRepository
+from api.repositories.sqlite_repository import SQLiteDatabase
+
+
+@pytest.fixture
+def warm_ups(tmp_path, monkeypatch):
+    """Connection counts passed to each repository's warm_up, on SQLite repositories swapped into the app"""
+    database = SQLiteDatabase(str(tmp_path / 'restaurant.db'))
+    orders, menu = SQLiteOrderRepository(database), SQLiteMenuRepository(database)
+    calls = {}
+    for name, repository in (('orders', orders), ('menu', menu)):
+        def record(connections=1, name=name, warm_up=repository.warm_up):
+            calls[name] = connections
+            return warm_up(connections)
+        monkeypatch.setattr(repository, 'warm_up', record)
+    monkeypatch.setattr(order_controller, 'order_repository', orders)
+    monkeypatch.setattr(menu_controller, 'menu_repository', CachedMenuRepository(menu))
+    return calls
+
+
+def test_startup_warms_storage_before_the_first_request(warm_ups):
+    with TestClient(app) as client:
+        assert warm_ups == {'orders': STARTUP_WARM_CONNECTIONS, 'menu': 1}
+        assert client.get('/').status_code == 200
+
+
+def test_workers_default_to_one_per_cpu_core(monkeypatch):
+    monkeypatch.setattr(server, 'WEB_CONCURRENCY', 0)
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    assert server.worker_count() == cores
+    monkeypatch.setattr(server, 'WEB_CONCURRENCY', 3)
+    assert server.worker_count() == 3
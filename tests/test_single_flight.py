@@ -0,0 +1,116 @@
+"""Identical concurrent reads must share one call, and failures and cancellations must not leak between callers.
+
+    python -m pytest tests/test_single_flight.py
+"""
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from api.repositories.cache import SingleFlight, TTLCache
+
+
+class Backend:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def read(self):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        if self.fail:
+            raise ConnectionError('down')
+        return {'call': call}
+
+
+def test_concurrent_reads_share_one_call():
+    async def run():
+        backend, flights = Backend(), SingleFlight('test')
+        readers = [asyncio.ensure_future(flights.do(('item', 'a'), backend.read)) for _ in range(20)]
+        other = asyncio.ensure_future(flights.do(('item', 'b'), backend.read))
+        await asyncio.sleep(0)
+        backend.release.set()
+        results = await asyncio.gather(*readers)
+        await other
+        # Once finished nothing is kept, the next read goes to the backend again
+        await flights.do(('item', 'a'), backend.read)
+        return backend.calls, results
+
+    calls, results = asyncio.run(run())
+    assert calls == 3
+    assert all(result is results[0] for result in results)
+
+
+def test_failure_reaches_every_waiter_and_is_not_remembered():
+    async def run():
+        backend, flights = Backend(fail=True), SingleFlight('test')
+        readers = [asyncio.ensure_future(flights.do(('all',), backend.read)) for _ in range(3)]
+        await asyncio.sleep(0)
+        backend.release.set()
+        outcomes = await asyncio.gather(*readers, return_exceptions=True)
+        backend.fail = False
+        return outcomes, await flights.do(('all',), backend.read)
+
+    outcomes, retried = asyncio.run(run())
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+    assert retried == {'call': 2}
+
+
+def test_cancelled_waiter_leaves_the_others_waiting():
+    async def run():
+        backend, flights = Backend(), SingleFlight('test')
+        first = asyncio.ensure_future(flights.do(('item', 'a'), backend.read))
+        second = asyncio.ensure_future(flights.do(('item', 'a'), backend.read))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        backend.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, backend.calls
+
+    assert asyncio.run(run()) == ({'call': 1}, 1)
+
+
+def test_call_is_cancelled_when_every_waiter_gives_up():
+    async def run():
+        backend, flights = Backend(), SingleFlight('test')
+        reader = asyncio.ensure_future(flights.do(('item', 'a'), backend.read))
+        await asyncio.sleep(0)
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        # A new reader starts a new call rather than joining the cancelled one
+        backend.release.set()
+        return await flights.do(('item', 'a'), backend.read), backend.calls
+
+    assert asyncio.run(run()) == ({'call': 2}, 2)
+
+
+def test_cache_does_not_share_loads_across_a_write():
+    async def run():
+        backend, cache = Backend(), TTLCache(60, 10)
+        before = asyncio.ensure_future(cache.get_or_load(('item', 'a'), backend.read))
+        await asyncio.sleep(0)
+        cache.clear()
+        after = asyncio.ensure_future(cache.get_or_load(('item', 'a'), backend.read))
+        await asyncio.sleep(0)
+        backend.release.set()
+        return (await before).value, (await after).value, backend.calls
+
+    assert asyncio.run(run()) == ({'call': 1}, {'call': 2}, 2)
+
+
+def test_cache_etag_follows_the_data():
+    page = ([{'item_id': 'a', 'price': Decimal('12.99'), 'version': Decimal(3)}], 'cursor')
+    # Two workers' caches, each filling from the same data
+    first, second = TTLCache(60, 10), TTLCache(60, 10)
+    etag = first.put(('page', 1, None), page, first.generation).etag
+    assert second.put(('page', 1, None), page, second.generation).etag == etag
+    first.clear()
+    assert first.put(('page', 1, None), page, first.generation).etag == etag
+
+    changed = ([{'item_id': 'a', 'price': Decimal('14.99'), 'version': Decimal(4)}], 'cursor')
+    assert first.put(('page', 1, None), changed, first.generation).etag != etag
@@ -0,0 +1,68 @@
+"""Coalesced writes must share batches, report each caller's own outcome and bound the queue.
+
+    python -m pytest tests/test_write_coalescer.py
+"""
+import asyncio
+
+import pytest
+
+from api.repositories.base_repository import WriteCoalescer
+
+
+class Store:
+    """batch_put stand-in that records each batch and fails items named 'bad'"""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.in_flight = self.most_in_flight = 0
+
+    async def batch_put(self, items):
+        self.batches.append([item['id'] for item in items])
+        self.in_flight += len(items)
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= len(items)
+        return {index: 'Rejected' for index, item in enumerate(items) if item['id'] == 'bad'}
+
+
+def test_concurrent_writes_share_batches_and_get_their_own_result():
+    store = Store()
+    coalescer = WriteCoalescer(store.batch_put, window=0.05, max_batch=4)
+
+    async def run():
+        return await asyncio.gather(*(coalescer.write({'id': i}) for i in ['a', 'b', 'bad', 'c', 'd', 'e']),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    # Four fill a batch at once, the other two go when the window closes
+    assert store.batches == [['a', 'b', 'bad', 'c'], ['d', 'e']]
+    assert [r['id'] for r in results if isinstance(r, dict)] == ['a', 'b', 'c', 'd', 'e']
+    assert isinstance(results[2], RuntimeError) and str(results[2]) == 'Rejected'
+
+
+def test_pending_writes_are_bounded():
+    store = Store(delay=0.01)
+    coalescer = WriteCoalescer(store.batch_put, window=0.001, max_batch=2, max_pending=3)
+
+    async def run():
+        await asyncio.gather(*(coalescer.write({'id': str(i)}) for i in range(12)))
+
+    asyncio.run(run())
+    assert sum(map(len, store.batches)) == 12
+    assert store.most_in_flight <= 3
+
+
+def test_flush_failure_reaches_every_caller():
+    async def failing(items):
+        raise ConnectionError('down')
+
+    coalescer = WriteCoalescer(failing, window=0.001)
+
+    async def run():
+        return await asyncio.gather(coalescer.write({'id': 'a'}), coalescer.write({'id': 'b'}),
+                                    return_exceptions=True)
+
+    assert all(isinstance(r, ConnectionError) for r in asyncio.run(run()))
+    with pytest.raises(ConnectionError):
+        asyncio.run(coalescer.write({'id': 'c'}))